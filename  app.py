@@ -1,68 +1,225 @@
 import streamlit.components.v1 as components
 import streamlit as st
+import io
 import os
 import tempfile
-from src.readers import LeitorPDF
-from src.log_parser import LogParser
+import threading
+import time
+from src.cache import CacheDisco, CacheResultados
+from src.config import (
+    CACHE_RESULTADOS_DIR,
+    CACHE_RESULTADOS_LIMITE_BYTES,
+    CACHE_RESULTADOS_MEMORIA_BYTES,
+)
+from src.core import impressao_regras
+from src.archives import EXTENSOES_PACOTE
+from src.structured import EXTENSOES_ESTRUTURADAS
 from src.reports import GeradorHTML
+from src.service import CONCLUIDA, Tarefa
+from src import metrics
+
+# Quantos achados mais recentes aparecem ao vivo durante a varredura
+ACHADOS_AO_VIVO = 20
+# Intervalo (segundos) entre as atualizações da barra de progresso
+INTERVALO_ATUALIZACAO = 0.5
+# Logs estruturados, compactados e pacotes aceitos no upload (além de .txt e .pdf)
+FORMATOS_UPLOAD = [
+    extensao.lstrip(".") for extensao in tuple(EXTENSOES_ESTRUTURADAS) + EXTENSOES_PACOTE
+]
 
 # Configuração da página para ocupar a tela toda
 st.set_page_config(page_title="SOC Scanner", layout="wide")
 
 st.title("🛡️ Scanner de Auditoria e Logs")
 st.write(
-    "Faça o upload do seu arquivo de log (.txt) ou documento (.pdf) para buscar dados sensíveis vazados."
+    "Faça o upload do seu arquivo de log (.txt, estruturado: .jsonl/.csv, ou compactado: "
+    ".gz/.bz2/.xz/.tar/.zip) "
+    "ou documento (.pdf) para buscar dados sensíveis vazados."
 )
 
+
+@st.cache_resource
+def cache_resultados():
+    # Um só cache por processo do Streamlit, compartilhado entre sessões e reruns
+    return CacheResultados(
+        CacheDisco(CACHE_RESULTADOS_DIR, CACHE_RESULTADOS_LIMITE_BYTES),
+        CACHE_RESULTADOS_MEMORIA_BYTES,
+    )
+
+
+def iniciar_varredura(arquivo_upado):
+    """
+    Dispara a varredura do documento inteiro numa thread de fundo.
+    A interface só acompanha a Tarefa (progresso + achados) até ela terminar.
+    """
+    extensao = arquivo_upado.name.split(".")[-1].lower()
+
+    if extensao == "pdf":
+        # O pdfplumber precisa de um caminho físico: salvamos o upload temporariamente
+        # (a própria Tarefa apaga o arquivo no fim da varredura)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+            tmp.write(arquivo_upado.getvalue())
+        tarefa = Tarefa(arquivo_upado.name, tmp.name, pdf=True, temporario=tmp.name)
+    else:
+        # Log direto da memória: o parser varre os bytes do upload, sem decodificar tudo
+        tarefa = Tarefa(arquivo_upado.name, io.BytesIO(arquivo_upado.getvalue()))
+
+    threading.Thread(target=tarefa.executar, daemon=True).start()
+    return tarefa
+
+
+def texto_progresso(tarefa, progresso):
+    if tarefa.pdf and progresso["total_paginas"]:
+        return (
+            f"📄 Página {progresso['paginas']} de {progresso['total_paginas']}"
+            f" — {progresso['linhas']} linha(s) lida(s)"
+        )
+    return f"📜 {progresso['linhas']} linha(s) lida(s)"
+
+
+def tabela_achados(eventos):
+    return [
+        {
+            "Linha": evento["linha_origem"],
+            "Página": evento.get("pagina", ""),
+            "Arquivo no pacote": evento.get("membro", ""),
+            "Campos": ", ".join(
+                sorted({alerta["campo"] for alerta in evento["alertas"] if alerta.get("campo")})
+            ),
+            "Trecho (mascarado)": evento["texto"][:150],
+            "Alertas": " | ".join(
+                f"{alerta.get('nivel_risco', 'N/A')}: {alerta.get('termo', '')}"
+                for alerta in evento["alertas"]
+            ),
+        }
+        for evento in eventos
+    ]
+
+
+def acompanhar_varredura(tarefa):
+    """
+    Atualiza a barra e a lista de achados enquanto a thread trabalha:
+    os primeiros resultados aparecem antes do fim do documento.
+    """
+    barra = st.progress(0.0, text="⏳ Na fila...")
+    contadores = st.empty()
+    ao_vivo = st.empty()
+
+    while True:
+        # Lê o estado antes do retrato: a última volta já mostra tudo
+        terminou = tarefa.finalizada()
+        progresso = tarefa.progresso()
+
+        barra.progress(progresso["fracao"] or 0.0, text=texto_progresso(tarefa, progresso))
+        contadores.markdown(
+            f"**{len(tarefa.armazem)}** linha(s) com alerta · "
+            f"**{tarefa.armazem.total_alertas()}** alerta(s)"
+        )
+        recentes = tarefa.recentes(ACHADOS_AO_VIVO)
+        if recentes and not terminou:
+            ao_vivo.table(tabela_achados(recentes))
+        else:
+            ao_vivo.empty()
+
+        if terminou:
+            return
+        time.sleep(INTERVALO_ATUALIZACAO)
+
+
 # Componente visual de Upload (O Streamlit faz a mágica do CSS sozinho)
-arquivo_upado = st.file_uploader("Selecione o arquivo", type=["txt", "pdf"])
+arquivo_upado = st.file_uploader("Selecione o arquivo", type=["txt", "pdf"] + FORMATOS_UPLOAD)
+
+# Painel de desempenho (instrumentação desligada por padrão)
+medir_desempenho = st.checkbox("⏱️ Medir tempo de cada etapa")
 
 # Botão de ação
 if st.button("🔎 Iniciar Varredura"):
 
     if arquivo_upado is not None:
-        with st.spinner("Analisando dados..."):
-            texto_bruto = ""
-
-            # O arquivo upado fica na memória. Precisamos salvar temporariamente
-            # para o nosso LeitorPDF conseguir abrir o caminho físico.
-            extensao = arquivo_upado.name.split(".")[-1]
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=f".{extensao}"
-            ) as tmp:
-                tmp.write(arquivo_upado.getvalue())
-                tmp_path = tmp.name
-
-            # Roteamento: É PDF ou é TXT?
-            if extensao == "pdf":
-                leitor = LeitorPDF(tmp_path)
-                texto_bruto = leitor.extrair_texto(
-                    1, 1
-                )  # Lendo a pág 1 para teste rápido
-            else:
-                with open(tmp_path, "r", encoding="utf-8", errors="ignore") as f:
-                    texto_bruto = f.read()
-
-            # 1. Processamento pelo nosso Motor
-            parser = LogParser()
-            dados = parser.processar_texto(texto_bruto)
-
-            # 2. Geração de Relatório
-            gerador = GeradorHTML(dados)
-            caminho_relatorio = "relatorio_final.html"
-            gerador.gerar_html(caminho_relatorio)
-
-            st.success("✅ Varredura Concluída com Sucesso!")
-
-            # 3. Exibir o Relatório HTML diretamente dentro da interface gráfica!
-            st.markdown("### 📊 Resultado da Auditoria")
-            with open(caminho_relatorio, "r", encoding="utf-8") as f:
-                html_content = f.read()
-
-            # Renderiza o HTML seguro dentro do Streamlit
-            components.html(html_content, height=600, scrolling=True)
-
-            # Limpa o arquivo temporário para não lotar o servidor
-            os.remove(tmp_path)
+        if medir_desempenho:
+            metrics.ativar()
+            metrics.zerar()
+
+        # ⚡ Mesmo conteúdo + mesmas regras = resultado já pronto (sem varrer de novo).
+        # A extensão entra na chave: ela escolhe o leitor (ex: .csv campo a campo, .txt texto livre)
+        extensao = os.path.splitext(arquivo_upado.name.lower())[1]
+        chave = CacheResultados.chave(arquivo_upado.getvalue(), impressao_regras(), extensao)
+        resultado = cache_resultados().obter(chave)
+        st.session_state.pop("metricas", None)
+        st.session_state["medir"] = medir_desempenho
+
+        if resultado is not None:
+            # O resultado guardado pode ser de um upload com outro nome
+            resultado = dict(resultado, em_cache=True, arquivo=arquivo_upado.name)
+            st.session_state["resultado"] = resultado
+            st.session_state.pop("tarefa", None)
+        else:
+            # A tarefa fica na sessão: baixar o relatório (rerun) não perde o resultado
+            st.session_state["tarefa"] = iniciar_varredura(arquivo_upado)
+            st.session_state["chave"] = chave
+            st.session_state.pop("resultado", None)
     else:
         st.warning("⚠️ Por favor, anexe um arquivo antes de iniciar.")
+
+tarefa = st.session_state.get("tarefa")
+if tarefa is not None and "resultado" not in st.session_state:
+    # 1. Acompanhamento ao vivo (página/linha + achados conforme aparecem)
+    acompanhar_varredura(tarefa)
+
+    if tarefa.status != CONCLUIDA:
+        st.error(f"❌ A varredura falhou: {tarefa.erro}")
+    else:
+        # 2. Relatório gerado direto na memória (sem gravar e reler do disco)
+        buffer = io.StringIO()
+        GeradorHTML(tarefa.armazem).escrever_html(buffer)
+        resultado = {
+            "arquivo": tarefa.nome,
+            "html": buffer.getvalue(),
+            "linhas_com_alerta": len(tarefa.armazem),
+            "alertas": tarefa.armazem.total_alertas(),
+            "segundos": tarefa.segundos,
+        }
+        cache_resultados().guardar(st.session_state["chave"], resultado)
+        st.session_state["resultado"] = resultado
+
+resultado = st.session_state.get("resultado")
+if resultado is not None:
+    if resultado.get("em_cache"):
+        st.success("⚡ Arquivo já auditado com as mesmas regras: resultado recuperado do cache.")
+    else:
+        st.success(f"✅ Varredura Concluída com Sucesso! ({resultado['segundos']}s)")
+    st.write(
+        f"**{resultado['linhas_com_alerta']}** linha(s) com alerta · "
+        f"**{resultado['alertas']}** alerta(s)"
+    )
+
+    # 3. Exibir o Relatório HTML diretamente dentro da interface gráfica!
+    st.markdown("### 📊 Resultado da Auditoria")
+    components.html(resultado["html"], height=600, scrolling=True)
+    st.download_button(
+        "📥 Baixar relatório (HTML)", resultado["html"], "relatorio_final.html", mime="text/html"
+    )
+
+# 4. Painel de tempos por etapa (PDF, detectores, glossário, relatório...)
+if (tarefa is not None or resultado is not None) and st.session_state.get("medir"):
+    if "metricas" not in st.session_state:
+        st.session_state["metricas"] = metrics.exportar()
+        metrics.desativar()
+    retrato = st.session_state["metricas"]
+
+    with st.expander("⏱️ Desempenho por etapa", expanded=True):
+        st.table(
+            [
+                {"Etapa": etapa, "Segundos": dados["segundos"], "Chamadas": dados["chamadas"]}
+                for etapa, dados in retrato["etapas"].items()
+            ]
+        )
+        st.table(
+            [{"Contador": nome, "Valor": valor} for nome, valor in retrato["contadores"].items()]
+        )
+        st.download_button(
+            "📥 Métricas (JSON)", metrics.exportar_json(retrato=retrato), "metricas.json"
+        )
+        st.download_button(
+            "📥 Métricas (Prometheus)", metrics.exportar_prometheus(retrato), "metricas.prom"
+        )
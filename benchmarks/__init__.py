@@ -0,0 +1 @@
+# ⏱️ Benchmarks do pipeline de varredura (corpus sintético + medição por etapa)
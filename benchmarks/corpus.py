@@ -0,0 +1,203 @@
+import json
+import random
+
+from src.config import GATILHOS_ALERTA, obter_glossario
+
+# Chance (por linha) de cada tipo de dado sensível aparecer no corpus
+DENSIDADES_PADRAO = {
+    "CPF": 0.02,
+    "CARTAO": 0.01,
+    "AWS": 0.005,
+    "SENHA": 0.005,
+    "IPV4": 0.05,
+    "HASH": 0.02,
+    "GLOSSARIO": 0.05,
+}
+
+# Linhas por página nos PDFs sintéticos
+LINHAS_POR_PAGINA = 60
+
+_NIVEIS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+_SERVICOS = ["auth", "billing", "gateway", "worker", "scheduler", "storage"]
+_MENSAGENS = [
+    "request processed status=200 duration={n}ms",
+    "user session refreshed id={n}",
+    "cache miss key=item:{n}",
+    "job finished queue=default attempt={n}",
+    "connection pool size={n} idle=4",
+    "retrying upstream call backoff={n}ms",
+    "GET /api/v1/items/{n} 200",
+    "documento processado com sucesso lote={n}",
+]
+_ALFANUMERICO = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def _termos_do_glossario():
+    termos = list(GATILHOS_ALERTA)
+    for termo_chave, dados in obter_glossario().items():
+        termos.extend(dados.get("padrao_busca", [termo_chave]))
+    return termos
+
+
+def _cpf_valido(aleatorio):
+    digitos = [aleatorio.randint(0, 9) for _ in range(9)]
+    for peso_inicial in (10, 11):
+        soma = sum(d * p for d, p in zip(digitos, range(peso_inicial, 1, -1)))
+        resto = soma % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    cpf = "".join(map(str, digitos))
+    if aleatorio.random() < 0.5:
+        return cpf
+    return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+
+def _cartao_valido(aleatorio):
+    digitos = [aleatorio.randint(0, 9) for _ in range(15)]
+    # Dígito final que fecha o Luhn
+    soma = 0
+    for i, digito in enumerate(reversed(digitos)):
+        if i % 2 == 0:
+            digito *= 2
+            if digito > 9:
+                digito -= 9
+        soma += digito
+    digitos.append((10 - soma % 10) % 10)
+
+    cartao = "".join(map(str, digitos))
+    separador = aleatorio.choice(["", " ", "-"])
+    return separador.join(cartao[i : i + 4] for i in range(0, 16, 4))
+
+
+def gerar_linhas(total_linhas, densidades=None, semente=42):
+    """
+    🧪 Linhas de log sintéticas e reprodutíveis (mesma semente = mesmo corpus):
+    linhas "normais" de aplicação, com dados sensíveis e termos do glossário
+    injetados conforme as densidades (chance por linha de cada tipo).
+    """
+    densidades = dict(DENSIDADES_PADRAO, **(densidades or {}))
+    aleatorio = random.Random(semente)
+    termos = _termos_do_glossario()
+
+    geradores = {
+        "CPF": lambda: f"cpf={_cpf_valido(aleatorio)}",
+        "CARTAO": lambda: f"card={_cartao_valido(aleatorio)}",
+        "AWS": lambda: "key=AKIA" + "".join(aleatorio.choices(_ALFANUMERICO, k=16)),
+        "SENHA": lambda: aleatorio.choice(["senha", "password", "pwd"]) + "=s3cr3t",
+        "IPV4": lambda: "src=" + ".".join(str(aleatorio.randint(1, 254)) for _ in range(4)),
+        "HASH": lambda: "sha=" + "%064x" % aleatorio.getrandbits(256),
+        "GLOSSARIO": lambda: aleatorio.choice(termos),
+    }
+
+    for numero in range(total_linhas):
+        partes = [
+            f"2024-05-{numero % 28 + 1:02d}T{numero % 24:02d}:{numero % 60:02d}:00",
+            aleatorio.choice(_NIVEIS),
+            f"[{aleatorio.choice(_SERVICOS)}]",
+            aleatorio.choice(_MENSAGENS).format(n=aleatorio.randint(1, 99999)),
+        ]
+        for tipo, gerar in geradores.items():
+            if aleatorio.random() < densidades[tipo]:
+                partes.append(gerar())
+        yield " ".join(partes)
+
+
+def gerar_log(caminho, total_linhas, densidades=None, semente=42):
+    with open(caminho, "w", encoding="utf-8") as f:
+        for linha in gerar_linhas(total_linhas, densidades, semente):
+            f.write(linha + "\n")
+    return caminho
+
+
+def gerar_log_jsonl(caminho, total_linhas, densidades=None, semente=42):
+    """
+    Mesmo corpus do gerar_log, um objeto JSON por linha: data, nível e
+    serviço em campos próprios, um trace_id hexadecimal (o tipo de campo que
+    vira hash falso na varredura em texto livre) e o resto em "msg".
+    """
+    aleatorio = random.Random(semente + 1)
+    with open(caminho, "w", encoding="utf-8") as f:
+        for linha in gerar_linhas(total_linhas, densidades, semente):
+            data, nivel, servico, mensagem = linha.split(" ", 3)
+            registro = {
+                "timestamp": data,
+                "level": nivel,
+                "service": servico.strip("[]"),
+                "trace_id": "%032x" % aleatorio.getrandbits(128),
+                "msg": mensagem,
+            }
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return caminho
+
+
+def _escapar_pdf(texto):
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def escrever_pdf(paginas, caminho):
+    """
+    📄 Gravador mínimo de PDF (texto puro, fonte Helvetica), sem dependências:
+    cada item de 'paginas' é a lista de linhas daquela página.
+    """
+    objetos = []
+
+    def adicionar(conteudo):
+        objetos.append(conteudo)
+        return len(objetos)
+
+    fonte = adicionar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    id_paginas = adicionar(None)
+
+    filhos = []
+    for linhas in paginas:
+        # Começa abaixo da margem de corte do LeitorPDF (50pt em cima e embaixo)
+        comandos = ["BT /F1 9 Tf 11 TL 40 760 Td"]
+        comandos += [f"({_escapar_pdf(linha)}) Tj T*" for linha in linhas]
+        comandos.append("ET")
+        fluxo = "\n".join(comandos).encode("latin-1", "replace")
+
+        conteudo = adicionar(
+            b"<< /Length %d >>\nstream\n" % len(fluxo) + fluxo + b"\nendstream"
+        )
+        filhos.append(
+            adicionar(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                % (id_paginas, fonte, conteudo)
+            )
+        )
+
+    objetos[id_paginas - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % filho for filho in filhos),
+        len(filhos),
+    )
+    catalogo = adicionar(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicao in posicoes:
+        saida += b"%010d 00000 n \n" % posicao
+    saida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objetos) + 1,
+        catalogo,
+        inicio_xref,
+    )
+
+    with open(caminho, "wb") as f:
+        f.write(saida)
+    return caminho
+
+
+def gerar_pdf(
+    caminho, total_paginas, linhas_por_pagina=LINHAS_POR_PAGINA, densidades=None, semente=42
+):
+    linhas = gerar_linhas(total_paginas * linhas_por_pagina, densidades, semente)
+    paginas = [
+        [next(linhas) for _ in range(linhas_por_pagina)] for _ in range(total_paginas)
+    ]
+    return escrever_pdf(paginas, caminho)
@@ -0,0 +1,102 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.pipeline import comparar
+
+# Raiz do projeto: cada medição roda num interpretador novo a partir daqui
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências pesadas que só devem carregar quando realmente usadas
+MODULOS_PESADOS = ("numpy", "pdfplumber")
+
+# Partida a frio: cada trecho roda num processo Python novo
+CENARIOS = {
+    "python_vazio": "pass",
+    "import src.config": "import src.config",
+    "import src.core": "import src.core",
+    "import src.log_parser": "import src.log_parser",
+    "import src.readers": "import src.readers",
+    "import src.batch": "import src.batch",
+    "import main": "import main",
+    "varredura_log_curto": (
+        "from src.log_parser import LogParser\n"
+        "LogParser().processar_texto('cpf 529.982.247-25 senha=abc vedado')"
+    ),
+}
+
+_RELATORIO = (
+    "\nimport json, sys\n"
+    "print(json.dumps([m for m in {pesados!r} if m in sys.modules]))"
+)
+
+
+def medir_cenario(codigo, repeticoes):
+    """
+    Menor tempo de parede (o menos afetado por ruído) de N execuções
+    a frio do trecho, e quais módulos pesados ele acabou carregando.
+    """
+    tempos = []
+    carregados = []
+    programa = codigo + _RELATORIO.format(pesados=MODULOS_PESADOS)
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = subprocess.run(
+            [sys.executable, "-c", programa],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        )
+        tempos.append(time.perf_counter() - inicio)
+        carregados = json.loads(saida.stdout.strip().splitlines()[-1])
+    return {"segundos": round(min(tempos), 4), "modulos_pesados": carregados}
+
+
+def executar(repeticoes=7):
+    """
+    ⏱️ Mede o custo de partida (import a frio) de cada ponto de entrada.
+    """
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {"repeticoes": repeticoes},
+        "etapas": {nome: medir_cenario(codigo, repeticoes) for nome, codigo in CENARIOS.items()},
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark de partida a frio (tempo de import de cada ponto de entrada)."
+    )
+    parser.add_argument("--repeticoes", type=int, default=7)
+    parser.add_argument("--saida", default="resultados_importacao.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument(
+        "--tolerancia", type=float, default=0.10,
+        help="quanto um cenário pode ficar mais lento antes de contar como regressão",
+    )
+    args = parser.parse_args(argumentos)
+
+    resultados = executar(args.repeticoes)
+    for nome, etapa in resultados["etapas"].items():
+        pesados = ", ".join(etapa["modulos_pesados"]) or "nenhum"
+        print(f"⏱️ {nome}: {etapa['segundos'] * 1000:.1f} ms | pesados carregados: {pesados}")
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(resultados, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows não tem o módulo resource: o pico de RSS fica de fora
+    resource = None
+
+from benchmarks.corpus import (
+    DENSIDADES_PADRAO,
+    LINHAS_POR_PAGINA,
+    gerar_log,
+    gerar_log_jsonl,
+    gerar_pdf,
+)
+from src.core import analisar_frase_juridica
+from src.detectors import sanitizar_log_str
+from src.log_parser import LogParser
+from src.readers import LeitorPDF
+from src.reports import GeradorHTML
+from src.utils import tratar_quebras_de_linha
+
+
+def _pico_rss_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devolve KB; macOS devolve bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(pico / divisor, 1)
+
+
+def _medir(funcao, linhas, total_bytes):
+    """
+    Roda uma etapa e devolve o tempo, as vazões e o pico de RSS do processo
+    até ali (o pico é acumulado: só sobe, nunca desce entre etapas).
+    """
+    inicio = time.perf_counter()
+    retorno = funcao()
+    segundos = time.perf_counter() - inicio
+
+    megabytes = total_bytes / (1024 * 1024)
+    resultado = {
+        "segundos": round(segundos, 4),
+        "linhas": linhas,
+        "linhas_por_segundo": round(linhas / segundos, 1) if segundos else None,
+        "mb": round(megabytes, 3),
+        "mb_por_segundo": round(megabytes / segundos, 3) if segundos else None,
+        "pico_rss_mb": _pico_rss_mb(),
+    }
+    return resultado, retorno
+
+
+def executar(total_linhas, total_paginas, densidades=None, semente=42, diretorio=None):
+    """
+    ⏱️ Gera o corpus sintético (log + PDF) e mede cada etapa do pipeline
+    separadamente. Devolve o dicionário de resultados (pronto para JSON).
+    """
+    densidades = dict(DENSIDADES_PADRAO, **(densidades or {}))
+    etapas = {}
+
+    with tempfile.TemporaryDirectory() as temporario:
+        diretorio = diretorio or temporario
+        os.makedirs(diretorio, exist_ok=True)
+        caminho_log = gerar_log(
+            os.path.join(diretorio, "corpus.log"), total_linhas, densidades, semente
+        )
+
+        # 1. Leitura de PDF (pdfplumber é opcional aqui: sem ele, a etapa é pulada)
+        if total_paginas:
+            caminho_pdf = gerar_pdf(
+                os.path.join(diretorio, "corpus.pdf"), total_paginas,
+                densidades=densidades, semente=semente,
+            )
+            if importlib.util.find_spec("pdfplumber") is None:
+                etapas["LeitorPDF.extrair_texto"] = {"ignorada": "pdfplumber não instalado"}
+            else:
+                leitor = LeitorPDF(caminho_pdf)
+                etapas["LeitorPDF.extrair_texto"], _ = _medir(
+                    leitor.extrair_texto,
+                    total_paginas * LINHAS_POR_PAGINA,
+                    os.path.getsize(caminho_pdf),
+                )
+                etapas["LeitorPDF.extrair_texto"]["paginas"] = total_paginas
+
+        with open(caminho_log, "r", encoding="utf-8") as f:
+            texto = f.read()
+        total_bytes = len(texto.encode("utf-8"))
+
+        # 2. Correção de hifenização no texto inteiro
+        etapas["tratar_quebras_de_linha"], texto_tratado = _medir(
+            lambda: tratar_quebras_de_linha(texto), total_linhas, total_bytes
+        )
+        linhas = [linha.strip() for linha in texto_tratado.split("\n") if linha.strip()]
+
+        # 3. Análise (DLP + glossário) e 4. Sanitização, linha a linha
+        etapas["analisar_frase_juridica"], _ = _medir(
+            lambda: [analisar_frase_juridica(linha) for linha in linhas],
+            len(linhas), total_bytes,
+        )
+        etapas["sanitizar_log_str"], _ = _medir(
+            lambda: [sanitizar_log_str(linha) for linha in linhas],
+            len(linhas), total_bytes,
+        )
+
+        # Pipeline completo do LogParser (pré-filtro, lote, máscara e eventos)
+        parser = LogParser(compacto=True)
+        etapas["LogParser.processar_texto"], eventos = _medir(
+            lambda: parser.processar_texto(texto), total_linhas, total_bytes
+        )
+        etapas["LogParser.processar_texto"]["linhas_ignoradas"] = parser.linhas_ignoradas
+
+        # Mesmo log lido do disco: em fluxo (texto decodificado) x mapeado (bytes)
+        for metodo in ("processar_arquivo", "processar_mapeado"):
+            parser = LogParser(compacto=True)
+            etapa = "LogParser." + metodo
+            etapas[etapa], _ = _medir(
+                lambda: sum(1 for _ in getattr(parser, metodo)(caminho_log)),
+                total_linhas, total_bytes,
+            )
+
+        # Mesmo corpus em JSON lines: texto livre (mapeado) x leitura por campos (perfil)
+        caminho_jsonl = gerar_log_jsonl(
+            os.path.join(diretorio, "corpus.jsonl"), total_linhas, densidades, semente
+        )
+        bytes_jsonl = os.path.getsize(caminho_jsonl)
+        parser = LogParser(compacto=True)
+        etapas["LogParser.processar_mapeado:jsonl"], _ = _medir(
+            lambda: sum(1 for _ in parser.processar_mapeado(caminho_jsonl)),
+            total_linhas, bytes_jsonl,
+        )
+        parser = LogParser(compacto=True)
+        etapas["LogParser.processar_estruturado:jsonl"], _ = _medir(
+            lambda: sum(1 for _ in parser.processar_estruturado(caminho_jsonl, "jsonl")),
+            total_linhas, bytes_jsonl,
+        )
+
+        # 5. Relatório HTML (vazão medida sobre o arquivo gerado)
+        caminho_html = os.path.join(diretorio, "relatorio.html")
+        gerador = GeradorHTML(eventos)
+        etapas["GeradorHTML.gerar_html"], _ = _medir(
+            lambda: gerador.gerar_html(caminho_html), len(eventos), 0
+        )
+        tamanho_html = os.path.getsize(caminho_html) / (1024 * 1024)
+        segundos_html = etapas["GeradorHTML.gerar_html"]["segundos"]
+        etapas["GeradorHTML.gerar_html"]["mb"] = round(tamanho_html, 3)
+        etapas["GeradorHTML.gerar_html"]["mb_por_segundo"] = (
+            round(tamanho_html / segundos_html, 3) if segundos_html else None
+        )
+
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {
+            "linhas": total_linhas,
+            "paginas": total_paginas,
+            "densidades": densidades,
+            "semente": semente,
+        },
+        "etapas": etapas,
+    }
+
+
+def comparar(atual, anterior, tolerancia):
+    """
+    Compara o tempo de cada etapa com uma execução anterior.
+    Devolve os nomes das etapas que ficaram mais lentas que a tolerância.
+    """
+    if atual["parametros"] != anterior.get("parametros"):
+        print("⚠️ Parâmetros diferentes da execução anterior: a comparação é só indicativa.")
+
+    regressoes = []
+    for nome, etapa in atual["etapas"].items():
+        antes = anterior.get("etapas", {}).get(nome, {}).get("segundos")
+        agora = etapa.get("segundos")
+        if not antes or agora is None:
+            continue
+
+        variacao = (agora - antes) / antes
+        marcador = "⚠️" if variacao > tolerancia else "✅"
+        print(f"{marcador} {nome}: {antes:.3f}s -> {agora:.3f}s ({variacao:+.1%})")
+        if variacao > tolerancia:
+            regressoes.append(nome)
+
+    return regressoes
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark do pipeline de varredura com corpus sintético."
+    )
+    parser.add_argument("--linhas", type=int, default=100_000, help="linhas do log sintético")
+    parser.add_argument("--paginas", type=int, default=20, help="páginas do PDF (0 = sem PDF)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument(
+        "--densidade", action="append", default=[], metavar="TIPO=CHANCE",
+        help="chance por linha de um tipo (ex: CPF=0.1); pode repetir",
+    )
+    parser.add_argument("--diretorio", help="onde guardar o corpus (padrão: pasta temporária)")
+    parser.add_argument("--saida", default="resultados_benchmark.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument(
+        "--tolerancia", type=float, default=0.10,
+        help="quanto uma etapa pode ficar mais lenta antes de contar como regressão",
+    )
+    args = parser.parse_args(argumentos)
+
+    densidades = {}
+    for item in args.densidade:
+        tipo, _, chance = item.partition("=")
+        if tipo not in DENSIDADES_PADRAO:
+            parser.error(f"tipo desconhecido: {tipo} (use {', '.join(DENSIDADES_PADRAO)})")
+        densidades[tipo] = float(chance)
+
+    resultados = executar(args.linhas, args.paginas, densidades, args.semente, args.diretorio)
+
+    for nome, etapa in resultados["etapas"].items():
+        if "ignorada" in etapa:
+            print(f"⏭️ {nome}: {etapa['ignorada']}")
+            continue
+        print(
+            f"⏱️ {nome}: {etapa['segundos']:.3f}s | {etapa['linhas_por_segundo']} linhas/s"
+            f" | {etapa['mb_por_segundo']} MB/s | pico RSS {etapa['pico_rss_mb']} MB"
+        )
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(resultados, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,54 +1,91 @@
 # Importações dos Nossos Módulos
+import argparse
 import os
-from src.readers import LeitorPDF
-from src.log_parser import LogParser
-from src.reports import GeradorRelatorio, GeradorHTML
+from src.batch import varrer_diretorio
+from src.config import BANCO_ACHADOS, WORKERS_PADRAO
 from src.utils import validar_caminho_seguro
-
-
-def main():
+from src import metrics
+
+# Nome da pasta segura onde os PDFs e logs devem estar
+PASTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inputs")
+PASTA_RELATORIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "relatorios")
+
+
+def _argumentos(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="🛡️ Auditoria em lote (DLP/SOC) de todos os PDFs e logs da pasta 'inputs'."
+    )
+    parser.add_argument("--entrada", default=PASTA_BASE, help="pasta base com os arquivos")
+    parser.add_argument("--saida", default=PASTA_RELATORIOS, help="pasta dos relatórios")
+    parser.add_argument(
+        "--arquivo", action="append",
+        help="audita só este arquivo (relativo à pasta base); pode repetir",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=WORKERS_PADRAO,
+        help="arquivos auditados ao mesmo tempo (processos)",
+    )
+    parser.add_argument("--pagina-inicial", type=int, help="1ª página lida de cada PDF")
+    parser.add_argument("--pagina-final", type=int, help="última página lida de cada PDF")
+    parser.add_argument(
+        "--do-zero", action="store_true",
+        help="ignora o checkpoint e varre todos os arquivos de novo",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="reaproveita o índice de cada documento (só o que mudou é reanalisado)",
+    )
+    parser.add_argument(
+        "--paginado", action="store_true",
+        help="relatório em várias páginas com índice (para arquivos com muitos achados)",
+    )
+    parser.add_argument(
+        "--banco", nargs="?", const=BANCO_ACHADOS,
+        help="também grava os achados no banco SQLite (consulta: python -m src.findings_store)",
+    )
+    args = parser.parse_args(argumentos)
+    if args.banco and args.incremental:
+        parser.error("--banco não combina com --incremental")
+    return args
+
+
+def main(argumentos=None):
     print("🚀 Iniciando Sistema de Análise Legislativa...")
-
-    # CONFIGURAÇÃO
-    # Nome da pasta segura onde os PDFs devem estar
-    PASTA_BASE = os.path.join(os.path.dirname(__file__), "inputs")
-
-    nome_arquivo = ""  # Certifique-se que o arquivo existe
-    pag_inicial = 1
-    pag_final = 1
+    args = _argumentos(argumentos)
 
     try:
-        print("🛡️ Validando segurança do caminho do arquivo...")
-
-        # Retornar o caminho completo se for seguro, ou dar erro se for ataque
-        caminho_seguro = validar_caminho_seguro(nome_arquivo, PASTA_BASE)
-
-        # 1. Leitura
-        leitor = LeitorPDF(caminho_seguro)
-        texto = leitor.extrair_texto(pag_inicial, pag_final)
-
-        if not texto.strip():
-            print("⚠️ Nenhum texto extraído.")
-            return
-
-        print("✅ Texto extraído.")
-
-        # 2. Processamento
-        parser = LogParser()
-        dados_estruturados = parser.processar_texto(texto)
-        print(f"📊 {len(dados_estruturados)} eventos/linhas processados.")
-
-        # 3. Geração de Relatório (HTML)
-        print("🎨 Gerando relatório HTML estilizado...")
-        gerador = GeradorHTML(dados_estruturados)  # <--- Usando a nova classe
-        gerador.gerar_html("relatorio_final.html")
+        arquivos = None
+        if args.arquivo:
+            print("🛡️ Validando segurança do caminho dos arquivos...")
+            # Retornar o caminho completo se for seguro, ou dar erro se for ataque
+            for nome_arquivo in args.arquivo:
+                validar_caminho_seguro(nome_arquivo, args.entrada)
+            arquivos = [os.path.normpath(nome) for nome in args.arquivo]
+
+        consolidado = varrer_diretorio(
+            args.entrada,
+            args.saida,
+            workers=args.workers,
+            arquivos=arquivos,
+            retomar=not args.do_zero,
+            pagina_inicio=args.pagina_inicial,
+            pagina_fim=args.pagina_final,
+            incremental=args.incremental,
+            paginado=args.paginado,
+            banco=args.banco,
+        )
 
-        print("🎉 SUCESSO! Abra o arquivo 'relatorio_final.html' no seu navegador.")
+        totais = consolidado["totais"]
+        print(
+            f"📊 {totais['arquivos']} arquivo(s), {totais['alertas']} alerta(s) "
+            f"em {totais['linhas_com_alerta']} linha(s)."
+        )
+        print(f"🎉 SUCESSO! Abra '{os.path.join(args.saida, 'resumo.html')}' no seu navegador.")
 
-        # 3. Geração de Relatório (MD)
-        # gerador = GeradorRelatorio(dados_estruturados)
-        # gerador.gerar_markdown("relatorio_final.md")
-        # print("🎉 Relatório 'relatorio_final.md' gerado com sucesso!")
+        # Métricas por etapa (só com AUDITORIA_METRICAS=1)
+        if metrics.ATIVO:
+            metrics.exportar_json(os.path.join(args.saida, "metricas.json"))
+            print("⏱️ Métricas por etapa salvas em 'metricas.json'.")
 
         # Capture o erro específico de PERMISSÃO
         # Isso acontece se alguém tentar sair da pasta (Path Traversal)
@@ -60,11 +97,14 @@ def main():
 
         # [DESAFIO 5]: Capture o erro de ARQUIVO NÃO ENCONTRADO (separado do erro de ataque)
     except FileNotFoundError as e:
-        print(f"\n❌ Erro: O arquivo '{nome_arquivo}' não existe na pasta 'inputs'.")
+        print(f"\n❌ Erro: {e}")
         print(
             "Dica: Verifique se o nome está correto e se o arquivo está na pasta certa."
         )
 
+    except KeyboardInterrupt:
+        print("\n⏸️ Varredura interrompida. Rode de novo para retomar do checkpoint.")
+
     except Exception as e:
         print(f"❌ ERRO CRÍTICO NÃO ESPERADO: {e}")
 
@@ -0,0 +1,225 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import zipfile
+from contextlib import contextmanager
+
+# 📦 Logs compactados (.gz/.bz2/.xz) e pacotes (.tar, .tar.gz..., .zip), abertos
+# em fluxo: os bytes descompactados vão direto para o LogParser, sem passar
+# pelo disco e sem o conteúdo inteiro na memória.
+
+EXTENSOES_PACOTE = (".gz", ".bz2", ".xz", ".tgz", ".tbz2", ".txz", ".tar", ".zip")
+
+# Formatos de pacote com membros acessíveis em qualquer ordem (um processo por membro)
+ACESSO_DIRETO = ("zip", "tar")
+
+# Assinaturas (magic numbers): o formato vem do conteúdo, não da extensão
+_COMPRESSORES = {
+    "gz": (b"\x1f\x8b", gzip.GzipFile),
+    "bz2": (b"BZh", bz2.BZ2File),
+    "xz": (b"\xfd7zXZ\x00", lzma.LZMAFile),
+}
+_ASSINATURAS_ZIP = (b"PK\x03\x04", b"PK\x05\x06")
+_CABECALHO_TAR = 512
+
+# Membros que não são log em texto: ficam de fora (e são listados)
+_EXTENSOES_IGNORADAS = (".pdf",)
+
+
+def _compressor(cabecalho):
+    for formato, (assinatura, _) in _COMPRESSORES.items():
+        if cabecalho.startswith(assinatura):
+            # bz2: "BZh" + nível (1-9) + assinatura do 1º bloco (ou fim de fluxo)
+            if formato == "bz2" and not (
+                cabecalho[3:4].isdigit() and cabecalho[4:10] in (b"1AY&SY", b"\x17rE8P\x90")
+            ):
+                continue
+            return formato
+    return None
+
+
+def _eh_tar(cabecalho):
+    # POSIX ("ustar\0") ou GNU ("ustar  ") na posição 257 do 1º cabeçalho
+    return cabecalho[257:263] in (b"ustar\x00", b"ustar ")
+
+
+def _descompactar(fluxo, formato):
+    classe = _COMPRESSORES[formato][1]
+    # O 1º argumento do GzipFile é um nome de arquivo: o stream vai como fileobj
+    return classe(fileobj=fluxo) if formato == "gz" else classe(fluxo)
+
+
+@contextmanager
+def _abrir_binario(origem):
+    # Caminho vira arquivo aberto; stream binário é usado como veio (sem fechar)
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, "rb") as f:
+            yield f
+    else:
+        yield origem
+
+
+class _SoLeitura(io.RawIOBase):
+    """
+    Membro de um tar lido em sequência ("r|*"): o arquivo do tarfile quebra ao
+    perguntar seekable() (o TextIOWrapper pergunta), então só a leitura passa.
+    """
+
+    def __init__(self, fluxo):
+        self._fluxo = fluxo
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        dados = self._fluxo.read(len(destino))
+        destino[: len(dados)] = dados
+        return len(dados)
+
+
+def detectar_formato(origem):
+    """
+    Formato de um caminho ou stream binário posicionável, pelo conteúdo:
+    "gz", "bz2", "xz" (um log compactado), "zip", "tar" ou "tar.gz",
+    "tar.bz2", "tar.xz" (pacote compactado). None = não é pacote (log/PDF).
+    """
+    if not isinstance(origem, (str, os.PathLike)) and (
+        isinstance(origem, io.TextIOBase) or not origem.seekable()
+    ):
+        return None
+
+    with _abrir_binario(origem) as f:
+        posicao = f.tell()
+        try:
+            cabecalho = f.read(_CABECALHO_TAR)
+            if cabecalho.startswith(_ASSINATURAS_ZIP):
+                return "zip"
+            if _eh_tar(cabecalho):
+                return "tar"
+
+            formato = _compressor(cabecalho)
+            if formato is None:
+                return None
+
+            # Compactado: é um tar por dentro? Basta o 1º cabeçalho descompactado
+            f.seek(posicao)
+            try:
+                interno = _descompactar(f, formato).read(_CABECALHO_TAR)
+            except (OSError, EOFError, lzma.LZMAError):
+                interno = b""
+            return "tar." + formato if _eh_tar(interno) else formato
+        finally:
+            f.seek(posicao)
+
+
+def _membro_legivel(nome, fluxo):
+    """
+    Fluxo binário de um membro pronto para o parser (um .gz/.bz2/.xz dentro
+    do pacote, comum em logs rotacionados, é descompactado também) ou None se
+    o membro não é log em texto (PDF, pacote dentro de pacote).
+    """
+    if nome.lower().endswith(_EXTENSOES_IGNORADAS):
+        return None
+    cabecalho = fluxo.peek(_CABECALHO_TAR)[:_CABECALHO_TAR]
+    if cabecalho.startswith(_ASSINATURAS_ZIP) or _eh_tar(cabecalho):
+        return None
+    formato = _compressor(cabecalho)
+    return _descompactar(fluxo, formato) if formato else fluxo
+
+
+def iterar_membros(origem, formato, ignorados=None):
+    """
+    🌊 Percorre o pacote em fluxo e devolve (nome_membro, fluxo_binario), um
+    membro por vez (o fluxo só vale até o próximo). Num log compactado avulso
+    (gz/bz2/xz) o único membro vem com nome None. Membros pulados (não são
+    log em texto, ou não abrem) vão para a lista 'ignorados'.
+    """
+    ignorados = ignorados if ignorados is not None else []
+    with _abrir_binario(origem) as f:
+        if formato in _COMPRESSORES:
+            with _descompactar(f, formato) as fluxo:
+                yield None, fluxo
+
+        elif formato == "zip":
+            with zipfile.ZipFile(f) as pacote:
+                for info in pacote.infolist():
+                    if info.is_dir():
+                        continue
+                    try:
+                        bruto = pacote.open(info)
+                    except (RuntimeError, NotImplementedError, zipfile.BadZipFile):
+                        # Membro cifrado ou com compressão sem suporte
+                        ignorados.append(info.filename)
+                        continue
+                    with bruto:
+                        fluxo = _membro_legivel(info.filename, bruto)
+                        if fluxo is None:
+                            ignorados.append(info.filename)
+                            continue
+                        yield info.filename, fluxo
+
+        else:
+            # "r|*": tar lido em sequência (compactado ou não), sem voltar atrás
+            with tarfile.open(fileobj=f, mode="r|*") as pacote:
+                for info in pacote:
+                    if not info.isfile():
+                        continue
+                    bruto = io.BufferedReader(_SoLeitura(pacote.extractfile(info)))
+                    fluxo = _membro_legivel(info.name, bruto)
+                    if fluxo is None:
+                        ignorados.append(info.name)
+                        continue
+                    yield info.name, fluxo
+
+
+def _entradas(pacote, formato):
+    # Entradas na ordem do pacote (a posição identifica o membro: nomes podem repetir)
+    return pacote.infolist() if formato == "zip" else pacote.getmembers()
+
+
+def listar_membros(caminho, formato):
+    """
+    (posicao, nome) dos membros de um pacote em disco com acesso direto
+    (ACESSO_DIRETO), na ordem do pacote, para varrer cada um num processo.
+    """
+    with _abrir_pacote(caminho, formato) as pacote:
+        return [
+            (posicao, info.filename if formato == "zip" else info.name)
+            for posicao, info in enumerate(_entradas(pacote, formato))
+            if (not info.is_dir() if formato == "zip" else info.isfile())
+        ]
+
+
+def _abrir_pacote(caminho, formato):
+    return zipfile.ZipFile(caminho) if formato == "zip" else tarfile.open(caminho, "r:")
+
+
+# Pacote aberto por processo do pool (cada worker lê o índice do pacote uma vez só)
+_PACOTES_ABERTOS = {}
+
+
+def _pacote_aberto(caminho, formato):
+    pacote = _PACOTES_ABERTOS.get(caminho)
+    if pacote is None:
+        pacote = _PACOTES_ABERTOS[caminho] = _abrir_pacote(caminho, formato)
+    return pacote
+
+
+@contextmanager
+def abrir_membro(caminho, formato, posicao):
+    """
+    Fluxo binário de um único membro (pela posição do listar_membros), ou
+    None se ele não é log em texto ou não abre.
+    """
+    pacote = _pacote_aberto(caminho, formato)
+    info = _entradas(pacote, formato)[posicao]
+    try:
+        bruto = pacote.open(info) if formato == "zip" else pacote.extractfile(info)
+    except (RuntimeError, NotImplementedError, zipfile.BadZipFile):
+        yield None
+        return
+    with bruto:
+        yield _membro_legivel(info.filename if formato == "zip" else info.name, bruto)
@@ -0,0 +1,373 @@
+import datetime
+import hashlib
+import json
+import os
+import time
+
+from src import metrics
+from src.archives import EXTENSOES_PACOTE, detectar_formato
+from src.cache import CacheDisco
+from src.config import CACHE_DIR, CACHE_LIMITE_BYTES, WORKERS_PADRAO
+from src.core import impressao_regras
+from src.event_store import expandir_registro
+from src.findings_store import BancoAchados
+from src.incremental import IndiceIncremental
+from src.log_parser import LogParser
+from src.readers import LeitorPDF
+from src.reports import GeradorHTML, GeradorResumoHTML
+from src.structured import EXTENSOES_ESTRUTURADAS, detectar_estruturado
+from src.utils import validar_caminho_seguro
+
+EXTENSOES_SUPORTADAS = (
+    (".pdf", ".txt", ".log") + tuple(EXTENSOES_ESTRUTURADAS) + EXTENSOES_PACOTE
+)
+
+# Checkpoint (uma linha JSON por arquivo concluído) e resumo, dentro da pasta de saída
+ARQUIVO_PROGRESSO = "progresso.jsonl"
+ARQUIVO_RESUMO = "resumo"
+
+# Opções que mudam o resultado (ou o destino) de um arquivo: entram na impressão da execução
+OPCOES_IMPRESSAO = ("pagina_inicio", "pagina_fim", "incremental", "paginado", "banco")
+
+
+def listar_arquivos(diretorio_base):
+    """
+    Caminhos (relativos à base) de todos os PDFs, logs e pacotes de logs
+    da pasta, em ordem estável.
+    """
+    for raiz, pastas, arquivos in os.walk(diretorio_base):
+        pastas.sort()
+        for nome in sorted(arquivos):
+            if nome.lower().endswith(EXTENSOES_SUPORTADAS):
+                yield os.path.relpath(os.path.join(raiz, nome), diretorio_base)
+
+
+def _assinatura(caminho):
+    # Mudou o tamanho ou a data? Então o arquivo precisa ser varrido de novo
+    info = os.stat(caminho)
+    return [info.st_size, info.st_mtime_ns]
+
+
+def _impressao_execucao(opcoes):
+    """
+    🔑 Regras carregadas + opções da execução: um checkpoint só vale para
+    uma execução com a mesma impressão (glossário ou opções mudaram? varre de novo).
+    """
+    partes = [impressao_regras()] + [opcoes.get(nome) for nome in OPCOES_IMPRESSAO]
+    conteudo = json.dumps(partes, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+def _contabilizar(eventos, resumo):
+    # Repassa os eventos para o relatório somando os totais do arquivo no caminho
+    for evento in eventos:
+        alertas = evento.get("alertas")
+        if alertas:
+            resumo["linhas_com_alerta"] += 1
+            resumo["alertas"] += len(alertas)
+            for alerta in alertas:
+                nivel = alerta.get("nivel_risco") or alerta.get("prioridade", "N/A")
+                resumo["por_nivel"][nivel] = resumo["por_nivel"].get(nivel, 0) + 1
+        yield evento
+
+
+def _eventos_do_arquivo(caminho, caminho_relativo, opcoes, banco=None):
+    """
+    Devolve (indice, parser, eventos) do arquivo: só um dos dois primeiros
+    vem preenchido, conforme quem varreu (índice incremental ou LogParser).
+    """
+    indice = IndiceIncremental() if opcoes.get("incremental") else None
+    pdf = caminho.lower().endswith(".pdf")
+    formato = None if pdf else detectar_formato(caminho) or detectar_estruturado(caminho)
+
+    if pdf:
+        leitor = LeitorPDF(caminho, cache=CacheDisco(CACHE_DIR, CACHE_LIMITE_BYTES))
+        paginas = leitor.iterar_paginas(opcoes.get("pagina_inicio"), opcoes.get("pagina_fim"))
+        if indice:
+            return indice, None, indice.processar_paginas(caminho_relativo, paginas)
+    elif indice and not formato:
+        # Pacotes/compactados e logs estruturados não têm índice incremental: são varridos por inteiro
+        return indice, None, indice.processar_arquivo(caminho_relativo, caminho)
+
+    if banco is None and pdf:
+        parser = LogParser()
+        return None, parser, parser.processar_paginas(paginas)
+
+    # Registros compactos: o log é varrido direto nos bytes (arquivo mapeado em memória),
+    # os pacotes descompactados em fluxo (membros em paralelo, se houver workers)
+    # e os logs estruturados lidos campo a campo
+    parser = LogParser(compacto=True, workers=opcoes.get("workers_membros", 1))
+    if pdf:
+        registros = parser.processar_paginas(paginas)
+    else:
+        registros = parser.processar_log(caminho)
+    if banco is not None:
+        # Com banco: registros (regra e valor exatos) gravados no caminho do relatório
+        registros = banco.gravar_em_fluxo(opcoes["varredura"], caminho_relativo, registros)
+    return None, parser, (expandir_registro(registro) for registro in registros)
+
+
+def auditar_arquivo(caminho_relativo, diretorio_base, diretorio_saida, opcoes):
+    """
+    Executado num processo do pool: audita um único arquivo, grava o relatório
+    dele (em fluxo, página a página / bloco a bloco) e devolve o resumo.
+    """
+    if opcoes.get("medir"):
+        metrics.ativar()
+        metrics.zerar()
+
+    inicio = time.perf_counter()
+    resumo = {
+        "arquivo": caminho_relativo,
+        "status": "ok",
+        "linhas_com_alerta": 0,
+        "alertas": 0,
+        "por_nivel": {},
+    }
+
+    banco = None
+    try:
+        # 🛡️ Cada arquivo passa pelo guardião de Path Traversal antes de ser aberto
+        caminho = validar_caminho_seguro(caminho_relativo, diretorio_base)
+        resumo["assinatura"] = _assinatura(caminho)
+
+        if opcoes.get("banco"):
+            banco = BancoAchados(opcoes["banco"])
+            resumo["varredura"] = opcoes["varredura"]
+
+        indice, parser, eventos = _eventos_do_arquivo(caminho, caminho_relativo, opcoes, banco)
+        gerador = GeradorHTML(_contabilizar(eventos, resumo))
+
+        if opcoes.get("paginado"):
+            destino = os.path.join(diretorio_saida, caminho_relativo + "_relatorio")
+            gerador.gerar_html_paginado(destino)
+            destino = os.path.join(destino, "index.html")
+        else:
+            destino = os.path.join(diretorio_saida, caminho_relativo + ".html")
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            gerador.gerar_html(destino)
+
+        resumo["relatorio"] = os.path.relpath(destino, diretorio_saida)
+        if indice:
+            resumo["incremental"] = indice.estatisticas
+        if parser is not None and parser.membros_ignorados:
+            resumo["membros_ignorados"] = parser.membros_ignorados
+
+    except PermissionError as e:
+        resumo["status"] = "bloqueado"
+        resumo["erro"] = str(e)
+    except Exception as e:
+        resumo["status"] = "erro"
+        resumo["erro"] = f"{type(e).__name__}: {e}"
+    finally:
+        if banco is not None:
+            banco.fechar()
+
+    resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+    if opcoes.get("medir"):
+        resumo["metricas"] = metrics.exportar()
+    return resumo
+
+
+class Progresso:
+    """
+    📌 Checkpoint da varredura em lote: cada arquivo concluído vira uma linha
+    JSON, gravada e sincronizada no disco assim que ele termina. Se a execução
+    cair no meio, a próxima pula o que já foi feito (e não mudou desde então).
+    Uma passada que chega ao fim é encerrada: a próxima execução começa outra.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def carregar(self, impressao=None):
+        # Só valem as entradas de uma execução com a mesma impressão (regras + opções)
+        concluidos = {}
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        resumo = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha cortada por uma interrupção: é só ignorar
+                        continue
+                    if impressao is None or resumo.get("impressao") == impressao:
+                        concluidos[resumo["arquivo"]] = resumo
+        except FileNotFoundError:
+            pass
+        return concluidos
+
+    def registrar(self, resumo):
+        with open(self.caminho, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumo, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def limpar(self):
+        try:
+            os.remove(self.caminho)
+        except FileNotFoundError:
+            pass
+
+    def encerrar(self):
+        # Passada completa: o checkpoint vira histórico (".anterior") e sai do caminho
+        try:
+            os.replace(self.caminho, self.caminho + ".anterior")
+        except FileNotFoundError:
+            pass
+
+
+def _ja_concluido(anterior, caminho_relativo, diretorio_base):
+    if not anterior or anterior.get("status") != "ok":
+        return False
+    try:
+        caminho = validar_caminho_seguro(caminho_relativo, diretorio_base)
+        return anterior.get("assinatura") == _assinatura(caminho)
+    except (PermissionError, OSError):
+        return False
+
+
+def _varredura_no_banco(caminho_banco, diretorio_base, concluidos):
+    # Retomando uma passada interrompida (o checkpoint só guarda a passada em aberto)?
+    # Continua a mesma varredura do banco (o arquivo cortado no meio é regravado);
+    # senão, cada passada abre a sua, com a data de hoje
+    anteriores = [resumo["varredura"] for resumo in concluidos.values() if resumo.get("varredura")]
+    with BancoAchados(caminho_banco) as banco:
+        if anteriores and banco.varredura_existe(max(anteriores)):
+            return max(anteriores)
+        return banco.iniciar_varredura(diretorio_base)
+
+
+def varrer_diretorio(
+    diretorio_base,
+    diretorio_saida,
+    workers=WORKERS_PADRAO,
+    arquivos=None,
+    retomar=True,
+    **opcoes,
+):
+    """
+    🗂️ Auditoria em lote: varre todos os PDFs/logs (e pacotes de logs) da
+    pasta base (ou só os 'arquivos' pedidos) num pool de processos limitado, um relatório por
+    arquivo, com checkpoint para retomar e um resumo consolidado no final.
+    Opções: pagina_inicio, pagina_fim, incremental, paginado e banco
+    (caminho do SQLite onde os achados também são gravados).
+    """
+    if opcoes.get("banco") and opcoes.get("incremental"):
+        raise ValueError("O banco de achados ainda não combina com a varredura incremental.")
+
+    diretorio_base = os.path.abspath(diretorio_base)
+    diretorio_saida = os.path.abspath(diretorio_saida)
+    os.makedirs(diretorio_saida, exist_ok=True)
+    opcoes["medir"] = metrics.ATIVO
+
+    progresso = Progresso(os.path.join(diretorio_saida, ARQUIVO_PROGRESSO))
+    if not retomar:
+        progresso.limpar()
+    impressao = _impressao_execucao(opcoes)
+    concluidos = progresso.carregar(impressao)
+    if opcoes.get("banco"):
+        opcoes["varredura"] = _varredura_no_banco(opcoes["banco"], diretorio_base, concluidos)
+        # Arquivos gravados em outra varredura (ex: banco recriado) são varridos de novo
+        concluidos = {
+            caminho: resumo for caminho, resumo in concluidos.items()
+            if resumo.get("varredura") == opcoes["varredura"]
+        }
+
+    if arquivos is None:
+        arquivos = list(listar_arquivos(diretorio_base))
+
+    resultados = {}
+    pendentes = []
+    for caminho_relativo in arquivos:
+        anterior = concluidos.get(caminho_relativo)
+        if _ja_concluido(anterior, caminho_relativo, diretorio_base):
+            anterior.pop("impressao", None)
+            resultados[caminho_relativo] = anterior
+        else:
+            pendentes.append(caminho_relativo)
+
+    print(
+        f"📁 {len(arquivos)} arquivo(s): {len(pendentes)} a varrer, "
+        f"{len(arquivos) - len(pendentes)} já concluído(s) no checkpoint."
+    )
+
+    def concluir(resumo):
+        retrato = resumo.pop("metricas", None)
+        if retrato:
+            metrics.somar(retrato)
+        if resumo["status"] == "ok":
+            progresso.registrar(dict(resumo, impressao=impressao))
+
+        resultados[resumo["arquivo"]] = resumo
+        icone = {"ok": "✅", "bloqueado": "🚨"}.get(resumo["status"], "❌")
+        detalhe = resumo.get("erro") or f"{resumo['alertas']} alerta(s)"
+        print(f"{icone} [{len(resultados)}/{len(arquivos)}] {resumo['arquivo']}: {detalhe}")
+
+    # Um arquivo só (ex: um pacote grande): varrido aqui, com os workers nos membros
+    opcoes["workers_membros"] = workers if len(pendentes) == 1 else 1
+
+    if workers <= 1 or len(pendentes) == 1:
+        for caminho_relativo in pendentes:
+            concluir(auditar_arquivo(caminho_relativo, diretorio_base, diretorio_saida, opcoes))
+    else:
+        # Só o modo com vários workers paga o import do pool de processos
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            fila = iter(pendentes)
+            em_voo = set()
+            while True:
+                # No máximo 2 arquivos por worker em voo: a fila não cresce com a pasta
+                for caminho_relativo in fila:
+                    em_voo.add(
+                        pool.submit(
+                            auditar_arquivo,
+                            caminho_relativo,
+                            diretorio_base,
+                            diretorio_saida,
+                            opcoes,
+                        )
+                    )
+                    if len(em_voo) >= workers * 2:
+                        break
+                if not em_voo:
+                    break
+
+                prontos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                for tarefa in prontos:
+                    concluir(tarefa.result())
+        finally:
+            # Interrompido (Ctrl+C)? Cancela o que nem começou; o checkpoint já está salvo
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    # Chegou até aqui sem interrupção: a próxima execução é uma passada nova
+    progresso.encerrar()
+    ordenados = [resultados[caminho] for caminho in arquivos if caminho in resultados]
+    return _gravar_resumo(diretorio_base, diretorio_saida, ordenados)
+
+
+def _gravar_resumo(diretorio_base, diretorio_saida, resultados):
+    totais = {"arquivos": len(resultados), "alertas": 0, "linhas_com_alerta": 0, "por_nivel": {}}
+    for resumo in resultados:
+        totais["alertas"] += resumo.get("alertas", 0)
+        totais["linhas_com_alerta"] += resumo.get("linhas_com_alerta", 0)
+        for nivel, quantidade in resumo.get("por_nivel", {}).items():
+            totais["por_nivel"][nivel] = totais["por_nivel"].get(nivel, 0) + quantidade
+
+    consolidado = {
+        "gerado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "diretorio": diretorio_base,
+        "totais": totais,
+        "arquivos": resultados,
+    }
+
+    caminho_json = os.path.join(diretorio_saida, ARQUIVO_RESUMO + ".json")
+    with open(caminho_json, "w", encoding="utf-8") as f:
+        json.dump(consolidado, f, ensure_ascii=False, indent=2)
+    GeradorResumoHTML(consolidado).gerar_html(
+        os.path.join(diretorio_saida, ARQUIVO_RESUMO + ".html")
+    )
+
+    return consolidado
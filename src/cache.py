@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from src import metrics
+
+# Temporários da escrita atômica: outros processos (workers do lote) veem a mesma pasta
+# e não podem contá-los nem despejá-los antes do os.replace de quem está escrevendo
+SUFIXO_TEMPORARIO = ".tmp"
+# Temporário mais velho que isso é de um processo que morreu no meio da escrita
+IDADE_TEMPORARIO_ORFAO = 3600
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """
+    🔑 Impressão digital (SHA-256) do conteúdo do arquivo, lida em blocos.
+    Mesmo conteúdo = mesma chave, não importa o nome ou a pasta.
+    """
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class CacheDisco:
+    """
+    💾 Cache em disco endereçado por conteúdo, com limite de tamanho.
+    Cada chave vira um arquivo; a data de modificação marca o último uso
+    e, ao passar do limite, os menos usados recentemente (LRU) saem primeiro.
+    """
+
+    def __init__(self, diretorio, limite_bytes):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        # Calculado só na primeira escrita (varre a pasta uma vez)
+        self._tamanho_total = None
+
+    def _caminho(self, chave):
+        nome = hashlib.sha256(chave.encode("utf-8")).hexdigest()
+        # Subpastas pelos 2 primeiros caracteres para não lotar um diretório só
+        return os.path.join(self.diretorio, nome[:2], nome)
+
+    def contem(self, chave):
+        return os.path.exists(self._caminho(chave))
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as f:
+                conteudo = f.read()
+            # Marca o acesso para a política LRU
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        return conteudo
+
+    def guardar(self, chave, conteudo):
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        # Escrita atômica: outro processo nunca lê um arquivo pela metade
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=SUFIXO_TEMPORARIO)
+        with os.fdopen(fd, "wb") as f:
+            f.write(conteudo)
+        try:
+            # Sobrescrevendo a mesma chave: o tamanho antigo sai da conta
+            tamanho_anterior = os.stat(caminho).st_size
+        except FileNotFoundError:
+            tamanho_anterior = 0
+        os.replace(temporario, caminho)
+
+        if self._tamanho_total is None:
+            self._tamanho_total = sum(t for _, t, _ in self._listar())
+        else:
+            self._tamanho_total += len(conteudo) - tamanho_anterior
+
+        if self._tamanho_total > self.limite_bytes:
+            self._despejar()
+
+    def _listar(self):
+        if not os.path.isdir(self.diretorio):
+            return
+        for pasta in os.scandir(self.diretorio):
+            if not pasta.is_dir():
+                continue
+            for arquivo in os.scandir(pasta.path):
+                try:
+                    info = arquivo.stat()
+                except FileNotFoundError:
+                    # Despejado por outro processo enquanto a pasta era lida
+                    continue
+                if arquivo.name.endswith(SUFIXO_TEMPORARIO):
+                    if info.st_mtime < time.time() - IDADE_TEMPORARIO_ORFAO:
+                        self._remover(arquivo.path)
+                    continue
+                yield info.st_mtime, info.st_size, arquivo.path
+
+    def _remover(self, caminho):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+    def _despejar(self):
+        """
+        Remove os itens menos usados até sobrar 90% do limite
+        (a folga evita despejar de novo a cada escrita).
+        """
+        itens = sorted(self._listar())
+        total = sum(tamanho for _, tamanho, _ in itens)
+        alvo = self.limite_bytes * 0.9
+
+        for _, tamanho, caminho in itens:
+            if total <= alvo:
+                break
+            self._remover(caminho)
+            total -= tamanho
+
+        self._tamanho_total = total
+
+
+class CacheResultados:
+    """
+    ⚡ Resultados prontos de varreduras (relatório + totais), endereçados pelo
+    conteúdo do upload e pela versão das regras. Primeiro a memória do processo
+    (LRU limitada em bytes), depois o CacheDisco; acerto no disco volta para a memória.
+    """
+
+    def __init__(self, disco, limite_memoria_bytes):
+        self.disco = disco
+        self.limite_memoria_bytes = limite_memoria_bytes
+        self._memoria = OrderedDict()
+        self._bytes_memoria = 0
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def chave(conteudo, versao_regras, *opcoes):
+        # Mesmo arquivo + mesmas regras (+ mesmas opções) = mesmo resultado
+        sha = hashlib.sha256(conteudo).hexdigest()
+        return ":".join(["resultado", versao_regras, sha] + [str(opcao) for opcao in opcoes])
+
+    def obter(self, chave):
+        with self._trava:
+            dados = self._memoria.get(chave)
+            if dados is not None:
+                self._memoria.move_to_end(chave)
+
+        if dados is None:
+            dados = self.disco.obter(chave)
+            if dados is not None:
+                self._lembrar(chave, dados)
+
+        metrics.contar("resultado_cache:" + ("falta" if dados is None else "acerto"))
+        if dados is None:
+            return None
+        return json.loads(zlib.decompress(dados))
+
+    def guardar(self, chave, resultado):
+        # Comprimido: relatórios HTML repetem muito texto (cabem ~10x mais itens)
+        dados = zlib.compress(json.dumps(resultado, ensure_ascii=False).encode("utf-8"))
+        self._lembrar(chave, dados)
+        self.disco.guardar(chave, dados)
+
+    def _lembrar(self, chave, dados):
+        if len(dados) > self.limite_memoria_bytes:
+            return
+        with self._trava:
+            anterior = self._memoria.pop(chave, None)
+            if anterior is not None:
+                self._bytes_memoria -= len(anterior)
+            self._memoria[chave] = dados
+            self._bytes_memoria += len(dados)
+
+            # Estourou o limite? Saem os menos usados recentemente
+            while self._bytes_memoria > self.limite_memoria_bytes:
+                _, removido = self._memoria.popitem(last=False)
+                self._bytes_memoria -= len(removido)
@@ -5,6 +5,56 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
+# Cache em disco do texto extraído dos PDFs (ao lado da pasta 'data')
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+CACHE_LIMITE_BYTES = 512 * 1024 * 1024
+
+# Cache de resultados prontos (relatório + totais) das varreduras do app
+CACHE_RESULTADOS_DIR = os.path.join(BASE_DIR, "cache_resultados")
+CACHE_RESULTADOS_LIMITE_BYTES = 256 * 1024 * 1024
+CACHE_RESULTADOS_MEMORIA_BYTES = 64 * 1024 * 1024
+
+# Banco SQLite de achados (consultas entre varreduras) e a chave do hash dos valores,
+# guardada fora do banco: sem ela, o banco sozinho não revela nenhum CPF/chave
+BANCO_ACHADOS = os.path.join(BASE_DIR, "achados.db")
+CHAVE_ACHADOS = os.path.join(BASE_DIR, ".chave_achados")
+# Achados por transação na gravação em lote (transações maiores = menos checkpoints)
+LOTE_BANCO = 50000
+
+# Índices de resultados por documento (re-varredura incremental)
+INDICE_DIR = os.path.join(BASE_DIR, "indices")
+
+# Tamanho do bloco (em caracteres) na leitura em fluxo de arquivos grandes
+TAMANHO_BLOCO_LEITURA = 1024 * 1024
+
+# Janela (em bytes) da varredura de logs mapeados em memória (src/mapped_scan.py)
+TAMANHO_JANELA_MAPEADA = 1024 * 1024
+
+# Varredura paralela (multi-core): nº de processos e quantas linhas vão em cada lote
+WORKERS_PADRAO = os.cpu_count() or 1
+TAMANHO_LOTE_PADRAO = 2000
+
+# Pasta de entrada padrão (PDFs e logs a auditar)
+ENTRADA_DIR = os.path.join(BASE_DIR, "inputs")
+
+# Serviço local de varredura (src/service.py): só escuta em 127.0.0.1
+SERVICO_PORTA = 8765
+SERVICO_WORKERS = 2
+SERVICO_FILA_MAXIMA = 32
+SERVICO_TAREFAS_GUARDADAS = 200
+SERVICO_LIMITE_UPLOAD = 256 * 1024 * 1024
+# Acima disso (bytes), a tarefa usa o LogParser paralelo (processos)
+SERVICO_LIMIAR_PARALELO = 16 * 1024 * 1024
+
+# Modo follow (src/follow.py): logs vivos acompanhados por polling, achados em NDJSON
+SEGUIR_INTERVALO = 0.25  # segundos entre as checagens (latência máxima sem carga)
+SEGUIR_BLOCO = 1024 * 1024  # bytes lidos por arquivo a cada rodada
+SEGUIR_CHECKPOINT = os.path.join(BASE_DIR, "seguir_checkpoint.json")
+SEGUIR_SAIDA = os.path.join(BASE_DIR, "achados_ao_vivo.ndjson")
+
+# Métricas por etapa (src/metrics.py): desligadas por padrão, liga com AUDITORIA_METRICAS=1
+METRICAS_ATIVAS = os.environ.get("AUDITORIA_METRICAS") == "1"
+
 
 def carregar_glossario():
     caminho = os.path.join(DATA_DIR, "glossario.json")
@@ -19,8 +69,16 @@ def carregar_glossario():
         return {}
 
 
-# Carrega os dados na inicialização
-GLOSSARIO = carregar_glossario()
+# Carregado no 1º uso (e compartilhado): importar o config não lê o JSON
+_GLOSSARIO = None
+
+
+def obter_glossario():
+    global _GLOSSARIO
+    if _GLOSSARIO is None:
+        _GLOSSARIO = carregar_glossario()
+    return _GLOSSARIO
+
 
 # Lista de Gatilhos (Hardcoded para agilidade, conforme combinamos)
 GATILHOS_ALERTA = [
@@ -43,3 +101,10 @@ GATILHOS_ALERTA = [
 def obter_cor_alerta(termo):
     vermelhos = ["crime", "reclusão", "vedado", "proibido", "inconstitucional"]
     return "VERMELHO" if termo in vermelhos else "AMARELO"
+
+
+def __getattr__(nome):
+    # Compatibilidade: `config.GLOSSARIO` continua valendo, lido só no 1º acesso
+    if nome == "GLOSSARIO":
+        return obter_glossario()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
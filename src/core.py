@@ -43,121 +43,328 @@ def analisar_frase_juridica(frase_original):
     return anotacoes
 """
 
+import hashlib
+import json
 import re
-from src.detectors import (
-    varrer_texto_por_cpfs,
-    varrer_texto_por_cartoes,
-    varrer_texto_por_credenciais,
-    varrer_texto_por_iocs,
-)
+from src import metrics
+from src.detectors import PADROES_DLP, varrer_texto
+from src.matcher import MotorDeBusca
 from src.utils import normalizar_texto
-from src.config import GLOSSARIO, GATILHOS_ALERTA, obter_cor_alerta
+from src.config import GATILHOS_ALERTA, obter_cor_alerta, obter_glossario
 
 
-def analisar_frase_juridica(frase_original):
-    frase_limpa = normalizar_texto(frase_original)
-    anotacoes = []
+def _impressao_digital(*partes):
+    """
+    🔑 Hash curto e estável da definição de uma regra:
+    mudou o padrão ou o texto do card, muda a impressão digital.
+    """
+    conteudo = json.dumps(partes, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+def _montar_regras():
+    """
+    Pré-calcula (uma vez só) os padrões e o card de cada regra:
+    primeiro as entradas da Matriz de Risco, depois os Gatilhos.
+    """
+    regras = []
+
+    # 1. Busca na Nova Matriz de Risco (Antigo Glossário)
+    for termo_chave, dados in obter_glossario().items():
+        # Busca por múltiplos padrões (sinônimos de risco)
+        padroes = dados.get("padrao_busca", [termo_chave])
+        # Cria o card de RISCO (AppSec/Auditoria)
+        modelo = {
+            "tipo": "RISCO_DETECTADO",
+            "termo": termo_chave.upper(),
+            "nivel_risco": dados.get("risco", "DESCONHECIDO"),
+            "categoria": dados.get("categoria", "Geral"),
+            "acao": dados.get("acao_sugerida", "Analisar contexto."),
+            "mensagem": f"⚠️ Risco {dados.get('risco')}: {dados.get('acao_sugerida')}",
+        }
+        regras.append({"id": f"GLOSSARIO:{termo_chave}", "padroes": padroes, "modelo": modelo})
+
+    # 2. Busca nos Gatilhos (Mantém compatibilidade com alertas simples)
+    for gatilho in GATILHOS_ALERTA:
+        cor = obter_cor_alerta(normalizar_texto(gatilho))
+        modelo = {
+            "tipo": "ALERTA_KEYWORD",
+            "termo": gatilho.upper(),
+            "mensagem": f"🔎 Termo Sensível ({cor}): Verifique o contexto.",
+            "prioridade": "ALTA" if cor == "VERMELHO" else "MEDIA",
+        }
+        regras.append({"id": f"GATILHO:{gatilho}", "padroes": [gatilho], "modelo": modelo})
+
+    for regra in regras:
+        regra["impressao"] = _impressao_digital(regra["padroes"], regra["modelo"])
+
+    return regras
+
+
+def montar_motor(regras):
+    """
+    Motor de busca só com as regras pedidas. Os índices devolvidos por
+    motor.buscar() apontam para a lista 'regras' recebida aqui.
+    """
+    return MotorDeBusca([regra["padroes"] for regra in regras])
+
+
+# Montados no 1º uso e compartilhados (o custo por linha não depende do tamanho
+# do glossário); importar o core não lê o JSON nem compila o motor
+_REGRAS = None
+_MOTOR = None
 
-    cpfs_vazados = varrer_texto_por_cpfs(frase_original)
 
-    for cpf in cpfs_vazados:
-        anotacoes.append(
-            {
-                "tipo": "RISCO_DETECTADO",
-                "termo": f"CPF EXPOSTO: {cpf}",
-                "nivel_risco": "CRÍTICO",
-                "categoria": "LGPD / Privacidade",
-                "acao": "Anonimizar (mascarar) o dado imediatamente para evitar sanções.",
-                "mensagem": "⚠️ Violação LGPD (Art. 7º): Exposição de Dado Pessoal identificável sem mascaramento.",
-            }
-        )
+def obter_regras():
+    """
+    Regras do glossário/gatilhos (o REGRAS de antes), montadas junto com o motor na 1ª chamada.
+    """
+    global _REGRAS, _MOTOR
+    if _REGRAS is None:
+        regras = _montar_regras()
+        _MOTOR = montar_motor(regras)
+        _REGRAS = regras
+    return _REGRAS
 
+
+def buscar_regras(frase_limpa):
+    """
+    Índices (em REGRAS) das regras do glossário/gatilhos que batem na frase normalizada.
+    """
+    if _MOTOR is None:
+        obter_regras()
+    return _MOTOR.buscar(frase_limpa)
+
+
+def pode_acionar_regra(frase_limpa):
+    """
+    Pré-filtro do glossário/gatilhos: False = nenhuma regra bate na frase normalizada.
+    """
+    if _MOTOR is None:
+        obter_regras()
+    return _MOTOR.pode_bater(frase_limpa)
+
+
+def iniciais_das_regras():
+    """
+    Palavras iniciais do glossário/gatilhos (None = qualquer frase pode bater),
+    para pré-filtros que não passam pelo normalizar_texto (ex: mapped_scan).
+    """
+    if _MOTOR is None:
+        obter_regras()
+    return _MOTOR.palavras_iniciais()
+
+
+# Cards fixos dos caçadores DLP: de um achado para outro só muda o "termo".
+# A posição na lista é o id do card (usado pelo ArmazemEventos).
+CARDS_DLP = [
+    # === CAÇADOR DE CPFs (LGPD) ===
+    {
+        "id": "DLP:CPF",
+        "tipos": ("CPF",),
+        "prefixo": "CPF EXPOSTO: ",
+        "mascarar": False,
+        "modelo": {
+            "tipo": "RISCO_DETECTADO",
+            "termo": "",
+            "nivel_risco": "CRÍTICO",
+            "categoria": "LGPD / Privacidade",
+            "acao": "Anonimizar (mascarar) o dado imediatamente para evitar sanções.",
+            "mensagem": "⚠️ Violação LGPD (Art. 7º): Exposição de Dado Pessoal identificável sem mascaramento.",
+        },
+    },
     # === CAÇADOR DE CARTÕES DE CRÉDITO (PCI-DSS) ===
-    cartoes_vazados = varrer_texto_por_cartoes(frase_original)
+    {
+        "id": "DLP:CARTAO",
+        "tipos": ("CARTAO",),
+        "prefixo": "CARTÃO DE CRÉDITO EXPOSTO: ",
+        "mascarar": True,
+        "modelo": {
+            "tipo": "RISCO_DETECTADO",
+            "termo": "",
+            "nivel_risco": "CRÍTICO",
+            "categoria": "PCI-DSS / Financeiro",
+            "acao": "Revogar token imediatamente e mascarar dado (Data Masking).",
+            "mensagem": "⚠️ Violação PCI-DSS: Exposição de PAN (Primary Account Number) em texto claro.",
+        },
+    },
+    # === CAÇADOR DE CREDENCIAIS VAZADAS (CLOUD/DEVOPS) ===
+    {
+        "id": "DLP:CREDENCIAL",
+        "tipos": ("AWS", "SENHA"),
+        "prefixo": "CREDÊNCIAL/SENHA EXPOSTA: ",
+        "mascarar": False,
+        "modelo": {
+            "tipo": "RISCO_DETECTADO",
+            "termo": "",
+            "nivel_risco": "CRÍTICO",
+            "categoria": "Hardcoded Secrets / IAM",
+            "acao": "Rotacionar a chave/senha imediatamente. Risco de invasão lateral.",
+            "mensagem": "⚠️ Vazamento Crítico: Credenciais de acesso encontradas em texto claro.",
+        },
+    },
+    # === CAÇADOR DE INDICADORES DE COMPROMETIMENTO (IOCs) ===
+    {
+        "id": "DLP:IOC",
+        "tipos": ("IPV4", "HASH"),
+        "prefixo": "INDICADOR SUSPEITO (IP/HASH): ",
+        "mascarar": False,
+        "modelo": {
+            "tipo": "ANOMALIA_DETECTADA",
+            "termo": "",
+            "nivel_risco": "ALTO",
+            "categoria": "SOC / Threat Intel",
+            "acao": "Verificar IP em bases de Threat Intelligence e bloquear no Firewall se malicioso.",
+            "mensagem": "🚨 Rastro suspeito: IP ou Hash de arquivo encontrado no registro.",
+        },
+    },
+]
 
-    for cartao in cartoes_vazados:
+# Versão dos caçadores DLP (CPF/Cartão/Credenciais/IOCs): suba ao mudar os cards acima
+VERSAO_DLP = 2
+IMPRESSAO_DLP = _impressao_digital(VERSAO_DLP, PADROES_DLP)
+
+
+def impressao_regras():
+    """
+    Versão do conjunto inteiro (DLP + glossário + gatilhos) carregado neste processo:
+    qualquer mudança no glossario.json muda esta impressão digital.
+    """
+    return _impressao_digital(IMPRESSAO_DLP, [regra["impressao"] for regra in obter_regras()])
+
+
+def montar_card_dlp(indice_card, valor):
+    card = CARDS_DLP[indice_card]
+
+    if card["mascarar"]:
         # Mascaramento de dados (DLP): Esconde tudo, mostra só os últimos 4 dígitos
-        cartao_limpo = re.sub(r"\D", "", cartao)
-        cartao_mascarado = f"**** **** **** {cartao_limpo[-4:]}"
-
-        anotacoes.append(
-            {
-                "tipo": "RISCO_DETECTADO",
-                "termo": f"CARTÃO DE CRÉDITO EXPOSTO: {cartao_mascarado}",
-                "nivel_risco": "CRÍTICO",
-                "categoria": "PCI-DSS / Financeiro",
-                "acao": "Revogar token imediatamente e mascarar dado (Data Masking).",
-                "mensagem": "⚠️ Violação PCI-DSS: Exposição de PAN (Primary Account Number) em texto claro.",
-            }
-        )
+        cartao_limpo = re.sub(r"\D", "", valor)
+        valor = f"**** **** **** {cartao_limpo[-4:]}"
 
-    # === CAÇADOR DE CREDENCIAIS VAZADAS (CLOUD/DEVOPS) ===
-    credenciais = varrer_texto_por_credenciais(frase_original)
-    for cred in credenciais:
-        anotacoes.append(
-            {
-                "tipo": "RISCO_DETECTADO",
-                "termo": f"CREDÊNCIAL/SENHA EXPOSTA: {cred}",
-                "nivel_risco": "CRÍTICO",
-                "categoria": "Hardcoded Secrets / IAM",
-                "acao": "Rotacionar a chave/senha imediatamente. Risco de invasão lateral.",
-                "mensagem": "⚠️ Vazamento Crítico: Credenciais de acesso encontradas em texto claro.",
-            }
-        )
+    anotacao = dict(card["modelo"])
+    anotacao["termo"] = card["prefixo"] + valor
+    return anotacao
 
-    # === CAÇADOR DE INDICADORES DE COMPROMETIMENTO (IOCs) ===
-    iocs = varrer_texto_por_iocs(frase_original)
-    for ioc in iocs:
-        anotacoes.append(
-            {
-                "tipo": "ANOMALIA_DETECTADA",
-                "termo": f"INDICADOR SUSPEITO (IP/HASH): {ioc}",
-                "nivel_risco": "ALTO",
-                "categoria": "SOC / Threat Intel",
-                "acao": "Verificar IP em bases de Threat Intelligence e bloquear no Firewall se malicioso.",
-                "mensagem": "🚨 Rastro suspeito: IP ou Hash de arquivo encontrado no registro.",
-            }
-        )
 
-    # 1. Busca na Nova Matriz de Risco (Antigo Glossário)
-    for termo_chave, dados in GLOSSARIO.items():
-        # Busca por múltiplos padrões (sinônimos de risco)
-        padroes = dados.get("padrao_busca", [termo_chave])
+def _achados_por_card(achados):
+    # Mesma ordem dos caçadores antigos: card a card, tipo a tipo, na ordem da linha
+    for indice_card, card in enumerate(CARDS_DLP):
+        for tipo in card["tipos"]:
+            for achado in achados:
+                if achado.tipo == tipo:
+                    yield indice_card, achado
 
-        encontrou = False
-        for padrao in padroes:
-            padrao_norm = normalizar_texto(padrao)
-            # Regex simples (word boundary) para achar a palavra inteira
-            if re.search(r"\b" + re.escape(padrao_norm) + r"\b", frase_limpa):
-                encontrou = True
-                break
 
-        if encontrou:
-            # Cria o card de RISCO (AppSec/Auditoria)
-            anotacoes.append(
-                {
-                    "tipo": "RISCO_DETECTADO",
-                    "termo": termo_chave.upper(),
-                    "nivel_risco": dados.get("risco", "DESCONHECIDO"),
-                    "categoria": dados.get("categoria", "Geral"),
-                    "acao": dados.get("acao_sugerida", "Analisar contexto."),
-                    "mensagem": f"⚠️ Risco {dados.get('risco')}: {dados.get('acao_sugerida')}",
-                }
-            )
+def analisar_dlp(frase_original, achados=None):
+    """
+    Monta os cards dos caçadores DLP (CPF, Cartão, Credenciais e IOCs).
+    """
+    # Uma única varredura DLP por linha (pode vir pronta do LogParser)
+    if achados is None:
+        achados = varrer_texto(frase_original)
 
-    # 2. Busca nos Gatilhos (Mantém compatibilidade com alertas simples)
-    for gatilho in GATILHOS_ALERTA:
-        gatilho_normalizado = normalizar_texto(gatilho)
-        if re.search(r"\b" + re.escape(gatilho_normalizado) + r"\b", frase_limpa):
-            cor = obter_cor_alerta(gatilho_normalizado)
-            # Só adiciona se não for duplicado com o glossário
-            anotacoes.append(
-                {
-                    "tipo": "ALERTA_KEYWORD",
-                    "termo": gatilho.upper(),
-                    "mensagem": f"🔎 Termo Sensível ({cor}): Verifique o contexto.",
-                    "prioridade": "ALTA" if cor == "VERMELHO" else "MEDIA",
-                }
-            )
+    return [
+        montar_card_dlp(indice_card, achado.valor)
+        for indice_card, achado in _achados_por_card(achados)
+    ]
 
-    return anotacoes
+
+def posicoes_dlp(achados):
+    """
+    (índice do card, início, fim) de cada card DLP, na ordem do analisar_dlp:
+    com a linha em mãos, o card é remontado sem guardar o valor em lugar nenhum.
+    """
+    return [(indice_card, achado.inicio, achado.fim) for indice_card, achado in _achados_por_card(achados)]
+
+
+def montar_alerta(id_alerta, valor=None, campo=None):
+    """
+    Card completo a partir do id na tabela estática de alertas:
+    primeiro os CARDS_DLP, depois as REGRAS (glossário/gatilhos).
+    Em logs estruturados, 'campo' é o caminho do campo onde o achado estava.
+    """
+    if id_alerta < len(CARDS_DLP):
+        card = montar_card_dlp(id_alerta, valor)
+    else:
+        card = dict(obter_regras()[id_alerta - len(CARDS_DLP)]["modelo"])
+    if campo is not None:
+        card["campo"] = campo
+    return card
+
+
+def descrever_alerta(id_alerta):
+    """
+    (id da regra, nível de risco) de um id da tabela de alertas,
+    sem montar o card (usado para gravar os achados no banco).
+    """
+    if id_alerta < len(CARDS_DLP):
+        card = CARDS_DLP[id_alerta]
+        return card["id"], card["modelo"]["nivel_risco"]
+    regra = obter_regras()[id_alerta - len(CARDS_DLP)]
+    return regra["id"], regra["modelo"].get("nivel_risco") or regra["modelo"].get("prioridade")
+
+
+def analisar_frase_compacta(frase_original, achados=None):
+    """
+    🗜️ Mesma análise do analisar_frase_juridica, sem montar nenhum dict:
+    devolve (id_alerta, valor, inicio, fim) apontando para a tabela estática
+    (ver montar_alerta). Regras do glossário não têm valor nem posição (None, -1, -1).
+    """
+    with metrics.medir("core.analisar_frase_compacta"):
+        if achados is None:
+            achados = varrer_texto(frase_original)
+
+        alertas = [
+            (indice_card, achado.valor, achado.inicio, achado.fim)
+            for indice_card, achado in _achados_por_card(achados)
+        ]
+
+        deslocamento = len(CARDS_DLP)
+        with metrics.medir("core.glossario"):
+            regras = buscar_regras(normalizar_texto(frase_original))
+        for regra in regras:
+            alertas.append((deslocamento + regra, None, -1, -1))
+
+        return alertas
+
+
+def analisar_campo_compacto(campo, valor, achados, glossario=True):
+    """
+    analisar_frase_compacta de um único campo de log estruturado: os achados
+    DLP já vêm filtrados pelo perfil do campo, o glossário só roda se o perfil
+    pedir, e cada alerta leva o caminho do campo como 5º item.
+    """
+    alertas = [
+        (indice_card, achado.valor, achado.inicio, achado.fim, campo)
+        for indice_card, achado in _achados_por_card(achados)
+    ]
+    if glossario:
+        deslocamento = len(CARDS_DLP)
+        with metrics.medir("core.glossario"):
+            regras = buscar_regras(normalizar_texto(valor))
+        for regra in regras:
+            alertas.append((deslocamento + regra, None, -1, -1, campo))
+    return alertas
+
+
+def analisar_frase_juridica(frase_original, achados=None):
+    with metrics.medir("core.analisar_frase_juridica"):
+        frase_limpa = normalizar_texto(frase_original)
+        anotacoes = analisar_dlp(frase_original, achados)
+
+        # 1 e 2. Matriz de Risco (Glossário) + Gatilhos numa única passada pré-compilada
+        with metrics.medir("core.glossario"):
+            regras = buscar_regras(frase_limpa)
+        for regra in regras:
+            anotacoes.append(dict(_REGRAS[regra]["modelo"]))
+
+        return anotacoes
+
+
+def __getattr__(nome):
+    # Compatibilidade: `core.REGRAS` / `core.IMPRESSAO_REGRAS` montados só no 1º acesso
+    if nome == "REGRAS":
+        return obter_regras()
+    if nome == "IMPRESSAO_REGRAS":
+        return impressao_regras()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
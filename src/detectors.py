@@ -1,4 +1,103 @@
 import re
+from bisect import bisect_right
+from collections import namedtuple
+
+from src import metrics
+
+# NumPy é opcional (sem ele, a validação em lote usa o caminho puro em Python)
+# e pesado de importar: só é carregado no 1º lote grande o bastante para usá-lo
+np = None
+_NUMPY_PROCURADO = False
+
+# 📌 Achado tipado: o que foi encontrado e onde (offsets na linha original)
+Achado = namedtuple("Achado", ["tipo", "valor", "inicio", "fim"])
+
+# Regex que caça o formato do CPF (com ou sem pontuação)
+PADRAO_CPF = r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b"
+
+# Regex para achar 4 blocos de 4 números separados por espaço ou traço
+PADRAO_CARTAO = r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"
+
+# Access Key da AWS (IAM)
+PADRAO_AWS = r"\bAKIA[A-Z0-9]{16}\b"
+
+# Senhas em formatos como "password=1234" ou "senha: root"
+# Flag IGNORECASE (local) para pegar "Senha", "SENHA", etc.
+PADRAO_SENHA = r"(?i:\b(?:password|senha|pwd|secret)\s*[:=]\s*(?P<SENHA_VALOR>[a-zA-Z0-9@#*&]+)\b)"
+
+# IPv4 (4 blocos de 1 a 3 dígitos). O {3} repete o padrão do ponto 3 vezes.
+PADRAO_IPV4 = r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
+
+# Hashes MD5 ou SHA256 (Hexadecimal)
+PADRAO_HASH = r"(?i:\b[0-9A-F]{32,64}\b)"
+
+PADROES_DLP = [
+    ("CPF", PADRAO_CPF),
+    ("CARTAO", PADRAO_CARTAO),
+    ("AWS", PADRAO_AWS),
+    ("SENHA", PADRAO_SENHA),
+    ("IPV4", PADRAO_IPV4),
+    ("HASH", PADRAO_HASH),
+]
+
+# ⚡ Scanner Unificado: todos os caçadores numa única regex com grupos nomeados.
+# O lookahead testa os padrões em cada posição sem consumir texto, então achados
+# de tipos diferentes podem se sobrepor (ex: uma senha que é um CPF), igual às
+# varreduras separadas de antes.
+_SCANNER_DLP = re.compile(
+    "(?=" + "|".join(f"(?P<{tipo}>{padrao})" for tipo, padrao in PADROES_DLP) + ")"
+)
+
+# Scanners só com parte dos caçadores (perfis de logs estruturados), montados no 1º uso
+_SCANNERS_PARCIAIS = {}
+
+
+def _scanner(tipos):
+    if tipos is None:
+        return _SCANNER_DLP
+    scanner = _SCANNERS_PARCIAIS.get(tipos)
+    if scanner is None:
+        scanner = _SCANNERS_PARCIAIS[tipos] = re.compile(
+            "(?="
+            + "|".join(f"(?P<{tipo}>{padrao})" for tipo, padrao in PADROES_DLP if tipo in tipos)
+            + ")"
+        )
+    return scanner
+
+
+# 🚦 Pré-filtro: o mínimo que algum caçador precisa encontrar na linha.
+# Sem nada disso, varrer_texto() devolveria vazio. Checagens separadas e simples
+# saem bem mais baratas que uma alternância única (o `re` testa posição a posição).
+# Dígitos de CPF/cartão (com ou sem separador) ou o "d.d" de um IP:
+_PRE_FILTRO_DIGITOS = re.compile(r"\d(?:\.\d|\d\d(?:\.?\d{3}|\d[-\s]\d{4}))")
+# 32 hexadecimais seguidos (menor hash aceito):
+_PRE_FILTRO_HASH = re.compile(r"[0-9a-fA-F]{32}")
+_CHAVES_SENHA = ("password", "senha", "pwd", "secret")
+
+
+def pode_conter_achado(texto):
+    """
+    Checagem barata antes da varredura completa: False garante
+    que a linha não tem nenhum achado DLP.
+    """
+    if "AKIA" in texto or _PRE_FILTRO_DIGITOS.search(texto):
+        return True
+
+    # Mesmo casamento do IGNORECASE da regex de senha ("ſ", o s longo, vale como "s")
+    minusculo = texto.lower().replace("ſ", "s")
+    if any(chave in minusculo for chave in _CHAVES_SENHA):
+        return True
+
+    return _PRE_FILTRO_HASH.search(texto) is not None
+
+
+_RE_NAO_DIGITO = re.compile(r"\D")
+
+# Sequências repetidas (000.000.000-00, 111...): montadas uma vez só
+_CPFS_REPETIDOS = frozenset(str(i) * 11 for i in range(10))
+
+# Abaixo disso, montar os arrays do NumPy custa mais que validar um a um
+_LOTE_MINIMO_NUMPY = 64
 
 
 def validar_cpf_matematica(cpf):
@@ -7,13 +106,13 @@ def validar_cpf_matematica(cpf):
     que o número encontrado passa no cálculo da Receita Federal.
     """
     # Remove tudo que não for número
-    cpf_limpo = re.sub(r"\D", "", cpf)
+    cpf_limpo = _RE_NAO_DIGITO.sub("", cpf)
 
     if len(cpf_limpo) != 11:
         return False
 
     # Bloqueia sequências repetidas (Testes) para evitar falsos positivos
-    if cpf_limpo in [str(i) * 11 for i in range(10)]:
+    if cpf_limpo in _CPFS_REPETIDOS:
         return False
 
     # Lógica Matemática dos Dígitos Verificadores
@@ -31,24 +130,57 @@ def validar_cpf_matematica(cpf):
     return cpf_limpo.endswith(f"{digito1}{digito2}")
 
 
-def varrer_texto_por_cpfs(texto):
+def varrer_texto(texto, validar=True, tipos=None):
     """
-    🔎 Caçador de Padrões (DLP Engine)
-    Retorna uma lista de CPFs reais encontrados no texto.
+    ⚡ DLP Engine Unificada: uma única passada pela linha.
+    Retorna a lista de Achados (tipo, valor, inicio, fim) em ordem de posição,
+    já filtrada pelos validadores matemáticos (CPF e Luhn).
+    Com validar=False devolve os candidatos crus (a validação fica para o lote).
+    'tipos' (frozenset, ex: {"IPV4"}) limita a varredura a esses caçadores.
     """
-    cpfs_encontrados = []
+    achados = []
+    fim_por_tipo = {}
+
+    for m in _scanner(tipos).finditer(texto):
+        tipo = m.lastgroup
+        inicio, fim = m.span(tipo)
+
+        # Mesmo tipo sobreposto: o findall isolado também pularia este trecho
+        if inicio < fim_por_tipo.get(tipo, 0):
+            continue
+        fim_por_tipo[tipo] = fim
 
-    # Regex que caça o formato do CPF (com ou sem pontuação)
-    padrao_cpf = r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b"
+        # Da senha interessa só o valor (o que vem depois de "senha:")
+        if tipo == "SENHA":
+            inicio, fim = m.span("SENHA_VALOR")
+        valor = texto[inicio:fim]
 
-    possiveis_cpfs = re.findall(padrao_cpf, texto)
+        # Filtro de Falsos Positivos: A matemática bate?
+        if validar and tipo == "CPF" and not validar_cpf_matematica(valor):
+            continue
+        if validar and tipo == "CARTAO" and not validar_cartao_luhn(valor):
+            continue
 
-    # Filtro de Falsos Positivos: A matemática bate?
-    for candidato in possiveis_cpfs:
-        if validar_cpf_matematica(candidato):
-            cpfs_encontrados.append(candidato)
+        achados.append(Achado(tipo, valor, inicio, fim))
 
-    return cpfs_encontrados
+    if validar:
+        metrics.contar_achados(achados)
+    return achados
+
+
+def _valores(achados, *tipos):
+    # Mantém a ordem antiga: todos os achados do 1º tipo, depois os do 2º...
+    return [a.valor for tipo in tipos for a in achados if a.tipo == tipo]
+
+
+def varrer_texto_por_cpfs(texto, achados=None):
+    """
+    🔎 Caçador de Padrões (DLP Engine)
+    Retorna uma lista de CPFs reais encontrados no texto.
+    """
+    if achados is None:
+        achados = varrer_texto(texto)
+    return _valores(achados, "CPF")
 
 
 def validar_cartao_luhn(cartao):
@@ -57,7 +189,7 @@ def validar_cartao_luhn(cartao):
     Norma: PCI-DSS.
     """
     # Remove tudo que não for número (espaços, traços, etc)
-    cartao_limpo = re.sub(r"\D", "", cartao)
+    cartao_limpo = _RE_NAO_DIGITO.sub("", cartao)
 
     # Cartões variam de 13 a 19 dígitos
     if len(cartao_limpo) < 13 or len(cartao_limpo) > 19:
@@ -83,94 +215,244 @@ def validar_cartao_luhn(cartao):
     return soma % 10 == 0
 
 
-def varrer_texto_por_cartoes(texto):
+def _carregar_numpy():
+    global np, _NUMPY_PROCURADO
+    if not _NUMPY_PROCURADO:
+        _NUMPY_PROCURADO = True
+        try:
+            import numpy
+
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+def _matriz_de_digitos(digitos, largura):
+    # Strings ASCII de mesmo tamanho viram uma matriz (n, largura) de dígitos 0-9
+    bruto = np.frombuffer("".join(digitos).encode("ascii"), dtype=np.uint8)
+    return bruto.reshape(-1, largura).astype(np.int32) - 48
+
+
+def _validar_em_lote(candidatos, preparar, validar_matriz, validar_um):
     """
-    🔎 DLP Engine: Caçador de Cartões de Crédito (PCI-DSS)
+    Esqueleto dos validadores em lote: 'preparar' limpa cada candidato
+    (None = já reprovado), a matriz de quem sobrou é validada de uma vez no
+    NumPy e o que não cabe na matriz (dígitos fora do ASCII) vai um a um.
     """
-    cartoes_encontrados = []
+    if len(candidatos) < _LOTE_MINIMO_NUMPY or _carregar_numpy() is None:
+        return [validar_um(candidato) for candidato in candidatos]
+
+    resultado = [False] * len(candidatos)
+    posicoes = []
+    digitos = []
+    for i, candidato in enumerate(candidatos):
+        limpo = preparar(candidato)
+        if limpo is None:
+            continue
+        if limpo.isascii():
+            posicoes.append(i)
+            digitos.append(limpo)
+        else:
+            resultado[i] = validar_um(candidato)
+
+    if digitos:
+        for i, valido in zip(posicoes, validar_matriz(digitos).tolist()):
+            resultado[i] = valido
+
+    return resultado
 
-    # Regex para achar 4 blocos de 4 números separados por espaço ou traço
-    padrao_cartao = r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"
 
-    possiveis_cartoes = re.findall(padrao_cartao, texto)
+def _so_digitos(candidato):
+    # Atalho para os separadores de sempre; isdecimal() == só caracteres \d
+    rapido = candidato.replace(".", "").replace("-", "").replace(" ", "")
+    if rapido.isdecimal():
+        return rapido
+    return _RE_NAO_DIGITO.sub("", candidato)
 
-    for candidato in possiveis_cartoes:
-        # Passa o candidato pelo crivo matemático de Luhn
-        if validar_cartao_luhn(candidato):
-            cartoes_encontrados.append(candidato)
 
-    return cartoes_encontrados
+def _preparar_cpf(cpf):
+    cpf_limpo = _so_digitos(cpf)
+    if len(cpf_limpo) != 11 or cpf_limpo in _CPFS_REPETIDOS:
+        return None
+    return cpf_limpo
 
 
-def sanitizar_log_str(texto):
+def _validar_matriz_cpf(digitos):
+    matriz = _matriz_de_digitos(digitos, 11)
+
+    # Mesmos pesos da Receita: 10..2 para o 1º dígito, 11..2 para o 2º
+    resto1 = (matriz[:, :9] @ np.arange(10, 1, -1)) % 11
+    resto2 = (matriz[:, :10] @ np.arange(11, 1, -1)) % 11
+    digito1 = np.where(resto1 < 2, 0, 11 - resto1)
+    digito2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+    return (matriz[:, 9] == digito1) & (matriz[:, 10] == digito2)
+
+
+def validar_cpfs_em_lote(candidatos):
     """
-    Substitui os dados sensíveis encontrados na string original
-    pelas suas versões mascaradas, protegendo a exibição do log.
+    🛡️ validar_cpf_matematica para uma lista inteira de candidatos:
+    devolve uma lista de bool na mesma ordem. Com NumPy, os dígitos
+    verificadores de todos são calculados numa única passada vetorizada.
     """
-    texto_seguro = texto
-
-    # 1. Mascara Cartões de Crédito (PCI-DSS)
-    cartoes = varrer_texto_por_cartoes(texto_seguro)
-    for cartao in cartoes:
-        final_cartao = cartao[-4:]
-        texto_seguro = texto_seguro.replace(cartao, f"****.****.****.{final_cartao}")
-
-    # 2. Mascara CPFs (LGPD)
-    cpfs = varrer_texto_por_cpfs(texto_seguro)
-    for cpf in cpfs:
-        texto_seguro = texto_seguro.replace(cpf, "***.***.***-**")
-
-    # 3. Mascara Credenciais (CLOUD/DEVOPS)
-    credenciais = varrer_texto_por_credenciais(texto_seguro)
-    for cred in credenciais:
-        # Mostra o prefixo AKIA e oculta o resto da chave AWS
-        if cred.startswith("AKIA"):
-            texto_seguro = texto_seguro.replace(cred, f"{cred[:4]}****************")
-        # Mascara senhas genéricas totalmente
-        else:
-            texto_seguro = texto_seguro.replace(cred, "********")
+    return _validar_em_lote(
+        candidatos, _preparar_cpf, _validar_matriz_cpf, validar_cpf_matematica
+    )
 
-    return texto_seguro
+
+def _preparar_cartao(cartao):
+    cartao_limpo = _so_digitos(cartao)
+    if len(cartao_limpo) < 13 or len(cartao_limpo) > 19:
+        return None
+    # Zeros à esquerda não mudam o Luhn: todos ficam com 19 dígitos
+    return cartao_limpo.rjust(19, "0")
 
 
-def varrer_texto_por_credenciais(texto):
+def _validar_matriz_cartao(digitos):
+    matriz = _matriz_de_digitos(digitos, 19)
+
+    # De trás para frente, um sim, um não: dobra e tira 9 se passar de 9
+    dobrar = np.arange(18, -1, -1) % 2 == 1
+    dobrados = matriz[:, dobrar] * 2
+    matriz[:, dobrar] = np.where(dobrados > 9, dobrados - 9, dobrados)
+
+    return matriz.sum(axis=1) % 10 == 0
+
+
+def validar_cartoes_em_lote(candidatos):
     """
-    ☁️ DLP Engine: Caçador de Credenciais e Segredos (AWS, Senhas, Tokens)
+    🛡️ validar_cartao_luhn para uma lista inteira de candidatos (PCI-DSS):
+    devolve uma lista de bool na mesma ordem, vetorizada com NumPy.
     """
-    credenciais_encontradas = []
-
-    # Access Key da AWS (IAM)
-    padrao_aws = r"\bAKIA[A-Z0-9]{16}\b"
+    return _validar_em_lote(
+        candidatos, _preparar_cartao, _validar_matriz_cartao, validar_cartao_luhn
+    )
 
-    # Senhas em formatos como "password=1234" ou "senha: root"
-    padrao_senha = r"\b(?:password|senha|pwd|secret)\s*[:=]\s*([a-zA-Z0-9@#*&]+)\b"
 
-    aws_keys = re.findall(padrao_aws, texto)
-    credenciais_encontradas.extend(aws_keys)
+def varrer_textos_em_lote(textos):
+    """
+    ⚡ varrer_texto para uma lista de linhas: cada linha é varrida uma vez,
+    e os candidatos a CPF e cartão de TODAS as linhas são validados juntos
+    (validar_cpfs_em_lote / validar_cartoes_em_lote). Devolve uma lista de
+    Achados por linha, igual a chamar varrer_texto em cada uma.
+    """
+    with metrics.medir("detectores.varredura"):
+        candidatos_por_texto = [varrer_texto(texto, validar=False) for texto in textos]
+
+    cpfs = [a.valor for achados in candidatos_por_texto for a in achados if a.tipo == "CPF"]
+    cartoes = [
+        a.valor for achados in candidatos_por_texto for a in achados if a.tipo == "CARTAO"
+    ]
+    with metrics.medir("detectores.validacao"):
+        cpfs_validos = iter(validar_cpfs_em_lote(cpfs))
+        cartoes_validos = iter(validar_cartoes_em_lote(cartoes))
+
+    # Mesma ordem da coleta acima: o i-ésimo veredito é do i-ésimo candidato
+    resultado = []
+    for achados in candidatos_por_texto:
+        validos = []
+        for achado in achados:
+            if achado.tipo == "CPF" and not next(cpfs_validos):
+                continue
+            if achado.tipo == "CARTAO" and not next(cartoes_validos):
+                continue
+            validos.append(achado)
+        metrics.contar_achados(validos)
+        resultado.append(validos)
+
+    return resultado
+
+
+def varrer_texto_por_cartoes(texto, achados=None):
+    """
+    🔎 DLP Engine: Caçador de Cartões de Crédito (PCI-DSS)
+    """
+    if achados is None:
+        achados = varrer_texto(texto)
+    return _valores(achados, "CARTAO")
 
-    # Flag IGNORECASE para pegar "Senha", "SENHA", etc.
-    senhas = re.findall(padrao_senha, texto, flags=re.IGNORECASE)
-    credenciais_encontradas.extend(senhas)
 
-    return credenciais_encontradas
+# Ordem de prioridade da máscara quando dois achados se sobrepõem
+_PRIORIDADE_MASCARA = {"CARTAO": 0, "CPF": 1, "AWS": 2, "SENHA": 2}
 
 
-def varrer_texto_por_iocs(texto):
+def mascarar_valor(achado):
     """
-    🕸️ SOC Engine: Caçador de Indicadores de Comprometimento (IPs e Hashes)
+    Devolve a versão mascarada de um único Achado (regra por tipo).
     """
-    iocs_encontrados = []
+    # 1. Cartões de Crédito (PCI-DSS): só os últimos 4 dígitos
+    if achado.tipo == "CARTAO":
+        return f"****.****.****.{achado.valor[-4:]}"
 
-    # IPv4 (4 blocos de 1 a 3 dígitos). O {3} repete o padrão do ponto 3 vezes.
-    padrao_ipv4 = r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
+    # 2. CPFs (LGPD)
+    if achado.tipo == "CPF":
+        return "***.***.***-**"
 
-    # Hashes MD5 ou SHA256 (Hexadecimal)
-    padrao_hash = r"\b[0-9A-F]{32,64}\b"
+    # 3. Credenciais (CLOUD/DEVOPS): mostra o prefixo AKIA e oculta o resto da chave AWS
+    if achado.valor.startswith("AKIA"):
+        return f"{achado.valor[:4]}****************"
 
-    ips = re.findall(padrao_ipv4, texto)
-    iocs_encontrados.extend(ips)
+    # Mascara senhas genéricas totalmente
+    return "********"
+
+
+def sanitizar_log_str(texto, achados=None):
+    """
+    Substitui os dados sensíveis encontrados na string original
+    pelas suas versões mascaradas, protegendo a exibição do log.
+    Usa os offsets dos Achados: cada trecho é mascarado no seu lugar
+    e a linha é remontada uma única vez (custo linear).
+    """
+    if achados is None:
+        achados = varrer_texto(texto)
+
+    # Só Cartões, CPFs e Credenciais são mascarados (IPs/Hashes ficam visíveis)
+    candidatos = sorted(
+        (a for a in achados if a.tipo in _PRIORIDADE_MASCARA),
+        key=lambda a: (_PRIORIDADE_MASCARA[a.tipo], a.inicio),
+    )
+    if not candidatos:
+        return texto
+
+    # Sobreposição (ex: senha que é um CPF): vale a máscara de maior prioridade.
+    # Os escolhidos não se sobrepõem e ficam em ordem de início: basta olhar os
+    # vizinhos do novo trecho (busca binária), não todos os já escolhidos
+    escolhidos = []
+    inicios = []
+    for achado in candidatos:
+        posicao = bisect_right(inicios, achado.inicio)
+        if posicao and escolhidos[posicao - 1].fim > achado.inicio:
+            continue
+        if posicao < len(escolhidos) and inicios[posicao] < achado.fim:
+            continue
+        inicios.insert(posicao, achado.inicio)
+        escolhidos.insert(posicao, achado)
+
+    partes = []
+    cursor = 0
+    for achado in escolhidos:
+        partes.append(texto[cursor : achado.inicio])
+        partes.append(mascarar_valor(achado))
+        cursor = achado.fim
+    partes.append(texto[cursor:])
+
+    return "".join(partes)
+
+
+def varrer_texto_por_credenciais(texto, achados=None):
+    """
+    ☁️ DLP Engine: Caçador de Credenciais e Segredos (AWS, Senhas, Tokens)
+    """
+    if achados is None:
+        achados = varrer_texto(texto)
+    return _valores(achados, "AWS", "SENHA")
 
-    hashes = re.findall(padrao_hash, texto, flags=re.IGNORECASE)
-    iocs_encontrados.extend(hashes)
 
-    return iocs_encontrados
+def varrer_texto_por_iocs(texto, achados=None):
+    """
+    🕸️ SOC Engine: Caçador de Indicadores de Comprometimento (IPs e Hashes)
+    """
+    if achados is None:
+        achados = varrer_texto(texto)
+    return _valores(achados, "IPV4", "HASH")
@@ -0,0 +1,119 @@
+from array import array
+
+from src.core import montar_alerta
+
+
+def montar_evento(numero_linha, linha_segura, alertas, pagina=None, membro=None):
+    evento = {
+        "tipo": "REGISTRO_LOG",
+        "linha_origem": numero_linha,
+        "texto": linha_segura,
+        "alertas": alertas,
+    }
+
+    # Em PDFs, guarda também a página onde a linha começa
+    if pagina is not None:
+        evento["pagina"] = pagina
+
+    # Em pacotes (.tar/.zip), o arquivo de dentro do pacote de onde a linha veio
+    if membro is not None:
+        evento["membro"] = membro
+
+    return evento
+
+
+def _campo(alerta):
+    # Alertas de logs estruturados têm um 5º item: o caminho do campo
+    return alerta[4] if len(alerta) > 4 else None
+
+
+def expandir_registro(registro):
+    """
+    Evento completo (o mesmo do modo normal) a partir de um registro
+    (numero_linha, pagina, linha_segura, alertas[, membro]) do LogParser compacto.
+    """
+    numero_linha, pagina, linha_segura, alertas = registro[:4]
+    return montar_evento(
+        numero_linha,
+        linha_segura,
+        [montar_alerta(alerta[0], alerta[1], _campo(alerta)) for alerta in alertas],
+        pagina,
+        registro[4] if len(registro) > 4 else None,
+    )
+
+
+class ArmazemEventos:
+    """
+    🗜️ Armazém compacto de achados, em colunas (arrays) em vez de um dict por linha.
+    Só as linhas com alerta entram; cada alerta vira um id na tabela estática
+    do core (cards DLP + regras), com o valor e a posição na linha original.
+    A memória cresce com o número de achados, não com o tamanho do arquivo.
+    Iterar devolve os mesmos eventos do modo normal, montados sob demanda.
+    """
+
+    def __init__(self):
+        # Colunas por linha com alerta
+        self.linhas = array("q")
+        self.paginas = array("l")  # 0 = sem página (logs)
+        self.textos = []
+        self.membros = []  # None = fora de pacote
+        # Onde começam os alertas de cada linha (com sentinela no fim)
+        self._primeiro_alerta = array("q", [0])
+
+        # Colunas por alerta
+        self.ids_alerta = array("l")
+        self.inicios = array("l")
+        self.fins = array("l")
+        self.valores = []  # só os cards DLP têm valor; regras guardam None
+        self.campos = []  # caminho do campo (logs estruturados) ou None
+
+    def adicionar(self, registro):
+        """
+        Guarda um registro (numero_linha, pagina, linha_segura, alertas[, membro])
+        do LogParser compacto, onde alertas = [(id_alerta, valor, inicio, fim[, campo]), ...].
+        """
+        numero_linha, pagina, linha_segura, alertas = registro[:4]
+        if not alertas:
+            return
+
+        self.linhas.append(numero_linha)
+        self.paginas.append(pagina or 0)
+        self.textos.append(linha_segura)
+        self.membros.append(registro[4] if len(registro) > 4 else None)
+
+        for alerta in alertas:
+            id_alerta, valor, inicio, fim = alerta[:4]
+            self.ids_alerta.append(id_alerta)
+            self.valores.append(valor)
+            self.inicios.append(inicio)
+            self.fins.append(fim)
+            self.campos.append(_campo(alerta))
+        self._primeiro_alerta.append(len(self.ids_alerta))
+
+    def extend(self, registros):
+        for registro in registros:
+            self.adicionar(registro)
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def total_alertas(self):
+        return len(self.ids_alerta)
+
+    def evento(self, posicao):
+        inicio, fim = self._primeiro_alerta[posicao], self._primeiro_alerta[posicao + 1]
+        alertas = [
+            montar_alerta(self.ids_alerta[i], self.valores[i], self.campos[i])
+            for i in range(inicio, fim)
+        ]
+        return montar_evento(
+            self.linhas[posicao],
+            self.textos[posicao],
+            alertas,
+            self.paginas[posicao] or None,
+            self.membros[posicao],
+        )
+
+    def __iter__(self):
+        for posicao in range(len(self.linhas)):
+            yield self.evento(posicao)
@@ -0,0 +1,410 @@
+import argparse
+import datetime
+import heapq
+import hmac
+import os
+import sqlite3
+
+from src.config import BANCO_ACHADOS, CHAVE_ACHADOS, LOTE_BANCO
+from src.core import descrever_alerta, impressao_regras
+
+# Arquivos e regras ficam em tabelas próprias: cada achado é só uma linha de inteiros
+# (o hash do valor também é um inteiro de 8 bytes), o que mantém banco e índices pequenos com milhões de achados
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS varreduras (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    iniciada_em TEXT NOT NULL,
+    origem TEXT,
+    versao_regras TEXT
+);
+CREATE TABLE IF NOT EXISTS arquivos (
+    id INTEGER PRIMARY KEY,
+    caminho TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS regras (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    risco TEXT,
+    UNIQUE (nome, risco)
+);
+CREATE TABLE IF NOT EXISTS achados (
+    varredura INTEGER NOT NULL REFERENCES varreduras(id),
+    arquivo INTEGER NOT NULL REFERENCES arquivos(id),
+    pagina INTEGER,
+    linha INTEGER NOT NULL,
+    regra INTEGER NOT NULL REFERENCES regras(id),
+    hash_valor INTEGER
+);
+DROP INDEX IF EXISTS idx_achados_regra;
+DROP INDEX IF EXISTS idx_achados_arquivo;
+CREATE INDEX IF NOT EXISTS idx_achados_regra_ordem ON achados(regra, varredura DESC, arquivo, linha);
+CREATE INDEX IF NOT EXISTS idx_achados_hash_valor ON achados(hash_valor) WHERE hash_valor IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_achados_arquivo_ordem ON achados(arquivo, varredura DESC, linha);
+"""
+
+# Membro de pacote (.tar/.zip) gravado como arquivo próprio: "pacote.zip!app/app.log"
+_SEPARADOR_MEMBRO = "!"
+
+# Colunas devolvidas pelas consultas (já com os nomes de arquivo e regra). A ordem é a
+# dos índices (varredura mais recente, id do arquivo, linha): o SQLite lê o índice já
+# ordenado e para no LIMIT, em vez de ordenar todas as linhas que bateram
+_CONSULTA = (
+    "SELECT a.varredura, v.iniciada_em, f.caminho AS arquivo, a.pagina, a.linha,"
+    " r.nome AS regra, r.risco, a.arquivo AS id_arquivo"
+    " FROM achados a"
+    " JOIN varreduras v ON v.id = a.varredura"
+    " JOIN arquivos f ON f.id = a.arquivo"
+    " JOIN regras r ON r.id = a.regra"
+    "{where} ORDER BY a.varredura DESC, a.arquivo, a.linha LIMIT ?"
+)
+
+
+def _ordem(achado):
+    return -achado["varredura"], achado["id_arquivo"], achado["linha"]
+
+
+def carregar_chave(caminho=CHAVE_ACHADOS):
+    """
+    🔑 Chave secreta do HMAC dos valores. Criada (aleatória, só o dono lê)
+    na primeira vez; perder a chave = não dá mais para buscar por valor.
+    """
+    try:
+        with open(caminho, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    chave = os.urandom(32)
+    try:
+        fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Outro processo criou ao mesmo tempo: vale a dele
+        return carregar_chave(caminho)
+    with os.fdopen(fd, "wb") as f:
+        f.write(chave)
+    return chave
+
+
+def _normalizar_valor(regra, valor):
+    # O mesmo dado escrito de jeitos diferentes tem que dar o mesmo hash
+    if regra in ("DLP:CPF", "DLP:CARTAO"):
+        return "".join(c for c in valor if c.isdigit())
+    if regra == "DLP:IOC":
+        return valor.strip().lower()
+    return valor.strip()
+
+
+class BancoAchados:
+    """
+    🗄️ Achados de todas as varreduras num SQLite local, para consultas do tipo
+    "em quais arquivos esta chave AWS apareceu este mês?" sem varrer nada de novo.
+    Cada linha: varredura, arquivo, página, linha, regra, risco e o HMAC do valor
+    (o valor em si — CPF, cartão, senha — nunca é gravado).
+    """
+
+    def __init__(self, caminho=BANCO_ACHADOS, caminho_chave=CHAVE_ACHADOS):
+        self.caminho = caminho
+        self._chave = carregar_chave(caminho_chave)
+        # Vários processos do lote gravam no mesmo banco: WAL + espera pelo lock
+        self.conexao = sqlite3.connect(caminho, timeout=60)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute("PRAGMA cache_size=-65536")
+        self.conexao.executescript(_ESQUEMA)
+        # id do alerta (tabela do core) -> (nome da regra, id da regra no banco)
+        self._regras = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        self.conexao.close()
+
+    def hash_valor(self, regra, valor):
+        if valor is None:
+            return None
+        valor = _normalizar_valor(regra, valor)
+        # 64 bits do HMAC bastam para achar um valor entre bilhões, e como inteiro
+        # o índice fica menor e mais rápido de atualizar que um texto hex
+        digest = hmac.digest(self._chave, valor.encode("utf-8"), "sha256")
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    def iniciar_varredura(self, origem):
+        with self.conexao:
+            cursor = self.conexao.execute(
+                "INSERT INTO varreduras (iniciada_em, origem, versao_regras) VALUES (?, ?, ?)",
+                (
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                    origem,
+                    impressao_regras(),
+                ),
+            )
+        return cursor.lastrowid
+
+    def varredura_existe(self, varredura):
+        return self.conexao.execute(
+            "SELECT 1 FROM varreduras WHERE id = ?", (varredura,)
+        ).fetchone() is not None
+
+    def _id(self, tabela, colunas, valores):
+        # Devolve o id da linha (criando na primeira vez)
+        filtro = " AND ".join(f"{coluna} IS ?" for coluna in colunas)
+        with self.conexao:
+            self.conexao.execute(
+                f"INSERT OR IGNORE INTO {tabela} ({', '.join(colunas)})"
+                f" VALUES ({', '.join('?' * len(colunas))})",
+                valores,
+            )
+            (id_linha,) = self.conexao.execute(
+                f"SELECT id FROM {tabela} WHERE {filtro}", valores
+            ).fetchone()
+        return id_linha
+
+    def _regra(self, id_alerta):
+        regra = self._regras.get(id_alerta)
+        if regra is None:
+            nome, risco = descrever_alerta(id_alerta)
+            regra = self._regras[id_alerta] = (nome, self._id("regras", ("nome", "risco"), (nome, risco)))
+        return regra
+
+    def _inserir(self, linhas):
+        with self.conexao:
+            self.conexao.executemany("INSERT INTO achados VALUES (?, ?, ?, ?, ?, ?)", linhas)
+
+    def gravar_em_fluxo(self, varredura, arquivo, registros, tamanho_lote=LOTE_BANCO):
+        """
+        Repassa os registros do LogParser compacto adiante e grava os achados
+        no caminho, em transações de 'tamanho_lote' linhas. Um arquivo
+        regravado na mesma varredura (ex: retomada) substitui o anterior.
+        Membros de pacotes (5º item do registro) viram o arquivo "pacote.zip!membro".
+        """
+        prefixo = arquivo + _SEPARADOR_MEMBRO
+        with self.conexao:
+            self.conexao.execute(
+                "DELETE FROM achados WHERE varredura = ? AND arquivo IN"
+                " (SELECT id FROM arquivos WHERE caminho = ? OR substr(caminho, 1, ?) = ?)",
+                (varredura, arquivo, len(prefixo), prefixo),
+            )
+
+        ids_arquivo = {}
+        pendentes = []
+        for registro in registros:
+            numero_linha, pagina, _, alertas = registro[:4]
+            membro = registro[4] if len(registro) > 4 else None
+            id_arquivo = ids_arquivo.get(membro)
+            if id_arquivo is None:
+                caminho = arquivo if membro is None else prefixo + membro
+                id_arquivo = ids_arquivo[membro] = self._id("arquivos", ("caminho",), (caminho,))
+
+            for id_alerta, valor, *_ in alertas:
+                nome, id_regra = self._regra(id_alerta)
+                pendentes.append(
+                    (varredura, id_arquivo, pagina, numero_linha, id_regra, self.hash_valor(nome, valor))
+                )
+            if len(pendentes) >= tamanho_lote:
+                self._inserir(pendentes)
+                pendentes = []
+            yield registro
+        if pendentes:
+            self._inserir(pendentes)
+
+    def registrar(self, varredura, arquivo, registros, tamanho_lote=LOTE_BANCO):
+        # Mesmo que gravar_em_fluxo, para quem só quer gravar (ex: um ArmazemEventos)
+        for _ in self.gravar_em_fluxo(varredura, arquivo, registros, tamanho_lote):
+            pass
+
+    def _ids(self, sql, parametros):
+        return [id_linha for (id_linha,) in self.conexao.execute(sql, parametros)]
+
+    def _filtros(self, regra, valor, arquivo, risco, varredura, desde, ate):
+        """
+        Traduz os filtros em condições só sobre colunas de achados (as dos índices):
+        regra e risco viram ids da tabela regras, arquivo e datas viram ids também.
+        Devolve (condições, parâmetros, ids das regras); ids None = qualquer regra.
+        Algum filtro sem nenhum id correspondente devolve None (nada a consultar).
+        """
+        condicoes, parametros = [], []
+        if valor is not None:
+            if regra is None:
+                raise ValueError("Para buscar por valor, informe também a regra (ex: DLP:CPF).")
+            condicoes.append("a.hash_valor = ?")
+            parametros.append(self.hash_valor(regra, valor))
+
+        ids_regra = None
+        if regra is not None or risco is not None:
+            ids_regra = self._ids(
+                "SELECT id FROM regras WHERE (? IS NULL OR nome = ?) AND (? IS NULL OR risco = ?)"
+                " ORDER BY id",
+                (regra, regra, risco, risco),
+            )
+            if not ids_regra:
+                return None
+
+        if arquivo is not None:
+            ids_arquivo = self._ids("SELECT id FROM arquivos WHERE caminho = ?", (arquivo,))
+            if not ids_arquivo:
+                return None
+            condicoes.append("a.arquivo = ?")
+            parametros.append(ids_arquivo[0])
+
+        if varredura is not None:
+            condicoes.append("a.varredura = ?")
+            parametros.append(varredura)
+
+        if desde or ate:
+            # Datas sem hora incluem o dia inteiro
+            ids_varredura = self._ids(
+                "SELECT id FROM varreduras WHERE iniciada_em >= ? AND iniciada_em < ? ORDER BY id",
+                (desde or "", (ate if "T" in ate else ate + "T99") if ate else "\uffff"),
+            )
+            if not ids_varredura:
+                return None
+            # Faixa de ids para o índice; a lista exata só se a faixa tiver buracos
+            condicoes.append("a.varredura BETWEEN ? AND ?")
+            parametros += [ids_varredura[0], ids_varredura[-1]]
+            if len(ids_varredura) != ids_varredura[-1] - ids_varredura[0] + 1:
+                condicoes.append(f"a.varredura IN ({', '.join('?' * len(ids_varredura))})")
+                parametros += ids_varredura
+        return condicoes, parametros, ids_regra
+
+    def _consultar_ordenado(self, condicoes, parametros, limite):
+        where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+        cursor = self.conexao.execute(_CONSULTA.format(where=where), parametros + [limite])
+        colunas = [descricao[0] for descricao in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor]
+
+    def consultar(
+        self, regra=None, valor=None, arquivo=None, risco=None,
+        varredura=None, desde=None, ate=None, limite=100,
+    ):
+        """
+        🔎 Achados que batem com todos os filtros informados (mais recentes primeiro).
+        'valor' é o dado em claro (ex: a chave AWS): vira HMAC antes de consultar.
+        'desde'/'ate' filtram pela data da varredura (ISO, ex: "2026-10-01").
+        """
+        filtros = self._filtros(regra, valor, arquivo, risco, varredura, desde, ate)
+        if filtros is None:
+            return []
+        condicoes, parametros, ids_regra = filtros
+
+        if ids_regra is None and valor is None and arquivo is None:
+            # Sem filtro com índice próprio: percorre o índice de cada regra já gravada
+            ids_regra = self._ids("SELECT id FROM regras ORDER BY id", ())
+
+        if ids_regra is None:
+            achados = self._consultar_ordenado(condicoes, parametros, limite)
+        else:
+            # Uma consulta por regra (cada uma lê o índice já na ordem e para no limite),
+            # intercaladas aqui: um risco com várias regras não vira uma ordenação geral.
+            # Com valor, o índice do hash é o mais seletivo ("+" tira a regra do índice)
+            regra_sql = "+a.regra = ?" if valor is not None else "a.regra = ?"
+            consultas = [
+                self._consultar_ordenado(condicoes + [regra_sql], parametros + [id_regra], limite)
+                for id_regra in ids_regra
+            ]
+            achados = list(heapq.merge(*consultas, key=_ordem))[:limite]
+        for achado in achados:
+            del achado["id_arquivo"]
+        return achados
+
+    def arquivos(self, regra=None, valor=None, risco=None, desde=None, ate=None):
+        """
+        Arquivos onde os filtros bateram, com o nº de achados e a última varredura.
+        """
+        filtros = self._filtros(regra, valor, None, risco, None, desde, ate)
+        if filtros is None:
+            return []
+        condicoes, parametros, ids_regra = filtros
+        if ids_regra is not None:
+            condicoes.append(f"a.regra IN ({', '.join('?' * len(ids_regra))})")
+            parametros += ids_regra
+        where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+
+        # Agrupa pelos ids (só o índice é lido); nomes e datas entram depois, uma vez por arquivo
+        cursor = self.conexao.execute(
+            "SELECT f.caminho AS arquivo, g.achados, v.iniciada_em AS ultima_varredura FROM ("
+            "SELECT a.arquivo, COUNT(*) AS achados, MAX(a.varredura) AS ultima"
+            f" FROM achados a{where} GROUP BY a.arquivo) g"
+            " JOIN arquivos f ON f.id = g.arquivo"
+            " JOIN varreduras v ON v.id = g.ultima"
+            " ORDER BY g.achados DESC, f.caminho",
+            parametros,
+        )
+        colunas = [descricao[0] for descricao in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor]
+
+    def resumo(self):
+        """
+        Totais por regra (e risco) e o nº de varreduras gravadas.
+        """
+        regras = self.conexao.execute(
+            "SELECT r.nome, r.risco, COUNT(*) FROM achados a JOIN regras r ON r.id = a.regra"
+            " GROUP BY a.regra ORDER BY 3 DESC"
+        ).fetchall()
+        (varreduras,) = self.conexao.execute("SELECT COUNT(*) FROM varreduras").fetchone()
+        return {
+            "varreduras": varreduras,
+            "regras": [{"regra": r, "risco": risco, "achados": n} for r, risco, n in regras],
+        }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="🗄️ Consulta o banco de achados (todas as varreduras gravadas com --banco)."
+    )
+    parser.add_argument("--banco", default=BANCO_ACHADOS, help="arquivo SQLite")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    for nome, ajuda in (
+        ("achados", "lista os achados que batem com os filtros"),
+        ("arquivos", "arquivos onde os filtros bateram (com a contagem)"),
+    ):
+        comando = sub.add_parser(nome, help=ajuda)
+        comando.add_argument("--regra", help="ex: DLP:CPF, DLP:CREDENCIAL, GLOSSARIO:<termo>")
+        comando.add_argument("--valor", help="dado em claro (ex: a chave AWS); exige --regra")
+        comando.add_argument("--risco", help="ex: CRÍTICO, ALTO")
+        comando.add_argument("--desde", help="data ISO da varredura (ex: 2026-10-01)")
+        comando.add_argument("--ate", help="data ISO da varredura (inclusive)")
+        if nome == "achados":
+            comando.add_argument("--arquivo")
+            comando.add_argument("--varredura", type=int)
+            comando.add_argument("--limite", type=int, default=100)
+
+    sub.add_parser("resumo", help="totais por regra")
+    args = parser.parse_args(argumentos)
+
+    if not os.path.exists(args.banco):
+        parser.error(f"banco não encontrado: {args.banco}")
+
+    with BancoAchados(args.banco) as banco:
+        try:
+            if args.comando == "resumo":
+                resumo = banco.resumo()
+                print(f"🗄️ {resumo['varreduras']} varredura(s) gravada(s)")
+                for item in resumo["regras"]:
+                    print(f"  {item['achados']:>10}  {item['risco'] or '-':<10} {item['regra']}")
+            elif args.comando == "arquivos":
+                filtros = dict(regra=args.regra, valor=args.valor, risco=args.risco, desde=args.desde, ate=args.ate)
+                for item in banco.arquivos(**filtros):
+                    print(f"{item['achados']:>8}  {item['ultima_varredura']}  {item['arquivo']}")
+            else:
+                filtros = dict(
+                    regra=args.regra, valor=args.valor, risco=args.risco, desde=args.desde,
+                    ate=args.ate, arquivo=args.arquivo, varredura=args.varredura, limite=args.limite,
+                )
+                for item in banco.consultar(**filtros):
+                    pagina = f" p.{item['pagina']}" if item["pagina"] else ""
+                    print(
+                        f"#{item['varredura']} {item['iniciada_em']}  {item['arquivo']}{pagina}"
+                        f" L{item['linha']}  {item['regra']} ({item['risco']})"
+                    )
+        except ValueError as e:
+            parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
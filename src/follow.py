@@ -0,0 +1,366 @@
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import time
+
+from src.archives import EXTENSOES_PACOTE
+from src.config import SEGUIR_BLOCO, SEGUIR_CHECKPOINT, SEGUIR_INTERVALO, SEGUIR_SAIDA
+from src.core import CARDS_DLP
+from src.detectors import Achado, mascarar_valor
+from src.event_store import expandir_registro
+from src.log_parser import LogParser
+
+# 👁️ Modo follow: logs vivos acompanhados como um "tail -F". A cada rodada só os
+# bytes acrescentados desde a última leitura passam pelo LogParser; rotação e
+# truncamento são detectados pelo inode/tamanho, os achados vão para um NDJSON
+# só de acréscimo e o checkpoint (offset + nº de linhas por arquivo) permite
+# retomar depois de um restart sem varrer de novo.
+
+ROTACIONADO = "rotacionado"
+TRUNCADO = "truncado"
+
+# Bytes do começo do arquivo guardados (só o hash) para reconhecer o mesmo conteúdo
+_BYTES_ASSINATURA = 256
+
+
+# Cards cujo valor é mascarado na linha (CPF, cartão, credenciais): no NDJSON o
+# "termo" também sai mascarado. IPs/hashes (IOCs) continuam visíveis, como na linha
+_CARDS_MASCARADOS = {
+    indice for indice, card in enumerate(CARDS_DLP) if card["id"] != "DLP:IOC"
+}
+
+
+def _mascarar_registro(registro):
+    # O NDJSON fica no disco para sempre: o valor cru nunca chega nele
+    numero_linha, pagina, linha_segura, alertas, *resto = registro
+    mascarados = []
+    for alerta in alertas:
+        id_alerta, valor = alerta[0], alerta[1]
+        if valor is not None and id_alerta in _CARDS_MASCARADOS:
+            tipo = CARDS_DLP[id_alerta]["tipos"][0]
+            valor = mascarar_valor(Achado(tipo, valor, alerta[2], alerta[3]))
+            alerta = (id_alerta, valor) + tuple(alerta[2:])
+        mascarados.append(alerta)
+    return (numero_linha, pagina, linha_segura, mascarados, *resto)
+
+
+def _contar_linhas(arquivo, ate, tamanho_bloco=SEGUIR_BLOCO):
+    # Linhas completas antes do offset 'ate' (começar do fim sem perder a numeração)
+    arquivo.seek(0)
+    total = 0
+    while ate > 0:
+        bloco = arquivo.read(min(tamanho_bloco, ate))
+        if not bloco:
+            break
+        total += bloco.count(b"\n")
+        ate -= len(bloco)
+    return total
+
+
+class ArquivoSeguido:
+    """
+    Um arquivo acompanhado: o handle aberto, o inode de quando foi aberto e
+    até onde já foi lido (offset do fim da última linha completa + nº de linhas).
+    A linha ainda sem quebra no fim fica para a próxima rodada.
+    """
+
+    def __init__(self, caminho, salvo=None):
+        self.caminho = caminho
+        self.dispositivo = None
+        self.inode = None
+        self.offset = 0
+        self.linhas = 0
+        self._arquivo = None
+        # Estado do checkpoint: só vale para o 1º arquivo aberto neste caminho
+        self._salvo = salvo or {}
+
+    @property
+    def aberto(self):
+        return self._arquivo is not None
+
+    def abrir(self, desde_o_fim=False):
+        """
+        Abre o arquivo do caminho (False se ainda não existe). Retoma do
+        checkpoint se é o mesmo arquivo (mesmo inode) e ele não encolheu;
+        senão começa do início (ou do fim, com desde_o_fim).
+        """
+        try:
+            self._arquivo = open(self.caminho, "rb")
+        except FileNotFoundError:
+            return False
+        info = os.fstat(self._arquivo.fileno())
+        self.dispositivo, self.inode = info.st_dev, info.st_ino
+
+        salvo, self._salvo = self._salvo, {}
+        mesmo_arquivo = (
+            (salvo.get("dispositivo"), salvo.get("inode")) == (self.dispositivo, self.inode)
+            and salvo.get("offset", 0) <= info.st_size
+            # Truncado e reescrito com o serviço parado: mesmo inode, começo diferente
+            and salvo.get("assinatura") == self._assinatura(salvo.get("offset", 0))
+        )
+        if mesmo_arquivo:
+            self.offset, self.linhas = salvo["offset"], salvo["linhas"]
+        elif desde_o_fim:
+            self.offset = info.st_size
+            self.linhas = _contar_linhas(self._arquivo, info.st_size)
+        else:
+            self.offset, self.linhas = 0, 0
+        return True
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def _assinatura(self, offset):
+        # Hash (nunca o conteúdo: pode ter dado sensível) do começo já lido do arquivo
+        self._arquivo.seek(0)
+        return hashlib.sha256(self._arquivo.read(min(offset, _BYTES_ASSINATURA))).hexdigest()[:16]
+
+    def estado(self):
+        return {
+            "dispositivo": self.dispositivo,
+            "inode": self.inode,
+            "offset": self.offset,
+            "linhas": self.linhas,
+            "assinatura": self._assinatura(self.offset),
+        }
+
+    def ler_linhas(self, limite, final=False):
+        """
+        Lê até 'limite' bytes a partir do offset e devolve as linhas completas
+        como (numero_linha, linha). Com final=True (arquivo que já foi
+        rotacionado) a linha sem quebra no fim também sai: ninguém mais escreve nela.
+        """
+        self._arquivo.seek(self.offset)
+        dados = self._arquivo.read(limite)
+        if len(dados) == limite and b"\n" not in dados:
+            # Linha maior que o bloco: vai inteira
+            dados += self._arquivo.readline()
+
+        fim = len(dados) if final else dados.rfind(b"\n") + 1
+        if not fim:
+            return []
+        partes = dados[:fim].split(b"\n")
+        if partes[-1] == b"":
+            partes.pop()
+
+        inicio = self.linhas + 1
+        self.offset += fim
+        self.linhas += len(partes)
+        return [
+            (numero_linha, parte.decode("utf-8", errors="ignore"))
+            for numero_linha, parte in enumerate(partes, inicio)
+        ]
+
+    def verificar(self):
+        """
+        ROTACIONADO se o caminho sumiu ou já é outro arquivo (logrotate com
+        'create', mv + novo arquivo), TRUNCADO se o mesmo arquivo encolheu
+        (logrotate com 'copytruncate', '> app.log'), ou None.
+        """
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return ROTACIONADO
+        if (info.st_dev, info.st_ino) != (self.dispositivo, self.inode):
+            return ROTACIONADO
+        if os.fstat(self._arquivo.fileno()).st_size < self.offset:
+            return TRUNCADO
+        return None
+
+
+class SaidaNDJSON:
+    """
+    📤 Destino dos achados: um evento JSON por linha, só acrescentando no fim.
+    sincronizar() vai até o disco antes de cada checkpoint: o offset salvo
+    nunca passa de um achado que ainda não foi gravado.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+        self._pendente = False
+
+    def escrever(self, evento):
+        self._arquivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        self._pendente = True
+
+    def sincronizar(self):
+        if self._pendente:
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+            self._pendente = False
+
+    def fechar(self):
+        self.sincronizar()
+        self._arquivo.close()
+
+
+class CheckpointSeguir:
+    """
+    📌 Checkpoint do modo follow: {caminho: {dispositivo, inode, offset, linhas,
+    assinatura}}.
+    Regravado por inteiro a cada rodada com novidade (arquivo temporário +
+    os.replace), então uma queda no meio deixa sempre o checkpoint anterior.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def carregar(self):
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def gravar(self, estados):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estados, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+
+
+class Seguidor:
+    """
+    Acompanha os arquivos que batem com os 'padroes' (caminhos ou globs,
+    reavaliados a cada rodada: arquivos novos entram sozinhos) e manda os
+    achados de cada linha nova para a 'saida' (SaidaNDJSON).
+    """
+
+    def __init__(self, padroes, saida, checkpoint, desde_o_fim=False, tamanho_bloco=SEGUIR_BLOCO):
+        self.padroes = padroes
+        self.saida = saida
+        self.checkpoint = checkpoint
+        self.desde_o_fim = desde_o_fim
+        self.tamanho_bloco = tamanho_bloco
+
+        self.parser = LogParser(compacto=True)
+        self.arquivos = {}
+        self.achados = 0
+        self._salvos = checkpoint.carregar()
+        self._primeira_rodada = True
+
+    def _expandir(self):
+        for padrao in self.padroes:
+            for caminho in sorted(glob.glob(padrao)) or [padrao]:
+                # Logs rotacionados e compactados (app.log.1.gz) não são mais escritos
+                if not caminho.lower().endswith(EXTENSOES_PACOTE):
+                    yield os.path.abspath(caminho)
+
+    def _publicar(self, arquivo, linhas):
+        for registro in self.parser.processar_linhas(linhas):
+            evento = expandir_registro(_mascarar_registro(registro))
+            evento["arquivo"] = arquivo.caminho
+            evento["detectado_em"] = datetime.datetime.now().isoformat(timespec="milliseconds")
+            self.saida.escrever(evento)
+            self.achados += 1
+
+    def _rodada_do_arquivo(self, arquivo):
+        # Devolve quantos bytes foram consumidos deste arquivo. "Do fim" só vale para
+        # o que já existia na partida: arquivo que aparece depois é lido desde o início
+        if not arquivo.aberto and not arquivo.abrir(self.desde_o_fim and self._primeira_rodada):
+            return 0
+        antes = arquivo.offset
+        self._publicar(arquivo, arquivo.ler_linhas(self.tamanho_bloco))
+        lidos = arquivo.offset - antes
+
+        situacao = arquivo.verificar()
+        if situacao == ROTACIONADO:
+            # O que o escritor gravou no arquivo antigo até a troca ainda é lido
+            while True:
+                linhas = arquivo.ler_linhas(self.tamanho_bloco, final=True)
+                if not linhas:
+                    break
+                self._publicar(arquivo, linhas)
+            arquivo.fechar()
+            # O arquivo novo (se já existe) começa do zero, nunca do fim
+            arquivo.abrir()
+            return lidos or 1
+        if situacao == TRUNCADO:
+            arquivo.offset, arquivo.linhas = 0, 0
+            return lidos or 1
+        return lidos
+
+    def rodada(self):
+        """
+        🔁 Uma passada por todos os arquivos: lê o que chegou (até um bloco
+        por arquivo), grava os achados e, se algo mudou, o checkpoint.
+        Devolve quantos bytes foram lidos (0 = nada novo).
+        """
+        for caminho in self._expandir():
+            if caminho not in self.arquivos:
+                self.arquivos[caminho] = ArquivoSeguido(caminho, self._salvos.get(caminho))
+
+        lidos = sum(self._rodada_do_arquivo(arquivo) for arquivo in self.arquivos.values())
+        self._primeira_rodada = False
+        if lidos:
+            self.saida.sincronizar()
+            self.checkpoint.gravar(
+                {caminho: arquivo.estado() for caminho, arquivo in self.arquivos.items() if arquivo.aberto}
+            )
+        return lidos
+
+    def seguir(self, intervalo=SEGUIR_INTERVALO, parar=None):
+        """
+        Roda até 'parar' (threading.Event) ser acionado ou Ctrl+C. Com dados
+        chegando, emenda uma rodada na outra; parado, espera 'intervalo'.
+        """
+        try:
+            while parar is None or not parar.is_set():
+                if not self.rodada():
+                    time.sleep(intervalo)
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        for arquivo in self.arquivos.values():
+            arquivo.fechar()
+        self.saida.fechar()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="👁️ Modo follow: acompanha logs vivos e grava os achados em NDJSON."
+    )
+    parser.add_argument("arquivos", nargs="+", help="caminhos ou globs (ex: '/var/log/app/*.log')")
+    parser.add_argument("--saida", default=SEGUIR_SAIDA, help="NDJSON dos achados (só acrescenta)")
+    parser.add_argument("--checkpoint", default=SEGUIR_CHECKPOINT, help="offsets salvos para retomar")
+    parser.add_argument(
+        "--intervalo", type=float, default=SEGUIR_INTERVALO, help="segundos entre as checagens"
+    )
+    parser.add_argument(
+        "--do-fim", action="store_true",
+        help="arquivos sem checkpoint começam do fim (só o que chegar daqui para frente)",
+    )
+    parser.add_argument(
+        "--uma-vez", action="store_true",
+        help="lê o que houver de novo e sai (ex: num cron), sem ficar esperando",
+    )
+    args = parser.parse_args(argumentos)
+
+    seguidor = Seguidor(
+        args.arquivos, SaidaNDJSON(args.saida), CheckpointSeguir(args.checkpoint), args.do_fim
+    )
+    if args.uma_vez:
+        while seguidor.rodada():
+            pass
+        seguidor.fechar()
+        print(f"👁️ {seguidor.achados} achado(s) gravado(s) em {args.saida}")
+        return
+
+    print(f"👁️ Acompanhando {', '.join(args.arquivos)} → {args.saida} (Ctrl+C para sair)")
+    try:
+        seguidor.seguir(args.intervalo)
+    except KeyboardInterrupt:
+        print(f"\n👋 Follow encerrado: {seguidor.achados} achado(s) gravado(s).")
+
+
+if __name__ == "__main__":
+    main()
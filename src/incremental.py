@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from src.config import INDICE_DIR, TAMANHO_BLOCO_LEITURA
+from src.core import (
+    IMPRESSAO_DLP,
+    buscar_regras,
+    montar_card_dlp,
+    montar_motor,
+    obter_regras,
+    posicoes_dlp,
+)
+from src.detectors import sanitizar_log_str, varrer_texto
+from src.event_store import montar_evento
+from src.utils import normalizar_texto, ler_blocos_de_texto, iterar_linhas_rotuladas
+
+# Formato do índice: os cards DLP viraram posições na linha (o valor não é mais gravado)
+FORMATO_INDICE = 2
+
+
+class IndiceIncremental:
+    """
+    🔁 Re-varredura Incremental
+    Guarda um índice de resultados por documento: para cada linha (chave = hash
+    do conteúdo) ficam o texto mascarado, a posição de cada card DLP na linha
+    (nunca o valor: o card é remontado da própria linha relida) e os IDs das
+    regras do glossário/gatilhos que bateram, junto com a versão de cada regra.
+    A pasta dos índices é só do dono (0700).
+    Na varredura seguinte:
+      - linha inédita (página nova ou alterada) -> análise completa;
+      - linha já conhecida -> só as regras novas/alteradas rodam, as removidas saem.
+    """
+
+    def __init__(self, diretorio=INDICE_DIR):
+        self.diretorio = diretorio
+        self.estatisticas = {}
+
+    def _caminho(self, documento):
+        nome = hashlib.sha256(documento.encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"{nome}.json")
+
+    def _carregar(self, documento):
+        try:
+            with open(self._caminho(documento), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _salvar(self, documento, dados):
+        os.makedirs(self.diretorio, mode=0o700, exist_ok=True)
+        os.chmod(self.diretorio, 0o700)
+
+        # Escrita atômica: uma varredura interrompida não corrompe o índice antigo
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(temporario, self._caminho(documento))
+
+    def _processar(self, documento, linhas):
+        anterior = self._carregar(documento)
+        regras = obter_regras()
+
+        # Caçadores DLP (ou o formato do índice) mudaram? Então nada do que foi guardado serve
+        linhas_antigas = {}
+        if anterior.get("dlp") == IMPRESSAO_DLP and anterior.get("formato") == FORMATO_INDICE:
+            linhas_antigas = anterior.get("linhas", {})
+
+        versoes_antigas = anterior.get("regras", {})
+        versoes = {regra["id"]: regra["impressao"] for regra in regras}
+        posicao = {regra["id"]: i for i, regra in enumerate(regras)}
+
+        # Só as regras novas ou alteradas precisam rodar nas linhas já conhecidas
+        estaveis = {rid for rid, imp in versoes.items() if versoes_antigas.get(rid) == imp}
+        delta = [regra for regra in regras if regra["id"] not in estaveis]
+        motor_delta = montar_motor(delta) if delta else None
+
+        linhas_atuais = {}
+        analisadas = reaproveitadas = 0
+
+        for numero_linha, linha, pagina in linhas:
+            linha = linha.strip()
+            if not linha:
+                continue
+
+            chave = hashlib.sha256(linha.encode("utf-8")).hexdigest()
+            registro = linhas_atuais.get(chave)
+
+            if registro is not None:
+                # Linha repetida no mesmo documento: já está atualizada
+                reaproveitadas += 1
+            elif chave in linhas_antigas:
+                registro = linhas_antigas[chave]
+                ids = [rid for rid in registro["regras"] if rid in estaveis]
+                if motor_delta:
+                    encontradas = motor_delta.buscar(normalizar_texto(linha))
+                    ids += [delta[i]["id"] for i in encontradas]
+                    ids.sort(key=posicao.get)
+                registro = dict(registro, regras=ids)
+                reaproveitadas += 1
+            else:
+                # Linha inédita: análise completa (mesmo caminho do LogParser)
+                achados = varrer_texto(linha)
+                registro = {
+                    "dlp": posicoes_dlp(achados),
+                    "regras": [regras[i]["id"] for i in buscar_regras(normalizar_texto(linha))],
+                }
+                linha_segura = sanitizar_log_str(linha, achados)
+                if linha_segura != linha:
+                    registro["texto"] = linha_segura
+                analisadas += 1
+
+            linhas_atuais[chave] = registro
+
+            alertas = [montar_card_dlp(indice, linha[inicio:fim]) for indice, inicio, fim in registro["dlp"]]
+            alertas += [dict(regras[posicao[rid]]["modelo"]) for rid in registro["regras"]]
+            yield montar_evento(numero_linha, registro.get("texto", linha), alertas, pagina)
+
+        # Só grava quando o documento foi lido até o fim
+        self._salvar(
+            documento,
+            {"formato": FORMATO_INDICE, "dlp": IMPRESSAO_DLP, "regras": versoes, "linhas": linhas_atuais},
+        )
+        self.estatisticas = {
+            "linhas_analisadas": analisadas,
+            "linhas_reaproveitadas": reaproveitadas,
+            "regras_reaplicadas": len(delta) if linhas_antigas else len(regras),
+        }
+
+    def processar_paginas(self, documento, paginas):
+        """
+        Mesmos eventos do LogParser.processar_paginas, reaproveitando o índice
+        guardado do 'documento' (ex: caminho do PDF).
+        """
+        # Mesma montagem do extrair_texto: páginas vazias não entram
+        blocos = ((pagina, texto + "\n") for pagina, texto in paginas if texto)
+
+        yield from self._processar(documento, iterar_linhas_rotuladas(blocos))
+
+    def processar_arquivo(self, documento, origem, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+        """
+        Mesmos eventos do LogParser.processar_arquivo, reaproveitando o índice.
+        """
+        blocos = ((None, bloco) for bloco in ler_blocos_de_texto(origem, tamanho_bloco))
+
+        yield from self._processar(documento, iterar_linhas_rotuladas(blocos))
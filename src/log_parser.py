@@ -1,11 +1,247 @@
-from src.detectors import sanitizar_log_str
-from src.core import analisar_frase_juridica
-from src.utils import tratar_quebras_de_linha
+import os
+from collections import deque
+from itertools import islice
+
+from src import metrics
+from src.archives import (
+    ACESSO_DIRETO,
+    abrir_membro,
+    detectar_formato,
+    iterar_membros,
+    listar_membros,
+)
+from src.detectors import (
+    sanitizar_log_str,
+    varrer_texto,
+    varrer_textos_em_lote,
+    pode_conter_achado,
+)
+from src.core import (
+    analisar_frase_juridica,
+    analisar_frase_compacta,
+    iniciais_das_regras,
+    montar_alerta,
+    pode_acionar_regra,
+)
+from src.event_store import ArmazemEventos, montar_evento
+from src.config import TAMANHO_BLOCO_LEITURA, TAMANHO_JANELA_MAPEADA, TAMANHO_LOTE_PADRAO
+from src.mapped_scan import janelas_candidatas, mapear, pode_varrer_em_bytes
+from src.structured import AnalisadorEstruturado, detectar_estruturado, primeira_linha
+from src.utils import (
+    normalizar_texto,
+    tratar_quebras_de_linha,
+    ler_blocos_de_texto,
+    iterar_linhas_fisicas,
+    iterar_linhas_rotuladas,
+)
+
+
+def _agrupar_em_lotes(linhas, tamanho_lote):
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def _processar_lote(lote, compacto=False, medir=False):
+    """
+    Executado dentro de um processo do pool: analisa um lote de
+    (numero_linha, linha, pagina) e devolve os eventos (na mesma ordem),
+    quantas linhas o pré-filtro pulou e as métricas do lote (se medir=True).
+    """
+    if medir:
+        metrics.ativar()
+        metrics.zerar()
+
+    parser = LogParser(compacto=compacto)
+    eventos = parser._processar_em_lote(lote)
+    return eventos, parser.linhas_ignoradas, metrics.exportar() if medir else None
+
+
+def _processar_membro(caminho, formato, posicao, compacto=False, medir=False):
+    """
+    Executado num processo do pool: varre um membro do pacote (aberto ali mesmo,
+    direto do arquivo) e devolve os registros (None se o membro foi pulado),
+    as linhas lidas e ignoradas e as métricas (se medir=True).
+    """
+    if medir:
+        metrics.ativar()
+        metrics.zerar()
+
+    parser = LogParser(compacto=compacto)
+    with abrir_membro(caminho, formato, posicao) as fluxo:
+        registros = None if fluxo is None else list(parser.processar_arquivo(fluxo))
+    retrato = metrics.exportar() if medir else None
+    return registros, parser.linhas_lidas, parser.linhas_ignoradas, retrato
 
 
 class LogParser:
-    def __init__(self):
-        self.eventos = []
+    def __init__(self, workers=1, tamanho_lote=TAMANHO_LOTE_PADRAO, compacto=False):
+        # workers > 1 liga o modo paralelo (um processo por núcleo, fora do GIL)
+        self.workers = workers
+        self.tamanho_lote = tamanho_lote
+        # Linhas que o pré-filtro dispensou da análise completa
+        self.linhas_ignoradas = 0
+        # Linhas já lidas da origem (progresso, atualizado lote a lote)
+        self.linhas_lidas = 0
+        # Bytes já varridos pelo processar_mapeado (progresso sem stream)
+        self.bytes_lidos = 0
+        # Membros de pacotes pulados (PDF, pacote dentro de pacote, cifrado...)
+        self.membros_ignorados = []
+
+        # 🗜️ Modo compacto: só as linhas com achados, guardadas em colunas
+        # (ArmazemEventos) em vez de um dict por linha
+        self.compacto = compacto
+        if compacto:
+            self.eventos = ArmazemEventos()
+            self._processar = self._processar_linha_compacta
+        else:
+            self.eventos = []
+            self._processar = self._processar_linha
+
+    def _linha_limpa(self, linha):
+        """
+        🚦 Pré-filtro: uma regex de "âncoras" DLP + as palavras iniciais do glossário.
+        Se nada disso aparece, nenhum caçador nem regra pode bater na linha.
+        """
+        if pode_conter_achado(linha) or pode_acionar_regra(normalizar_texto(linha)):
+            return False
+
+        self.linhas_ignoradas += 1
+        metrics.contar("linhas_ignoradas")
+        return True
+
+    def _processar_linha(self, numero_linha, linha, pagina=None, achados=None):
+        """
+        Roda o motor DLP numa única linha e devolve o evento padronizado
+        (ou None se a linha estiver vazia). Com 'achados' (varredura feita
+        em lote), a linha já chega sem espaços nas pontas e pelo pré-filtro.
+        """
+        if achados is None:
+            linha = linha.strip()
+
+            # Pula linhas vazias para economizar processamento
+            if not linha:
+                return None
+
+            # Linha limpa: mesmo evento da análise completa, sem rodar os caçadores
+            if self._linha_limpa(linha):
+                return montar_evento(numero_linha, linha, [], pagina)
+
+            # Uma única varredura DLP, compartilhada pela análise e pela máscara
+            achados = varrer_texto(linha)
+
+        # Envia a linha isolada para o motor DLP
+        alertas_encontrados = analisar_frase_juridica(linha, achados)
+
+        # 🛡️ SANITIZAÇÃO DO LOG: Limpa o texto antes de salvar no relatório
+        with metrics.medir("detectores.sanitizacao"):
+            linha_segura = sanitizar_log_str(linha, achados)
+
+        # Estrutura o evento padronizado
+        return montar_evento(numero_linha, linha_segura, alertas_encontrados, pagina)
+
+    def _processar_linha_compacta(self, numero_linha, linha, pagina=None, achados=None):
+        """
+        Versão compacta do _processar_linha: devolve o registro
+        (numero_linha, pagina, linha_segura, alertas) para o ArmazemEventos,
+        ou None se a linha estiver vazia ou limpa (nada a guardar).
+        """
+        if achados is None:
+            linha = linha.strip()
+            if not linha or self._linha_limpa(linha):
+                return None
+            achados = varrer_texto(linha)
+
+        alertas = analisar_frase_compacta(linha, achados)
+        if not alertas:
+            return None
+
+        with metrics.medir("detectores.sanitizacao"):
+            linha_segura = sanitizar_log_str(linha, achados)
+        return (numero_linha, pagina, linha_segura, alertas)
+
+    def _processar_em_lote(self, lote):
+        """
+        Analisa um lote de (numero_linha, linha, pagina) de uma vez: o pré-filtro
+        separa as linhas limpas e as suspeitas passam juntas pela varredura DLP
+        em lote (CPF e Luhn validados numa passada só). Eventos em ordem.
+        """
+        linhas = []
+        suspeitas = []
+        with metrics.medir("log.pre_filtro"):
+            for numero_linha, linha, pagina in lote:
+                linha = linha.strip()
+
+                # Pula linhas vazias para economizar processamento
+                if not linha:
+                    continue
+
+                limpa = self._linha_limpa(linha)
+                linhas.append((numero_linha, linha, pagina, limpa))
+                if not limpa:
+                    suspeitas.append(linha)
+
+        if metrics.ATIVO:
+            metrics.contar("linhas", len(linhas))
+            metrics.contar("bytes", sum(len(item[1].encode("utf-8")) for item in linhas))
+
+        achados_por_linha = iter(varrer_textos_em_lote(suspeitas))
+
+        eventos = []
+        with metrics.medir("log.analise"):
+            for numero_linha, linha, pagina, limpa in linhas:
+                if limpa:
+                    # Linha limpa: mesmo evento da análise completa, sem rodar os caçadores
+                    if not self.compacto:
+                        eventos.append(montar_evento(numero_linha, linha, [], pagina))
+                    continue
+
+                evento = self._processar(numero_linha, linha, pagina, next(achados_por_linha))
+                if evento:
+                    eventos.append(evento)
+
+        return eventos
+
+    def _analisar_linhas(self, linhas):
+        """
+        Recebe (numero_linha, linha, pagina) e devolve os eventos na ordem
+        original, lote a lote: em série ou espalhando os lotes por um pool de processos.
+        """
+        if self.workers <= 1:
+            for lote in _agrupar_em_lotes(linhas, self.tamanho_lote):
+                self.linhas_lidas += len(lote)
+                yield from self._processar_em_lote(lote)
+            return
+
+        # Importado só aqui: o modo em série não paga o import do multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pendentes = deque()
+            for lote in _agrupar_em_lotes(linhas, self.tamanho_lote):
+                self.linhas_lidas += len(lote)
+                pendentes.append(
+                    pool.submit(_processar_lote, lote, self.compacto, metrics.ATIVO)
+                )
+
+                # Limita os lotes em voo para a memória não crescer com o arquivo
+                if len(pendentes) >= self.workers * 2:
+                    yield from self._coletar(pendentes.popleft())
+
+            # Resultados saem na ordem de envio = ordem original das linhas
+            while pendentes:
+                yield from self._coletar(pendentes.popleft())
+
+    def _coletar(self, tarefa):
+        eventos, ignoradas, retrato = tarefa.result()
+        self.linhas_ignoradas += ignoradas
+        # Métricas medidas dentro do worker voltam para o processo principal
+        if retrato:
+            metrics.somar(retrato)
+        return eventos
 
     def processar_texto(self, texto_bruto):
         """
@@ -17,28 +253,231 @@ class LogParser:
         linhas = texto_limpo.split("\n")
 
         # Itera guardando o número da linha para rastreabilidade
-        for numero_linha, linha in enumerate(linhas, start=1):
+        numeradas = (
+            (numero_linha, linha, None)
+            for numero_linha, linha in enumerate(linhas, start=1)
+        )
+        self.eventos.extend(self._analisar_linhas(numeradas))
 
-            linha = linha.strip()
+        return self.eventos
 
-            # Pula linhas vazias para economizar processamento
+    def processar_arquivo(self, origem, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+        """
+        🌊 Versão em fluxo do processar_texto, para arquivos de qualquer tamanho.
+        Aceita um caminho ou stream (binário ou texto), lê em blocos e devolve
+        os eventos um a um (gerador), sem acumular nada em self.eventos.
+        No modo compacto devolve registros para o ArmazemEventos.extend.
+        """
+        blocos = ((None, bloco) for bloco in ler_blocos_de_texto(origem, tamanho_bloco))
+
+        yield from self._analisar_linhas(iterar_linhas_rotuladas(blocos))
+
+    def processar_linhas(self, linhas):
+        """
+        Recebe (numero_linha, linha) já separadas e numeradas por quem chamou
+        (ex: o modo follow, que só lê o que foi acrescentado ao arquivo) e
+        devolve os eventos/registros. Sem junção de hifenização: linha física = linha.
+        """
+        yield from self._analisar_linhas(
+            (numero_linha, linha, None) for numero_linha, linha in linhas
+        )
+
+    def processar_mapeado(self, origem, tamanho_janela=TAMANHO_JANELA_MAPEADA):
+        """
+        🗺️ Mesmos registros do processar_arquivo (modo compacto) para logs em
+        texto puro, sem decodificar o arquivo: a origem (caminho, arquivo binário
+        ou BytesIO) é mapeada em memória, as âncoras são procuradas direto nos
+        bytes e só as linhas candidatas viram texto e passam pela análise.
+        Nº da linha = linha física do arquivo. Quando as linhas físicas podem não
+        ser as do parser ('\\r', hifenização) ou fora do modo compacto (que
+        precisa de todas as linhas), cai no processar_arquivo.
+        """
+        with mapear(origem) as buffer:
+            iniciais = iniciais_das_regras()
+            mapeavel = (
+                self.compacto
+                and buffer is not None
+                and iniciais is not None
+                and pode_varrer_em_bytes(buffer)
+            )
+            if mapeavel:
+                yield from self._analisar_linhas(
+                    self._linhas_mapeadas(buffer, iniciais, tamanho_janela)
+                )
+                return
+
+        yield from self.processar_arquivo(origem)
+
+    def _linhas_mapeadas(self, buffer, iniciais, tamanho_janela):
+        for bytes_lidos, total, dispensadas, candidatas in janelas_candidatas(
+            buffer, iniciais, tamanho_janela
+        ):
+            # Linhas dispensadas nos bytes contam como as que o pré-filtro pula
+            # (as candidatas entram no linhas_lidas lote a lote, no _analisar_linhas)
+            self.linhas_ignoradas += dispensadas
+            self.linhas_lidas += total - len(candidatas)
+            self.bytes_lidos = bytes_lidos
+            metrics.contar("linhas_ignoradas", dispensadas)
+            yield from candidatas
+
+    def processar_log(self, origem, nome=None):
+        """
+        Ponto de entrada para logs (caminho, arquivo binário ou BytesIO):
+        compactados e pacotes vão para o processar_pacote, logs estruturados
+        (JSON lines, syslog RFC 5424, CSV) para o processar_estruturado e texto
+        puro para o processar_mapeado. O formato vem do conteúdo; só o CSV
+        depende da extensão do 'nome' (ou do caminho).
+        """
+        formato = detectar_formato(origem)
+        if formato:
+            return self.processar_pacote(origem, formato)
+        estruturado = detectar_estruturado(origem, nome)
+        if estruturado:
+            return self.processar_estruturado(origem, estruturado)
+        return self.processar_mapeado(origem)
+
+    def processar_estruturado(self, origem, formato, tamanho_janela=TAMANHO_JANELA_MAPEADA):
+        """
+        🧾 Logs estruturados ("jsonl", "syslog" ou "csv"): cada registro é lido
+        em campos uma vez só e cada detector roda só nos campos que o perfil do
+        formato manda (structured.PERFIS); os alertas levam o caminho do campo
+        como 5º item (no evento, alerta["campo"]). Linha que não é registro do
+        formato passa pela análise em texto livre de sempre. Com o pré-filtro
+        valendo (modo compacto), só as linhas candidatas da varredura em bytes
+        chegam a ser lidas em campos.
+        """
+        analisador = AnalisadorEstruturado(formato)
+        if analisador.precisa_cabecalho:
+            cabecalho = primeira_linha(origem)
+            if cabecalho:
+                analisador.ler_cabecalho(*cabecalho)
+
+        with mapear(origem) as buffer:
+            iniciais = iniciais_das_regras()
+            mapeavel = (
+                self.compacto
+                and analisador.leitor.pre_filtro_seguro
+                and buffer is not None
+                and iniciais is not None
+                and pode_varrer_em_bytes(buffer)
+            )
+            if mapeavel:
+                yield from self._analisar_registros(
+                    analisador, self._linhas_mapeadas(buffer, iniciais, tamanho_janela)
+                )
+                return
+
+        blocos = ler_blocos_de_texto(origem, TAMANHO_BLOCO_LEITURA)
+        yield from self._analisar_registros(analisador, iterar_linhas_fisicas(blocos))
+
+    def _analisar_registros(self, analisador, linhas):
+        for numero_linha, linha, _ in linhas:
+            self.linhas_lidas += 1
+            linha = linha.strip()
             if not linha:
                 continue
+            if analisador.precisa_cabecalho:
+                # Stream de texto: o cabeçalho do CSV só aparece aqui, na 1ª linha
+                analisador.ler_cabecalho(numero_linha, linha)
 
-            # Envia a linha isolada para o motor DLP
-            alertas_encontrados = analisar_frase_juridica(linha)
+            # Cabeçalho do CSV e linhas limpas: nada a analisar
+            pular = numero_linha <= analisador.leitor.linha_cabecalho or (
+                analisador.leitor.pre_filtro_seguro and self._linha_limpa(linha)
+            )
+            if pular:
+                if not self.compacto:
+                    yield montar_evento(numero_linha, linha, [])
+                continue
 
-            # 🛡️ SANITIZAÇÃO DO LOG: Limpa o texto antes de salvar no relatório
-            linha_segura = sanitizar_log_str(linha)
+            with metrics.medir("log.estruturado"):
+                resultado = analisador.analisar(linha)
+            if resultado is None:
+                # Não é um registro do formato: análise em texto livre
+                evento = self._processar(numero_linha, linha)
+            elif self.compacto:
+                linha_segura, alertas = resultado
+                evento = (numero_linha, None, linha_segura, alertas) if alertas else None
+            else:
+                linha_segura, alertas = resultado
+                evento = montar_evento(
+                    numero_linha,
+                    linha_segura,
+                    [montar_alerta(id_alerta, valor, campo) for id_alerta, valor, _, _, campo in alertas],
+                )
+            if evento:
+                yield evento
 
-            # Estrutura o evento padronizado
-            evento = {
-                "tipo": "REGISTRO_LOG",
-                "linha_origem": numero_linha,
-                "texto": linha_segura,
-                "alertas": alertas_encontrados,
-            }
+    def processar_pacote(self, origem, formato):
+        """
+        📦 Logs compactados (gz/bz2/xz) e pacotes (tar, tar.gz..., zip)
+        descompactados em fluxo direto para as linhas: nada é expandido no
+        disco nem fica inteiro na memória. Nos pacotes, cada evento ganha o
+        campo "membro" (no modo compacto, o registro ganha o nome do membro
+        como 5º item). Pacote em disco com acesso direto (zip, tar sem
+        compressão) + workers > 1 + modo compacto: um membro por processo.
+        """
+        paralelo = (
+            self.workers > 1
+            and self.compacto
+            and formato in ACESSO_DIRETO
+            and isinstance(origem, (str, os.PathLike))
+        )
+        if paralelo:
+            yield from self._processar_membros_em_paralelo(origem, formato)
+            return
 
-            self.eventos.append(evento)
+        for membro, fluxo in iterar_membros(origem, formato, self.membros_ignorados):
+            for registro in self.processar_arquivo(fluxo):
+                yield self._com_membro(registro, membro)
 
-        return self.eventos
+    def _processar_membros_em_paralelo(self, caminho, formato):
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pendentes = deque()
+            for posicao, membro in listar_membros(caminho, formato):
+                tarefa = pool.submit(
+                    _processar_membro, caminho, formato, posicao, self.compacto, metrics.ATIVO
+                )
+                pendentes.append((membro, tarefa))
+
+                # Mesmo limite de voo do _analisar_linhas; a saída segue a ordem do pacote
+                if len(pendentes) >= self.workers * 2:
+                    yield from self._coletar_membro(*pendentes.popleft())
+
+            while pendentes:
+                yield from self._coletar_membro(*pendentes.popleft())
+
+    def _coletar_membro(self, membro, tarefa):
+        registros, lidas, ignoradas, retrato = tarefa.result()
+        if registros is None:
+            self.membros_ignorados.append(membro)
+            return
+        self.linhas_lidas += lidas
+        self.linhas_ignoradas += ignoradas
+        if retrato:
+            metrics.somar(retrato)
+        for registro in registros:
+            yield self._com_membro(registro, membro)
+
+    def _com_membro(self, registro, membro):
+        # Log compactado avulso não tem membro: registro/evento sai como veio
+        if membro is None:
+            return registro
+        if self.compacto:
+            return registro + (membro,)
+        registro["membro"] = membro
+        return registro
+
+    def processar_paginas(self, paginas):
+        """
+        📄 Versão em fluxo para PDFs: recebe (numero_pagina, texto) do
+        LeitorPDF.iterar_paginas e devolve os eventos assim que cada página
+        chega, com a mesma numeração de linhas do texto extraído inteiro
+        e a página de origem em cada evento.
+        No modo compacto devolve registros para o ArmazemEventos.extend.
+        """
+        # Mesma montagem do extrair_texto: páginas vazias não entram
+        blocos = ((pagina, texto + "\n") for pagina, texto in paginas if texto)
+
+        yield from self._analisar_linhas(iterar_linhas_rotuladas(blocos))
@@ -0,0 +1,221 @@
+import io
+import mmap
+import os
+import re
+import string
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import accumulate
+
+from src.detectors import _CHAVES_SENHA
+from src.utils import normalizar_texto
+
+# 🗺️ Varredura em bytes de logs em texto puro: as mesmas âncoras do pré-filtro
+# (detectors.pode_conter_achado + palavras iniciais do glossário) procuradas com
+# find() direto nos bytes, sem decodificar o arquivo. Cada janela vira "mapas de
+# classes" (bytes.translate, em C) onde as âncoras são literais fixos; só as linhas
+# candidatas são decodificadas e seguem para a análise completa de sempre.
+
+
+def _traducao(classe_do_byte):
+    # Tabela do bytes.translate: cada um dos 256 bytes vira a classe devolvida
+    return bytes(classe_do_byte(byte) for byte in range(256))
+
+
+def _classe(byte):
+    caractere = chr(byte)
+    # Fora do ASCII (ou separador que o str.strip()/\s tratam como espaço): sempre candidata
+    if byte >= 0x80 or 0x1C <= byte <= 0x1F:
+        return ord("~")
+    if caractere in string.digits:
+        return ord("0")
+    if caractere in ".\n":
+        return byte
+    # Separadores aceitos entre os blocos de um cartão ([-\s])
+    if caractere in "- \t\x0b\x0c":
+        return ord("-")
+    return ord("x")
+
+
+# Dígitos: "d.d" (IP/CPF), 6 dígitos seguidos (CPF/cartão) ou "dddd-dddd" (cartão)
+_CLASSES = _traducao(_classe)
+_AGULHAS_CLASSES = (b"0.0", b"000000", b"0000-0000", b"~")
+
+# Hashes: 32 hexadecimais seguidos
+_HEXADECIMAIS = _traducao(lambda byte: ord("h") if chr(byte) in string.hexdigits else ord("."))
+_AGULHA_HASH = b"h" * 32
+
+# Texto como o normalizar_texto deixa (minúsculo e sem pontuação ASCII): glossário e senhas
+_MINUSCULAS = _traducao(lambda byte: ord(chr(byte).lower()) if byte < 0x80 else byte)
+_PONTUACAO = bytes(byte for byte in range(0x80) if not normalizar_texto(chr(byte)))
+_CHAVES = tuple(chave.encode() for chave in _CHAVES_SENHA)
+
+# Espaços que o strip() tira de uma linha ASCII (linhas com \x1c-\x1f já são candidatas)
+_ESPACOS = b" \t\x0b\x0c"
+
+# Trecho da checagem do pode_varrer_em_bytes (liberado do RSS logo depois)
+_TRECHO_CHECAGEM = 4 * 1024 * 1024
+
+# Quebras que o parser não enxerga como linhas físicas (ver pode_varrer_em_bytes)
+_RE_RETORNO = re.compile(rb"\r")
+_RE_HIFEN_NO_FIM = re.compile(rb"-\n")
+_BYTES_DE_PALAVRA = frozenset((string.ascii_letters + string.digits + "_").encode()) | frozenset(
+    range(0x80, 0x100)
+)
+
+
+@contextmanager
+def mapear(origem):
+    """
+    Buffer (memoryview) com o conteúdo de um caminho, arquivo binário ou BytesIO,
+    sem copiar nada: arquivos são mapeados em memória (mmap) e o BytesIO é
+    emprestado. None se a origem não puder ser mapeada (stream de texto, pipe...).
+    """
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, "rb") as f, mapear(f) as buffer:
+            yield buffer
+        return
+
+    if isinstance(origem, io.BytesIO):
+        buffer = origem.getbuffer()
+        try:
+            yield buffer
+        finally:
+            buffer.release()
+        return
+
+    try:
+        descritor = origem.fileno()
+        tamanho = os.fstat(descritor).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        yield None
+        return
+
+    # Arquivo vazio não pode ser mapeado (e não tem nada a varrer)
+    if not tamanho:
+        yield memoryview(b"")
+        return
+
+    mapa = mmap.mmap(descritor, 0, access=mmap.ACCESS_READ)
+    if hasattr(mapa, "madvise"):
+        # Leitura de ponta a ponta: o kernel lê adiante e descarta o que já passou
+        mapa.madvise(mmap.MADV_SEQUENTIAL)
+    buffer = memoryview(mapa)
+    try:
+        yield buffer
+    finally:
+        buffer.release()
+        mapa.close()
+
+
+def pode_varrer_em_bytes(buffer):
+    """
+    False se as linhas físicas do buffer podem não ser as linhas do parser:
+    '\\r' (a leitura em texto converte as quebras universais) ou "palavra-"
+    no fim da linha (a junção de hifenização cola a linha na próxima).
+    """
+    liberado = 0
+    for inicio in range(0, len(buffer), _TRECHO_CHECAGEM):
+        # +1: um "-\n" pode cair bem na divisa entre dois trechos
+        fim = min(inicio + _TRECHO_CHECAGEM + 1, len(buffer))
+        if _RE_RETORNO.search(buffer, inicio, fim):
+            return False
+        for hifen in _RE_HIFEN_NO_FIM.finditer(buffer, inicio, fim):
+            if hifen.start() and buffer[hifen.start() - 1] in _BYTES_DE_PALAVRA:
+                return False
+        liberado = _liberar(buffer, liberado, fim)
+    return True
+
+
+def _dividir(texto):
+    # Linhas da janela (a quebra final não abre uma linha nova)
+    linhas = texto.split(b"\n")
+    if texto.endswith(b"\n"):
+        linhas.pop()
+    return linhas
+
+
+def _limites(linhas):
+    # Índice de quebras: limites[i] = offset onde começa a linha i+1
+    return [soma + indice for indice, soma in enumerate(accumulate(map(len, linhas)), 1)]
+
+
+def _marcar_linhas(texto, agulha, limites, candidatas):
+    # Uma busca por linha: achou a agulha, marca a linha e pula para a próxima
+    posicao = texto.find(agulha)
+    while posicao != -1:
+        indice = bisect_right(limites, posicao)
+        candidatas.add(indice)
+        posicao = texto.find(agulha, limites[indice])
+
+
+def _proxima_janela(buffer, inicio, tamanho_janela):
+    # Janela de linhas inteiras: corta na última quebra (linha enorme alarga a janela)
+    fim = inicio
+    while True:
+        fim = min(fim + tamanho_janela, len(buffer))
+        janela = buffer[inicio:fim].tobytes()
+        if fim == len(buffer):
+            return janela
+        corte = janela.rfind(b"\n")
+        if corte != -1:
+            return janela[: corte + 1]
+
+
+def _liberar(buffer, inicio, fim):
+    # Páginas já varridas saem do RSS (mapeamento só de leitura: relê do cache se preciso)
+    mapa = buffer.obj
+    if not isinstance(mapa, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return inicio
+    fim -= fim % mmap.PAGESIZE
+    if fim > inicio:
+        mapa.madvise(mmap.MADV_DONTNEED, inicio, fim - inicio)
+    return max(inicio, fim)
+
+
+def janelas_candidatas(buffer, iniciais, tamanho_janela):
+    """
+    ⚡ Percorre o buffer em janelas de linhas inteiras e devolve, por janela,
+    (bytes_lidos, total_linhas, linhas_dispensadas, candidatas), onde candidatas são os
+    (numero_linha, linha, None) que podem ter achado, já decodificados.
+    As dispensadas (não vazias e sem nenhuma âncora) não precisam de análise:
+    o pré-filtro do LogParser também as pularia.
+    'iniciais' são as palavras iniciais do glossário (core.iniciais_das_regras).
+    """
+    agulhas_texto = [palavra.encode() for palavra in sorted(iniciais) if palavra.isascii()]
+    agulhas_texto.extend(_CHAVES)
+
+    inicio = 0
+    liberado = 0
+    numero_base = 0
+    while inicio < len(buffer):
+        janela = _proxima_janela(buffer, inicio, tamanho_janela)
+        inicio += len(janela)
+        liberado = _liberar(buffer, liberado, inicio)
+
+        linhas = _dividir(janela)
+        limites = _limites(linhas)
+        candidatas = set()
+
+        _marcar_linhas(janela, b"AKIA", limites, candidatas)
+        classes = janela.translate(_CLASSES)
+        for agulha in _AGULHAS_CLASSES:
+            _marcar_linhas(classes, agulha, limites, candidatas)
+        del classes
+        _marcar_linhas(janela.translate(_HEXADECIMAIS), _AGULHA_HASH, limites, candidatas)
+
+        # Sem a pontuação os offsets mudam, mas o nº de quebras (e de linhas) não
+        minusculas = janela.translate(_MINUSCULAS, _PONTUACAO)
+        limites_minusculas = _limites(_dividir(minusculas))
+        for agulha in agulhas_texto:
+            _marcar_linhas(minusculas, agulha, limites_minusculas, candidatas)
+        del minusculas
+
+        # Candidatas nunca são só espaços (têm alguma âncora): o resto não vazio é dispensado
+        vazias = _dividir(janela.translate(None, _ESPACOS)).count(b"")
+        dispensadas = len(linhas) - vazias - len(candidatas)
+        yield inicio, len(linhas), dispensadas, [
+            (numero_base + indice + 1, linhas[indice].decode("utf-8", errors="ignore"), None)
+            for indice in sorted(candidatas)
+        ]
+        numero_base += len(linhas)
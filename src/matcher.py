@@ -0,0 +1,76 @@
+import re
+from src.utils import normalizar_texto
+
+
+class MotorDeBusca:
+    """
+    ⚡ Motor de Busca Pré-Compilado (Glossário + Gatilhos)
+    Normaliza todos os padrões uma única vez e indexa pela palavra inicial,
+    para que o custo por linha não cresça com o tamanho do glossário.
+    """
+
+    def __init__(self, padroes_por_regra):
+        # Cada regra é uma lista de padrões (sinônimos). Basta um bater.
+        self.total_regras = len(padroes_por_regra)
+
+        # Padrões de uma palavra só: busca direta no conjunto de palavras da frase
+        self._palavras = {}
+        # Padrões compostos ("renovação automática"): regex só se a 1ª palavra aparecer
+        self._compostos = {}
+        # Padrões atípicos (vazios ou com espaço na ponta): regex em toda frase
+        self._avulsos = []
+
+        for regra, padroes in enumerate(padroes_por_regra):
+            for padrao in padroes:
+                padrao_norm = normalizar_texto(padrao)
+                regex = re.compile(r"\b" + re.escape(padrao_norm) + r"\b")
+                palavras = padrao_norm.split()
+
+                if len(palavras) == 1 and palavras[0] == padrao_norm:
+                    self._palavras.setdefault(padrao_norm, set()).add(regra)
+                elif palavras and padrao_norm.startswith(palavras[0]):
+                    self._compostos.setdefault(palavras[0], []).append((regex, regra))
+                else:
+                    self._avulsos.append((regex, regra))
+
+        self._iniciais = self._palavras.keys() | self._compostos.keys()
+
+    def pode_bater(self, frase_limpa):
+        """
+        Checagem barata (só conjuntos): False garante que buscar()
+        devolveria uma lista vazia para esta frase.
+        """
+        if self._avulsos:
+            return True
+        return not self._iniciais.isdisjoint(frase_limpa.split())
+
+    def palavras_iniciais(self):
+        """
+        Palavras (normalizadas) que precisam aparecer na frase para alguma regra
+        bater, ou None se há padrões avulsos (aí qualquer frase pode bater).
+        """
+        if self._avulsos:
+            return None
+        return frozenset(self._iniciais)
+
+    def buscar(self, frase_limpa):
+        """
+        Recebe a frase JÁ normalizada e devolve os índices das regras
+        encontradas, na mesma ordem em que foram cadastradas.
+        """
+        encontradas = set()
+
+        # Frase normalizada só tem letras/números e espaços: split() = palavras inteiras
+        palavras_frase = self._iniciais.intersection(frase_limpa.split())
+
+        for palavra in palavras_frase:
+            encontradas.update(self._palavras.get(palavra, ()))
+            for regex, regra in self._compostos.get(palavra, ()):
+                if regra not in encontradas and regex.search(frase_limpa):
+                    encontradas.add(regra)
+
+        for regex, regra in self._avulsos:
+            if regra not in encontradas and regex.search(frase_limpa):
+                encontradas.add(regra)
+
+        return sorted(encontradas)
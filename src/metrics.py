@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+
+from src.config import METRICAS_ATIVAS
+
+# ⏱️ Instrumentação do pipeline: desligada por padrão.
+# Desligada, medir() devolve sempre o mesmo objeto vazio e contar() sai na
+# primeira linha, então o custo nos pontos instrumentados é quase zero.
+ATIVO = METRICAS_ATIVAS
+
+_segundos = defaultdict(float)
+_chamadas = Counter()
+_contadores = Counter()
+# Threads do serviço (e a do app) somam nos mesmos contadores: "+=" não é atômico
+_trava = threading.Lock()
+
+
+class _Cronometro:
+    __slots__ = ("etapa", "inicio")
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        decorrido = time.perf_counter() - self.inicio
+        with _trava:
+            _segundos[self.etapa] += decorrido
+            _chamadas[self.etapa] += 1
+        return False
+
+
+class _CronometroDesligado:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        return False
+
+
+_DESLIGADO = _CronometroDesligado()
+
+
+def ativar():
+    global ATIVO
+    ATIVO = True
+
+
+def desativar():
+    global ATIVO
+    ATIVO = False
+
+
+def zerar():
+    with _trava:
+        _segundos.clear()
+        _chamadas.clear()
+        _contadores.clear()
+
+
+def medir(etapa):
+    """
+    Uso: `with medir("log.analise"): ...` — soma o tempo de parede
+    e o nº de chamadas da etapa (só quando a instrumentação está ligada).
+    """
+    if not ATIVO:
+        return _DESLIGADO
+    return _Cronometro(etapa)
+
+
+def contar(nome, quantidade=1):
+    """
+    Soma um contador (linhas, bytes, páginas...). Nomes no formato
+    "grupo:tipo" (ex: "achados:CPF") viram um rótulo no Prometheus.
+    """
+    if ATIVO:
+        with _trava:
+            _contadores[nome] += quantidade
+
+
+def contar_achados(achados):
+    # Achados por detector (tipo do Achado), depois da validação
+    if ATIVO:
+        with _trava:
+            for achado in achados:
+                _contadores["achados:" + achado.tipo] += 1
+
+
+def exportar():
+    """
+    Retrato atual das métricas (dict simples, pronto para JSON ou para
+    somar() em outro processo).
+    """
+    with _trava:
+        return {
+            "etapas": {
+                etapa: {"segundos": round(_segundos[etapa], 6), "chamadas": _chamadas[etapa]}
+                for etapa in sorted(_chamadas)
+            },
+            "contadores": dict(sorted(_contadores.items())),
+        }
+
+
+def somar(retrato):
+    """
+    Junta as métricas de outro processo (ex: um worker do pool) às daqui.
+    """
+    with _trava:
+        for etapa, dados in retrato["etapas"].items():
+            _segundos[etapa] += dados["segundos"]
+            _chamadas[etapa] += dados["chamadas"]
+        _contadores.update(retrato["contadores"])
+
+
+def exportar_json(caminho=None, retrato=None):
+    # retrato: um exportar() já guardado (ex: o da tela do app); sem ele, o atual
+    conteudo = json.dumps(exportar() if retrato is None else retrato, ensure_ascii=False, indent=2)
+    if caminho:
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+    return conteudo
+
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def exportar_prometheus(retrato=None):
+    """
+    📈 Métricas no formato texto do Prometheus (para node_exporter/textfile
+    ou um endpoint /metrics). Com retrato, formata esse em vez do atual.
+    """
+    if retrato is None:
+        retrato = exportar()
+    linhas = [
+        "# HELP auditoria_etapa_segundos_total Tempo de parede acumulado por etapa.",
+        "# TYPE auditoria_etapa_segundos_total counter",
+    ]
+    for etapa, dados in retrato["etapas"].items():
+        linhas.append(f'auditoria_etapa_segundos_total{{etapa="{_rotulo(etapa)}"}} {dados["segundos"]}')
+
+    linhas += [
+        "# HELP auditoria_etapa_chamadas_total Nº de execuções de cada etapa.",
+        "# TYPE auditoria_etapa_chamadas_total counter",
+    ]
+    for etapa, dados in retrato["etapas"].items():
+        linhas.append(f'auditoria_etapa_chamadas_total{{etapa="{_rotulo(etapa)}"}} {dados["chamadas"]}')
+
+    # Contadores: "grupo:tipo" -> auditoria_grupo_total{tipo="..."}
+    grupos = defaultdict(list)
+    for nome, valor in retrato["contadores"].items():
+        grupo, _, tipo = nome.partition(":")
+        grupos[grupo].append((tipo, valor))
+
+    for grupo, valores in grupos.items():
+        metrica = f"auditoria_{grupo}_total"
+        linhas.append(f"# TYPE {metrica} counter")
+        for tipo, valor in valores:
+            rotulo = f'{{tipo="{_rotulo(tipo)}"}}' if tipo else ""
+            linhas.append(f"{metrica}{rotulo} {valor}")
+
+    return "\n".join(linhas) + "\n"
@@ -1,9 +1,48 @@
-import pdfplumber
+from collections import deque
+
+from src import metrics
+from src.cache import hash_arquivo
+
+# Quantas páginas cada processo extrai por vez no modo paralelo
+PAGINAS_POR_TAREFA = 8
+
+# Corte de cabeçalho/rodapé (em pontos) aplicado em cada página
+MARGEM_CORTE = 50
+
+
+def _abrir_pdf(caminho):
+    # pdfplumber só é importado quando um PDF é de fato aberto:
+    # quem varre apenas logs não paga o import (nem precisa dele instalado)
+    import pdfplumber
+
+    return pdfplumber.open(caminho)
+
+
+def _extrair_pagina(pagina):
+    largura = pagina.width
+    altura = pagina.height
+    bbox = (0, MARGEM_CORTE, largura, altura - MARGEM_CORTE)
+
+    pagina_cortada = pagina.crop(bbox)
+
+    return pagina_cortada.extract_text() or ""
+
+
+def _extrair_intervalo(caminho, inicio, fim):
+    """
+    Executado dentro de um processo do pool: cada processo abre o
+    próprio PDF e devolve (numero_pagina, texto) das páginas [inicio, fim).
+    """
+    with _abrir_pdf(caminho) as pdf:
+        return [(i + 1, _extrair_pagina(pdf.pages[i])) for i in range(inicio, fim)]
 
 
 class LeitorPDF:
-    def __init__(self, caminho_arquivo):
+    def __init__(self, caminho_arquivo, cache=None):
         self.caminho = caminho_arquivo
+        # CacheDisco opcional com o texto já extraído de cada página
+        self.cache = cache
+        self._chave_documento = None
 
     def _validar_seguranca(self):
         try:
@@ -14,31 +53,132 @@ class LeitorPDF:
         except FileNotFoundError:
             raise FileNotFoundError(f"Arquivo não encontrado: {self.caminho}")
 
-    def extrair_texto(self, pagina_inicio=None, pagina_fim=None):
+    def _calcular_intervalo(self, total_paginas, pagina_inicio, pagina_fim):
+        inicio = (pagina_inicio - 1) if pagina_inicio else 0
+        fim = pagina_fim if pagina_fim else total_paginas
+
+        if inicio < 0 or fim > total_paginas:
+            raise ValueError("Intervalo de páginas inválido.")
+        print(f"📖 Lendo das páginas {inicio + 1} até {fim}...")
+        return inicio, fim
+
+    def _chave(self, sufixo):
+        # Chave = hash do conteúdo + regra de corte: mudou o PDF ou o corte, muda a chave
+        if self._chave_documento is None:
+            self._chave_documento = f"pdf:{hash_arquivo(self.caminho)}:corte={MARGEM_CORTE}"
+        return f"{self._chave_documento}:{sufixo}"
+
+    def contar_paginas(self):
+        # Magic bytes antes de tudo: o pdfplumber nunca abre um "*.pdf" que não é PDF
+        self._validar_seguranca()
+        if self.cache is not None:
+            total = self.cache.obter(self._chave("total_paginas"))
+            if total is not None:
+                return int(total)
+
+        with _abrir_pdf(self.caminho) as pdf:
+            total = len(pdf.pages)
+
+        if self.cache is not None:
+            self.cache.guardar(self._chave("total_paginas"), str(total).encode())
+        return total
+
+    def _extrair(self, indices, workers):
+        """
+        Extrai as páginas pedidas (índices 0-based, em ordem) com o pdfplumber,
+        em série ou em blocos de páginas consecutivas num pool de processos.
+        """
+        if not indices:
+            return
+
+        if workers <= 1:
+            with _abrir_pdf(self.caminho) as pdf:
+                for i in indices:
+                    with metrics.medir("pdf.extracao"):
+                        texto = _extrair_pagina(pdf.pages[i])
+                    metrics.contar("pdf_paginas")
+                    yield i + 1, texto
+            return
+
+        # Agrupa índices consecutivos em tarefas de até PAGINAS_POR_TAREFA páginas
+        tarefas = []
+        for i in indices:
+            if tarefas and tarefas[-1][1] == i and i - tarefas[-1][0] < PAGINAS_POR_TAREFA:
+                tarefas[-1][1] = i + 1
+            else:
+                tarefas.append([i, i + 1])
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pendentes = deque()
+            for bloco, fim_bloco in tarefas:
+                pendentes.append(
+                    pool.submit(_extrair_intervalo, self.caminho, bloco, fim_bloco)
+                )
+
+                # Limita os blocos em voo para não segurar o documento todo na memória
+                if len(pendentes) >= workers * 2:
+                    yield from self._aguardar(pendentes.popleft())
+
+            while pendentes:
+                yield from self._aguardar(pendentes.popleft())
+
+    def _aguardar(self, tarefa):
+        # No modo paralelo, "pdf.extracao" é o tempo esperando os workers
+        with metrics.medir("pdf.extracao"):
+            paginas = tarefa.result()
+        metrics.contar("pdf_paginas", len(paginas))
+        return paginas
+
+    def iterar_paginas(self, pagina_inicio=None, pagina_fim=None, workers=1):
+        """
+        📄 Leitura preguiçosa: devolve (numero_pagina, texto) página a página,
+        assim a detecção já começa na página 1 enquanto o resto é lido.
+        Com workers > 1, blocos de páginas são extraídos em paralelo por um
+        pool de processos (a ordem das páginas é sempre preservada).
+        Com cache, páginas já vistas nem passam pelo pdfplumber.
+        """
         self._validar_seguranca()
-        texto_acumulado = ""
         print(f"📂 Abrindo arquivo: {self.caminho}...")
 
-        with pdfplumber.open(self.caminho) as pdf:
-            total_paginas = len(pdf.pages)
-            inicio = (pagina_inicio - 1) if pagina_inicio else 0
-            fim = pagina_fim if pagina_fim else total_paginas
+        inicio, fim = self._calcular_intervalo(
+            self.contar_paginas(), pagina_inicio, pagina_fim
+        )
+
+        if self.cache is None:
+            yield from self._extrair(range(inicio, fim), workers)
+            return
+
+        faltando = [
+            i for i in range(inicio, fim) if not self.cache.contem(self._chave(i + 1))
+        ]
+        extraidas = self._extrair(faltando, workers)
+        faltando = set(faltando)
+
+        for i in range(inicio, fim):
+            texto = None if i in faltando else self.cache.obter(self._chave(i + 1))
 
-            if inicio < 0 or fim > total_paginas:
-                raise ValueError("Intervalo de páginas inválido.")
-            print(f"📖 Lendo das páginas {inicio + 1} até {fim}...")
+            if texto is not None:
+                metrics.contar("pdf_cache:acerto")
+                yield i + 1, texto.decode("utf-8")
+                continue
 
-            for i in range(inicio, fim):
-                pagina = pdf.pages[i]
+            metrics.contar("pdf_cache:falta")
 
-                largura = pagina.width
-                altura = pagina.height
-                bbox = (0, 50, largura, altura - 50)
+            if i in faltando:
+                numero_pagina, txt = next(extraidas)
+            else:
+                # Despejada por outro processo entre a checagem e a leitura
+                numero_pagina, txt = _extrair_intervalo(self.caminho, i, i + 1)[0]
 
-                pagina_cortada = pagina.crop(bbox)
+            self.cache.guardar(self._chave(numero_pagina), txt.encode("utf-8"))
+            yield numero_pagina, txt
 
-                txt = pagina_cortada.extract_text()
-                if txt:
-                    texto_acumulado += txt + "\n"
+    def extrair_texto(self, pagina_inicio=None, pagina_fim=None, workers=1):
+        partes = []
+        for _, txt in self.iterar_paginas(pagina_inicio, pagina_fim, workers):
+            if txt:
+                partes.append(txt + "\n")
 
-        return texto_acumulado
+        return "".join(partes)
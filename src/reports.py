@@ -1,5 +1,10 @@
 import datetime
+import html
+import json
 import os
+from collections import Counter
+
+from src import metrics
 
 
 class GeradorRelatorio:
@@ -17,6 +22,8 @@ class GeradorRelatorio:
         for item in analises:
             icone = "⚠️" if item["tipo"] == "ALERTA" else "💡"
             self._adicionar_linha(f"> **{icone} {item['termo']}**")
+            if item.get("campo"):
+                self._adicionar_linha(f"> *Campo:* `{item['campo']}`")
             if item.get("definicao"):
                 self._adicionar_linha(f"> *Definição:* {item['definicao']}")
             if item.get("objetivo"):
@@ -45,6 +52,13 @@ class GeradorRelatorio:
         elif item["tipo"] == "ALINEA":
             prefixo = "       " * indentacao
             self._adicionar_linha(f"{prefixo}{item['texto']}")
+        elif item["tipo"] == "REGISTRO_LOG":
+            # Eventos do LogParser (lista ou ArmazemEventos): linhas limpas não viram nota
+            if not item.get("alertas"):
+                return
+            origem = f"{item['membro']}, linha" if item.get("membro") else "Linha"
+            self._adicionar_linha(f"**{origem} {item['linha_origem']}:** `{item['texto']}`\n")
+            self._renderizar_enrichment(item["alertas"])
 
         if item.get("analise"):
             self._renderizar_enrichment(item["analise"])
@@ -69,14 +83,8 @@ class GeradorRelatorio:
         return conteudo
 
 
-class GeradorHTML:
-    def __init__(self, dados):
-        # Agora self.dados recebe a lista de eventos (logs) gerada pelo LogParser
-        self.dados = dados
-
-    def gerar_html(self, caminho_saida):
-        # CSS Básico focado em visualização de SOC (Dark/Light mode simples)
-        html = """
+# CSS Básico focado em visualização de SOC (Dark/Light mode simples)
+_CABECALHO_HTML = """
         <html>
         <head>
             <meta charset='utf-8'>
@@ -97,7 +105,99 @@ class GeradorHTML:
             <h2>🛡️ Relatório de Auditoria e Logs (DLP)</h2>
         """
 
-        alertas_gerados = 0
+# Se o motor rodou tudo e não achou nada, exibe o selo de segurança
+_SELO_AMBIENTE_SEGURO = """
+            <div class='card success'>
+                <h2>✅ Ambiente Seguro</h2>
+                <p>Nenhum dado sensível (PII), anomalia ou violação de política foi detectado nos registros analisados.</p>
+            </div>
+            """
+
+_RODAPE_HTML = "</body></html>"
+
+# Relatório paginado: quantos cards vão em cada arquivo de página
+CARDS_POR_PAGINA = 500
+
+# Busca por nº de linha no índice: busca binária nas faixas [primeira, última, arquivo]
+# (+ índice do membro, em pacotes: a numeração recomeça em cada arquivo do pacote)
+_SCRIPT_BUSCA = """
+            <script>
+                function irParaLinha() {
+                    const n = parseInt(document.getElementById('linha').value, 10);
+                    const escolha = document.getElementById('membro');
+                    const m = escolha ? parseInt(escolha.value, 10) : undefined;
+                    const faixas = FAIXAS.filter(f => f[3] === m);
+                    let ini = 0, fim = faixas.length - 1;
+                    while (ini <= fim) {
+                        const meio = (ini + fim) >> 1;
+                        const faixa = faixas[meio];
+                        if (n < faixa[0]) { fim = meio - 1; }
+                        else if (n > faixa[1]) { ini = meio + 1; }
+                        else {
+                            const ancora = m === undefined ? 'linha-' + n : 'linha-m' + m + '-' + n;
+                            window.location.href = faixa[2] + '#' + ancora;
+                            return false;
+                        }
+                    }
+                    document.getElementById('aviso').textContent = 'Nenhum alerta na linha ' + n + '.';
+                    return false;
+                }
+            </script>
+            """
+
+
+class GeradorHTML:
+    def __init__(self, dados):
+        # Agora self.dados recebe a lista de eventos (logs) gerada pelo LogParser
+        # (ou qualquer iterável de eventos, inclusive um gerador em fluxo)
+        self.dados = dados
+        self.alertas_gerados = 0
+
+    def _renderizar_card(self, evento, alertas, ancora=None):
+        linha = evento.get("linha_origem", "Desconhecida")
+        texto_vazado = evento.get("texto", "Texto indisponível")
+
+        # No relatório paginado cada card ganha uma âncora (id) para o "ir para a linha"
+        abertura = f"<div class='card alert' id='{ancora}'>" if ancora else "<div class='card alert'>"
+
+        partes = [
+            abertura,
+            f"<h3 class='warning-title'>⚠️ Ameaça Detectada na Linha {linha}</h3>",
+            "<p><strong>Trecho Original do Log/Documento:</strong></p>",
+            f"<div class='log-line'>{texto_vazado}</div>",
+            "<ul>",
+        ]
+
+        # Linha de um pacote (.tar/.zip): de qual arquivo lá dentro ela veio
+        membro = evento.get("membro")
+        if membro:
+            partes.insert(2, f"<p><strong>Arquivo no pacote:</strong> {html.escape(membro)}</p>")
+
+        # Lista todas as violações encontradas naquela mesma linha
+        for alerta in alertas:
+            tipo = alerta.get("tipo", "ALERTA")
+            mensagem = alerta.get("mensagem", "Verifique este item.")
+            acao = alerta.get("acao", "")
+
+            partes.append(f"<li><strong>[{tipo}]</strong> {mensagem}")
+            # Log estruturado: o campo (caminho JSON, parâmetro SD, coluna) do achado
+            campo = alerta.get("campo")
+            if campo:
+                partes.append(f"<br><em>Campo: {html.escape(campo)}</em>")
+            if acao:
+                partes.append(f"<br><em>Recomendação: {acao}</em>")
+            partes.append("</li>")
+
+        partes.append("</ul></div>")
+        return "".join(partes)
+
+    def escrever_html(self, saida):
+        """
+        🌊 Escreve o relatório card a card em qualquer arquivo aberto (ou io.StringIO),
+        à medida que os eventos chegam. Só o contador fica na memória.
+        """
+        saida.write(_CABECALHO_HTML)
+        self.alertas_gerados = 0
 
         # Iterando sobre cada linha/evento processado pelo nosso motor
         for evento in self.dados:
@@ -107,40 +207,197 @@ class GeradorHTML:
 
             # Só renderiza o card no HTML se houver alguma ameaça (SOC silencioso para logs normais)
             if alertas:
-                alertas_gerados += 1
-                linha = evento.get("linha_origem", "Desconhecida")
-                texto_vazado = evento.get("texto", "Texto indisponível")
+                self.alertas_gerados += 1
+                with metrics.medir("relatorio.html"):
+                    saida.write(self._renderizar_card(evento, alertas))
+                metrics.contar("relatorio_cards")
+
+        if self.alertas_gerados == 0:
+            saida.write(_SELO_AMBIENTE_SEGURO)
 
-                html += f"<div class='card alert'>"
-                html += f"<h3 class='warning-title'>⚠️ Ameaça Detectada na Linha {linha}</h3>"
-                html += f"<p><strong>Trecho Original do Log/Documento:</strong></p>"
-                html += f"<div class='log-line'>{texto_vazado}</div>"
-                html += "<ul>"
+        saida.write(_RODAPE_HTML)
+        return self.alertas_gerados
+
+    def gerar_html(self, caminho_saida):
+        # Salva o arquivo final (gravado em fluxo, sem montar a string inteira)
+        with open(caminho_saida, "w", encoding="utf-8") as f:
+            return self.escrever_html(f)
+
+    def _navegacao(self, numero, tem_proxima):
+        links = ["<a href='index.html'>Índice</a>"]
+        if numero > 1:
+            links.insert(0, f"<a href='pagina_{numero - 1:04d}.html'>« Anterior</a>")
+        if tem_proxima:
+            links.append(f"<a href='pagina_{numero + 1:04d}.html'>Próxima »</a>")
+        return f"<p>{' | '.join(links)}</p>"
+
+    def _abrir_pagina(self, diretorio_saida, numero):
+        arquivo = open(
+            os.path.join(diretorio_saida, f"pagina_{numero:04d}.html"), "w", encoding="utf-8"
+        )
+        arquivo.write(_CABECALHO_HTML)
+        arquivo.write(f"<p><a href='index.html'>Índice</a> | Página {numero}</p>")
+        return arquivo
+
+    def _fechar_pagina(self, arquivo, numero, tem_proxima):
+        arquivo.write(self._navegacao(numero, tem_proxima))
+        arquivo.write(_RODAPE_HTML)
+        arquivo.close()
+
+    def _escrever_indice(self, diretorio_saida, totais, faixas, paginas, membros):
+        with open(os.path.join(diretorio_saida, "index.html"), "w", encoding="utf-8") as f:
+            f.write(_CABECALHO_HTML)
+
+            if self.alertas_gerados == 0:
+                f.write(_SELO_AMBIENTE_SEGURO)
+                f.write(_RODAPE_HTML)
+                return
+
+            f.write("<div class='card'>")
+            f.write(f"<h3>📊 {self.alertas_gerados} linha(s) com alertas em {paginas} página(s)</h3>")
+            for titulo, campo in [("Tipo", "tipo"), ("Categoria", "categoria"), ("Nível de Risco", "nivel_risco")]:
+                f.write(f"<p><strong>Por {titulo}:</strong></p><ul>")
+                for valor, quantidade in totais[campo].most_common():
+                    f.write(f"<li>{valor}: {quantidade}</li>")
+                f.write("</ul>")
+            f.write("</div>")
+
+            f.write("<div class='card'><h3>🔎 Ir para a linha</h3>")
+            f.write("<form onsubmit='return irParaLinha()'>")
+            if membros:
+                # Pacote: a linha só identifica o achado junto com o arquivo de dentro dele
+                f.write("<select id='membro'>")
+                for indice, membro in enumerate(membros):
+                    f.write(f"<option value='{indice}'>{html.escape(membro)}</option>")
+                f.write("</select> ")
+            f.write("<input id='linha' type='number' min='1' placeholder='Nº da linha'> ")
+            f.write("<button type='submit'>Ir</button></form><p id='aviso'></p>")
+            f.write(f"<script>const FAIXAS = {json.dumps(faixas)};</script>")
+            f.write(_SCRIPT_BUSCA)
+            f.write("</div>")
+
+            f.write("<div class='card'><h3>📄 Páginas</h3><ul>")
+            for primeira, ultima, arquivo, *membro in faixas:
+                origem = f"{html.escape(membros[membro[0]])}: " if membro else ""
+                f.write(f"<li><a href='{arquivo}'>{arquivo}</a> ({origem}linhas {primeira} a {ultima})</li>")
+            f.write("</ul></div>")
+
+            f.write(_RODAPE_HTML)
+
+    def gerar_html_paginado(self, diretorio_saida, cards_por_pagina=CARDS_POR_PAGINA):
+        """
+        📚 Relatório multi-arquivo para volumes gigantes de achados:
+          - index.html: totais por tipo/categoria/nível de risco + busca por linha;
+          - pagina_0001.html, ...: no máximo 'cards_por_pagina' cards cada;
+          - busca.json: faixas de linhas de cada página (para pular direto à linha).
+        Pacotes (.tar/.zip) recomeçam a numeração em cada membro: as faixas e as
+        âncoras levam o membro junto (índice na lista "membros" do busca.json).
+        Também grava em fluxo: na memória ficam só os contadores e as faixas.
+        """
+        os.makedirs(diretorio_saida, exist_ok=True)
+
+        totais = {"tipo": Counter(), "categoria": Counter(), "nivel_risco": Counter()}
+        faixas = []
+        membros = {}
+        self.alertas_gerados = 0
+        pagina = None
+        paginas = 0
+        cards_na_pagina = 0
+        chave_faixa = None
+
+        try:
+            for evento in self.dados:
+                alertas = evento.get("alertas", [])
+                if not alertas:
+                    continue
+
+                # Página cheia: fecha (já com link para a próxima) e abre outra
+                if pagina is None or cards_na_pagina == cards_por_pagina:
+                    if pagina is not None:
+                        self._fechar_pagina(pagina, paginas, tem_proxima=True)
+                    paginas += 1
+                    pagina = self._abrir_pagina(diretorio_saida, paginas)
+                    cards_na_pagina = 0
+
+                linha = evento.get("linha_origem")
+                membro = evento.get("membro")
+                indice_membro = None if membro is None else membros.setdefault(membro, len(membros))
+
+                # Faixa nova a cada página e a cada membro (a linha recomeça do 1)
+                if chave_faixa != (paginas, indice_membro):
+                    chave_faixa = (paginas, indice_membro)
+                    faixa = [linha, linha, f"pagina_{paginas:04d}.html"]
+                    if indice_membro is not None:
+                        faixa.append(indice_membro)
+                    faixas.append(faixa)
+
+                self.alertas_gerados += 1
+                cards_na_pagina += 1
+                faixas[-1][1] = linha
+                ancora = f"linha-{linha}" if indice_membro is None else f"linha-m{indice_membro}-{linha}"
+                with metrics.medir("relatorio.html"):
+                    pagina.write(self._renderizar_card(evento, alertas, ancora=ancora))
+                metrics.contar("relatorio_cards")
 
-                # Lista todas as violações encontradas naquela mesma linha
                 for alerta in alertas:
-                    tipo = alerta.get("tipo", "ALERTA")
-                    mensagem = alerta.get("mensagem", "Verifique este item.")
-                    acao = alerta.get("acao", "")
+                    totais["tipo"][alerta.get("tipo", "ALERTA")] += 1
+                    totais["categoria"][alerta.get("categoria", "Sem categoria")] += 1
+                    totais["nivel_risco"][alerta.get("nivel_risco", "Sem nível")] += 1
+        finally:
+            if pagina is not None:
+                self._fechar_pagina(pagina, paginas, tem_proxima=False)
 
-                    html += f"<li><strong>[{tipo}]</strong> {mensagem}"
-                    if acao:
-                        html += f"<br><em>Recomendação: {acao}</em>"
-                    html += "</li>"
+        membros = list(membros)
+        with open(os.path.join(diretorio_saida, "busca.json"), "w", encoding="utf-8") as f:
+            json.dump({"faixas": faixas, "membros": membros}, f, ensure_ascii=False)
 
-                html += "</ul></div>"
+        self._escrever_indice(diretorio_saida, totais, faixas, paginas, membros)
+        return self.alertas_gerados
 
-        # Se o motor rodou tudo e não achou nada, exibe o selo de segurança
-        if alertas_gerados == 0:
-            html += """
-            <div class='card success'>
-                <h2>✅ Ambiente Seguro</h2>
-                <p>Nenhum dado sensível (PII), anomalia ou violação de política foi detectado nos registros analisados.</p>
-            </div>
-            """
 
-        html += "</body></html>"
+class GeradorResumoHTML:
+    """
+    📋 Resumo consolidado da varredura em lote: totais gerais e uma linha
+    por arquivo, com o link para o relatório individual de cada um.
+    """
+
+    def __init__(self, consolidado):
+        self.consolidado = consolidado
+
+    def _linha_arquivo(self, resumo):
+        nome = html.escape(resumo["arquivo"])
+        if resumo.get("relatorio"):
+            caminho = html.escape(resumo["relatorio"].replace(os.sep, "/"))
+            nome = f"<a href='{caminho}'>{nome}</a>"
+
+        niveis = ", ".join(
+            f"{nivel}: {quantidade}" for nivel, quantidade in resumo.get("por_nivel", {}).items()
+        )
+        situacao = resumo["status"].upper()
+        if resumo.get("erro"):
+            situacao += f" — {html.escape(resumo['erro'])}"
+
+        return (
+            f"<tr><td>{nome}</td><td>{situacao}</td><td>{resumo.get('alertas', 0)}</td>"
+            f"<td>{resumo.get('linhas_com_alerta', 0)}</td><td>{niveis}</td></tr>"
+        )
+
+    def gerar_html(self, caminho_saida):
+        totais = self.consolidado["totais"]
 
-        # Salva o arquivo final
         with open(caminho_saida, "w", encoding="utf-8") as f:
-            f.write(html)
+            f.write(_CABECALHO_HTML)
+            f.write("<div class='card'>")
+            f.write(f"<h3>🗂️ Varredura em lote: {totais['arquivos']} arquivo(s)</h3>")
+            f.write(f"<p>Gerado em {self.consolidado['gerado_em']} — {totais['alertas']} alerta(s) em ")
+            f.write(f"{totais['linhas_com_alerta']} linha(s).</p><ul>")
+            for nivel, quantidade in sorted(totais["por_nivel"].items()):
+                f.write(f"<li>{nivel}: {quantidade}</li>")
+            f.write("</ul></div>")
+
+            f.write("<div class='card'><table style='width:100%; text-align:left'>")
+            f.write("<tr><th>Arquivo</th><th>Status</th><th>Alertas</th><th>Linhas</th><th>Por nível</th></tr>")
+            for resumo in self.consolidado["arquivos"]:
+                f.write(self._linha_arquivo(resumo))
+            f.write("</table></div>")
+            f.write(_RODAPE_HTML)
@@ -0,0 +1,587 @@
+import argparse
+import io
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from src import metrics
+from src.cache import CacheDisco
+from src.config import (
+    CACHE_DIR,
+    CACHE_LIMITE_BYTES,
+    ENTRADA_DIR,
+    SERVICO_FILA_MAXIMA,
+    SERVICO_LIMIAR_PARALELO,
+    SERVICO_LIMITE_UPLOAD,
+    SERVICO_PORTA,
+    SERVICO_TAREFAS_GUARDADAS,
+    SERVICO_WORKERS,
+    WORKERS_PADRAO,
+)
+from src.event_store import ArmazemEventos
+from src.log_parser import LogParser
+from src.readers import LeitorPDF
+from src.reports import GeradorHTML
+from src.utils import validar_caminho_seguro
+
+# 🔒 Só a própria máquina enxerga o serviço (nada de 0.0.0.0)
+HOST_SERVICO = "127.0.0.1"
+
+# Situações de uma tarefa
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+CANCELADA = "cancelada"
+_FINALIZADAS = (CONCLUIDA, ERRO, CANCELADA)
+
+
+class Tarefa:
+    """
+    📨 Uma varredura pedida ao serviço: guarda os achados no armazém compacto
+    conforme saem do parser, para o cliente acompanhar em fluxo.
+    """
+
+    def __init__(self, nome, origem, pdf=False, temporario=None, opcoes=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.nome = nome
+        self.origem = origem  # caminho ou BytesIO
+        self.pdf = pdf
+        self.temporario = temporario  # arquivo de upload a apagar no fim
+        self.opcoes = opcoes or {}
+
+        self.status = NA_FILA
+        self.erro = None
+        self.criada_em = time.time()
+        self.segundos = None
+        self.armazem = ArmazemEventos()
+        self._condicao = threading.Condition()
+
+        # Progresso (lido por outras threads enquanto a tarefa roda)
+        self.paginas_lidas = 0
+        self.total_paginas = None
+        self.total_bytes = None
+        self._parser = None
+        self._fluxo = None
+
+    def publicar(self, registro):
+        with self._condicao:
+            self.armazem.adicionar(registro)
+            self._condicao.notify_all()
+
+    def mudar_status(self, status, erro=None):
+        with self._condicao:
+            self.status = status
+            self.erro = erro
+            if status in _FINALIZADAS:
+                self.segundos = round(time.time() - self.criada_em, 4)
+            self._condicao.notify_all()
+
+    def finalizada(self):
+        return self.status in _FINALIZADAS
+
+    def resumo(self):
+        return {
+            "id": self.id,
+            "arquivo": self.nome,
+            "status": self.status,
+            "erro": self.erro,
+            "linhas_com_alerta": len(self.armazem),
+            "alertas": self.armazem.total_alertas(),
+            "segundos": self.segundos,
+            "progresso": self.progresso(),
+            "membros_ignorados": self._parser.membros_ignorados if self._parser else [],
+        }
+
+    def progresso(self):
+        """
+        Páginas (PDF) ou bytes (log) já lidos, linhas lidas e a fração
+        concluída de 0 a 1 (None enquanto o total ainda é desconhecido).
+        """
+        linhas = self._parser.linhas_lidas if self._parser else 0
+        if self.status == CONCLUIDA:
+            fracao = 1.0
+        elif self.pdf:
+            fracao = self.paginas_lidas / self.total_paginas if self.total_paginas else None
+        else:
+            lidos = self._bytes_lidos()
+            fracao = min(lidos / self.total_bytes, 1.0) if self.total_bytes else None
+        return {
+            "paginas": self.paginas_lidas,
+            "total_paginas": self.total_paginas,
+            "linhas": linhas,
+            "fracao": fracao,
+        }
+
+    def _bytes_lidos(self):
+        # Varredura mapeada: o parser conta os bytes (o fluxo nem sai do lugar)
+        if self._parser and self._parser.bytes_lidos:
+            return self._parser.bytes_lidos
+        try:
+            return self._fluxo.tell() if self._fluxo else 0
+        except (ValueError, OSError):
+            # Fluxo já fechado no fim da tarefa
+            return self.total_bytes or 0
+
+    def _contar_paginas(self, paginas):
+        for pagina in paginas:
+            self.paginas_lidas += 1
+            yield pagina
+
+    def executar(self, workers=1):
+        """
+        Roda a varredura nesta thread, publicando os achados conforme saem
+        (o serviço chama daqui de um worker; o app, de uma thread de fundo).
+        """
+        self.mudar_status(EXECUTANDO)
+        try:
+            with metrics.medir("servico.tarefa"):
+                self._parser = LogParser(workers=workers, compacto=True)
+
+                if self.pdf:
+                    leitor = LeitorPDF(self.origem, cache=CacheDisco(CACHE_DIR, CACHE_LIMITE_BYTES))
+                    inicio = self.opcoes.get("pagina_inicio") or 1
+                    fim = self.opcoes.get("pagina_fim") or leitor.contar_paginas()
+                    self.total_paginas = max(fim - inicio + 1, 0)
+                    paginas = leitor.iterar_paginas(
+                        self.opcoes.get("pagina_inicio"), self.opcoes.get("pagina_fim")
+                    )
+                    for registro in self._parser.processar_paginas(self._contar_paginas(paginas)):
+                        self.publicar(registro)
+                else:
+                    self._varrer_log()
+            self.mudar_status(CONCLUIDA)
+        except Exception as e:
+            self.mudar_status(ERRO, f"{type(e).__name__}: {e}")
+        finally:
+            self.limpar()
+        metrics.contar("servico_tarefas:" + self.status)
+
+    def _varrer_log(self):
+        if isinstance(self.origem, str):
+            self.total_bytes = os.path.getsize(self.origem)
+            fluxo = open(self.origem, "rb")
+        else:
+            fluxo = self.origem
+            self.total_bytes = len(fluxo.getbuffer())
+
+        # Log em texto puro: varrido nos bytes (mmap / buffer do BytesIO). Pacotes e
+        # compactados (e a leitura em fluxo) leem do fluxo: o tell() diz quanto já foi
+        self._fluxo = fluxo
+        with fluxo:
+            # O nome (do upload ou do caminho) diz se é CSV; o resto vem do conteúdo
+            for registro in self._parser.processar_log(fluxo, self.nome):
+                self.publicar(registro)
+
+    def limpar(self):
+        # Apaga o upload temporário (se houver) depois da varredura
+        if self.temporario:
+            try:
+                os.remove(self.temporario)
+            except OSError:
+                pass
+            self.temporario = None
+
+    def recentes(self, quantidade):
+        # Os últimos achados, lidos sob a trava (o worker pode estar gravando)
+        with self._condicao:
+            total = len(self.armazem)
+            return [self.armazem.evento(i) for i in range(max(total - quantidade, 0), total)]
+
+    def acompanhar(self):
+        """
+        Devolve os eventos já encontrados e vai esperando pelos próximos
+        até a tarefa terminar (gerador bloqueante, um por cliente).
+        """
+        posicao = 0
+        while True:
+            with self._condicao:
+                while posicao >= len(self.armazem) and not self.finalizada():
+                    self._condicao.wait()
+                if posicao >= len(self.armazem):
+                    return
+                evento = self.armazem.evento(posicao)
+            posicao += 1
+            yield evento
+
+
+class ServicoVarredura:
+    """
+    🛰️ Serviço de varredura "quente": glossário, matcher e detectores já
+    carregados no processo, fila limitada de tarefas e um pool de threads
+    consumindo a fila. Arquivos grandes usam o LogParser paralelo (processos).
+    """
+
+    def __init__(
+        self,
+        diretorio_base=ENTRADA_DIR,
+        workers=SERVICO_WORKERS,
+        fila_maxima=SERVICO_FILA_MAXIMA,
+        tarefas_guardadas=SERVICO_TAREFAS_GUARDADAS,
+    ):
+        self.diretorio_base = diretorio_base
+        self.fila = queue.Queue(maxsize=fila_maxima)
+        self.tarefas = OrderedDict()
+        self.tarefas_guardadas = tarefas_guardadas
+        self._trava = threading.Lock()
+
+        self._aquecer()
+        self._threads = [
+            threading.Thread(target=self._trabalhar, name=f"varredura-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _aquecer(self):
+        # Uma linha de teste passa por todo o caminho quente antes do 1º pedido
+        parser = LogParser(compacto=True)
+        ArmazemEventos().extend(parser.processar_arquivo(io.BytesIO(b"cpf 529.982.247-25\n")))
+
+    def enviar(self, tarefa):
+        """
+        Coloca a tarefa na fila. Fila cheia -> queue.Full (o cliente tenta depois).
+        """
+        with self._trava:
+            self.fila.put_nowait(tarefa)
+            self.tarefas[tarefa.id] = tarefa
+            self._despejar()
+        return tarefa
+
+    def _despejar(self):
+        # Esquece as tarefas finalizadas mais antigas além do limite
+        excedente = len(self.tarefas) - self.tarefas_guardadas
+        for id_tarefa in list(self.tarefas):
+            if excedente <= 0:
+                break
+            if self.tarefas[id_tarefa].finalizada():
+                del self.tarefas[id_tarefa]
+                excedente -= 1
+
+    def obter(self, id_tarefa):
+        with self._trava:
+            return self.tarefas.get(id_tarefa)
+
+    def descartar(self, id_tarefa):
+        """
+        Cancela uma tarefa ainda na fila ou libera uma finalizada.
+        Devolve False se ela estiver em execução.
+        """
+        with self._trava:
+            tarefa = self.tarefas.get(id_tarefa)
+            if tarefa is None or tarefa.status == EXECUTANDO:
+                return False
+            if tarefa.status == NA_FILA:
+                tarefa.mudar_status(CANCELADA)
+            del self.tarefas[id_tarefa]
+            return True
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self.fila.get()
+            try:
+                if tarefa.status == NA_FILA:
+                    tarefa.executar(self._workers_para(tarefa))
+                else:
+                    # Cancelada enquanto esperava na fila
+                    tarefa.limpar()
+            finally:
+                self.fila.task_done()
+
+    def _workers_para(self, tarefa):
+        # Só arquivos grandes compensam o custo de subir o pool de processos
+        if isinstance(tarefa.origem, str) and os.path.getsize(tarefa.origem) > SERVICO_LIMIAR_PARALELO:
+            return WORKERS_PADRAO
+        return 1
+
+    def resumo(self):
+        with self._trava:
+            situacoes = [tarefa.status for tarefa in self.tarefas.values()]
+        return {
+            "status": "ok",
+            "fila": self.fila.qsize(),
+            "fila_maxima": self.fila.maxsize,
+            "workers": len(self._threads),
+            "tarefas": {status: situacoes.count(status) for status in set(situacoes)},
+        }
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """
+    API local (JSON / NDJSON):
+      POST   /varreduras?nome=app.log   corpo = bytes do arquivo (log, PDF, .gz/.tar/.zip...)
+      POST   /varreduras                JSON {"caminho": "...", "pagina_inicio": 1, ...}
+      GET    /varreduras/<id>           situação da tarefa
+      GET    /varreduras/<id>/eventos   achados em fluxo (uma linha JSON por evento)
+      GET    /varreduras/<id>/relatorio relatório HTML (tarefa concluída)
+      DELETE /varreduras/<id>           cancela (na fila) ou libera (finalizada)
+      GET    /saude  |  GET /metricas
+    """
+
+    server_version = "AuditoriaDLP"
+
+    @property
+    def servico(self):
+        return self.server.servico
+
+    def log_message(self, formato, *args):
+        # Sem log de acesso no console: os nomes dos arquivos podem ser sensíveis
+        pass
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        # 🛡️ DNS rebinding: uma página de fora que resolva para 127.0.0.1 chega aqui
+        # com o Host dela; só nomes locais leem os achados (que trazem os valores)
+        if self.headers.get("Host", "").lower() not in self.server.hosts_permitidos:
+            self._erro(403, "Host não permitido.")
+            return False
+        return True
+
+    def _responder_json(self, codigo, conteudo):
+        corpo = json.dumps(conteudo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _erro(self, codigo, mensagem):
+        self._responder_json(codigo, {"erro": mensagem})
+
+    def _rota(self):
+        url = urlparse(self.path)
+        partes = [parte for parte in url.path.split("/") if parte]
+        return partes, parse_qs(url.query)
+
+    def _tarefa_da_rota(self, partes):
+        tarefa = self.servico.obter(partes[1]) if len(partes) >= 2 else None
+        if tarefa is None:
+            self._erro(404, "Tarefa não encontrada.")
+        return tarefa
+
+    def do_GET(self):
+        partes, _ = self._rota()
+
+        if partes == ["saude"]:
+            return self._responder_json(200, self.servico.resumo())
+        if partes == ["metricas"]:
+            corpo = metrics.exportar_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+            return
+
+        if not partes or partes[0] != "varreduras" or len(partes) not in (2, 3):
+            return self._erro(404, "Rota desconhecida.")
+        tarefa = self._tarefa_da_rota(partes)
+        if tarefa is None:
+            return
+
+        if len(partes) == 2:
+            return self._responder_json(200, tarefa.resumo())
+        if partes[2] == "eventos":
+            return self._transmitir_eventos(tarefa)
+        if partes[2] == "relatorio":
+            return self._transmitir_relatorio(tarefa)
+        self._erro(404, "Rota desconhecida.")
+
+    def _transmitir_eventos(self, tarefa):
+        # HTTP/1.0 sem Content-Length: o fim da resposta é o fim da conexão
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        try:
+            for evento in tarefa.acompanhar():
+                self.wfile.write((json.dumps(evento, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            fim = dict(tarefa.resumo(), tipo="FIM_VARREDURA")
+            self.wfile.write((json.dumps(fim, ensure_ascii=False) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente desistiu no meio; a tarefa continua normalmente
+            pass
+
+    def _transmitir_relatorio(self, tarefa):
+        if tarefa.status != CONCLUIDA:
+            return self._erro(409, f"Tarefa {tarefa.status}: relatório ainda indisponível.")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        fluxo = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        try:
+            GeradorHTML(tarefa.armazem).escrever_html(fluxo)
+            fluxo.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            fluxo.detach()
+
+    def do_POST(self):
+        partes, parametros = self._rota()
+        if partes != ["varreduras"]:
+            return self._erro(404, "Rota desconhecida.")
+
+        try:
+            tamanho = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            return self._erro(411, "Content-Length obrigatório.")
+        if tamanho > SERVICO_LIMITE_UPLOAD:
+            return self._erro(413, "Arquivo acima do limite do serviço.")
+
+        try:
+            if self.headers.get_content_type() == "application/json":
+                tarefa = self._tarefa_por_caminho(json.loads(self.rfile.read(tamanho)))
+            else:
+                nome = parametros.get("nome", ["upload.log"])[0]
+                tarefa = self._tarefa_por_upload(nome, tamanho)
+        except PermissionError as e:
+            return self._erro(403, str(e))
+        except FileNotFoundError as e:
+            return self._erro(404, str(e))
+        except (ValueError, KeyError, TypeError) as e:
+            return self._erro(400, f"Pedido inválido: {e}")
+
+        try:
+            self.servico.enviar(tarefa)
+        except queue.Full:
+            if tarefa.temporario:
+                os.remove(tarefa.temporario)
+            return self._erro(503, "Fila cheia: tente de novo em instantes.")
+
+        self._responder_json(202, tarefa.resumo())
+
+    def _tarefa_por_caminho(self, pedido):
+        if not isinstance(pedido, dict) or not isinstance(pedido.get("caminho"), str):
+            raise ValueError('esperado um objeto JSON com "caminho" (texto)')
+        # 🛡️ Só arquivos dentro da pasta base do serviço
+        caminho = validar_caminho_seguro(pedido["caminho"], self.servico.diretorio_base)
+        opcoes = {
+            "pagina_inicio": pedido.get("pagina_inicio"),
+            "pagina_fim": pedido.get("pagina_fim"),
+        }
+        pdf = caminho.lower().endswith(".pdf")
+        return Tarefa(pedido["caminho"], caminho, pdf=pdf, opcoes=opcoes)
+
+    def _tarefa_por_upload(self, nome, tamanho):
+        inicio = self.rfile.read(min(tamanho, 4))
+        pdf = inicio == b"%PDF"
+
+        # Logs pequenos ficam na memória (latência de milissegundos);
+        # PDFs e arquivos grandes vão para um temporário apagado no fim da tarefa
+        if not pdf and tamanho <= SERVICO_LIMIAR_PARALELO:
+            return Tarefa(nome, io.BytesIO(inicio + self.rfile.read(tamanho - len(inicio))))
+
+        sufixo = ".pdf" if pdf else ".log"
+        with tempfile.NamedTemporaryFile("wb", suffix=sufixo, delete=False) as f:
+            f.write(inicio)
+            restante = tamanho - len(inicio)
+            while restante > 0:
+                bloco = self.rfile.read(min(restante, 1024 * 1024))
+                if not bloco:
+                    break
+                f.write(bloco)
+                restante -= len(bloco)
+        return Tarefa(nome, f.name, pdf=pdf, temporario=f.name)
+
+    def do_DELETE(self):
+        partes, _ = self._rota()
+        if len(partes) != 2 or partes[0] != "varreduras":
+            return self._erro(404, "Rota desconhecida.")
+        if self.servico.descartar(partes[1]):
+            return self._responder_json(200, {"id": partes[1], "descartada": True})
+        self._erro(409, "Tarefa inexistente ou em execução.")
+
+
+def criar_servidor(porta=SERVICO_PORTA, **opcoes):
+    """
+    Monta o servidor HTTP local (ainda sem atender); porta 0 = qualquer porta livre.
+    Opções: diretorio_base, workers, fila_maxima, tarefas_guardadas.
+    """
+    servidor = ThreadingHTTPServer((HOST_SERVICO, porta), _Manipulador)
+    servidor.daemon_threads = True
+    porta = servidor.server_address[1]
+    servidor.hosts_permitidos = {f"{host}:{porta}" for host in (HOST_SERVICO, "localhost", "127.0.0.1")}
+    servidor.servico = ServicoVarredura(**opcoes)
+    return servidor
+
+
+class ClienteServico:
+    """
+    🔌 Cliente mínimo (só biblioteca padrão) da API do serviço local.
+    """
+
+    def __init__(self, url=f"http://{HOST_SERVICO}:{SERVICO_PORTA}", tempo_limite=10):
+        self.url = url.rstrip("/")
+        self.tempo_limite = tempo_limite
+
+    def _pedir(self, metodo, rota, corpo=None, tipo=None):
+        pedido = urllib.request.Request(self.url + rota, data=corpo, method=metodo)
+        if tipo:
+            pedido.add_header("Content-Type", tipo)
+        return urllib.request.urlopen(pedido, timeout=self.tempo_limite)
+
+    def _json(self, metodo, rota, corpo=None, tipo=None):
+        with self._pedir(metodo, rota, corpo, tipo) as resposta:
+            return json.loads(resposta.read())
+
+    def disponivel(self):
+        try:
+            return self._json("GET", "/saude")["status"] == "ok"
+        except OSError:
+            return False
+
+    def enviar_bytes(self, conteudo, nome="upload.log"):
+        rota = "/varreduras?" + urlencode({"nome": nome})
+        return self._json("POST", rota, conteudo, "application/octet-stream")
+
+    def enviar_caminho(self, caminho, pagina_inicio=None, pagina_fim=None):
+        pedido = {"caminho": caminho, "pagina_inicio": pagina_inicio, "pagina_fim": pagina_fim}
+        return self._json("POST", "/varreduras", json.dumps(pedido).encode("utf-8"), "application/json")
+
+    def status(self, id_tarefa):
+        return self._json("GET", f"/varreduras/{id_tarefa}")
+
+    def eventos(self, id_tarefa):
+        """
+        Eventos em fluxo, conforme o serviço encontra; a última linha
+        é o resumo da tarefa (tipo FIM_VARREDURA).
+        """
+        with self._pedir("GET", f"/varreduras/{id_tarefa}/eventos") as resposta:
+            for linha in resposta:
+                yield json.loads(linha)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="🛰️ Serviço local de varredura DLP/SOC (glossário e detectores sempre carregados)."
+    )
+    parser.add_argument("--porta", type=int, default=SERVICO_PORTA)
+    parser.add_argument("--entrada", default=ENTRADA_DIR, help="pasta base dos pedidos por caminho")
+    parser.add_argument("--workers", type=int, default=SERVICO_WORKERS, help="tarefas ao mesmo tempo")
+    parser.add_argument("--fila", type=int, default=SERVICO_FILA_MAXIMA, help="tarefas aguardando, no máximo")
+    args = parser.parse_args(argumentos)
+
+    servidor = criar_servidor(
+        args.porta, diretorio_base=args.entrada, workers=args.workers, fila_maxima=args.fila
+    )
+    print(f"🛰️ Serviço ouvindo em http://{HOST_SERVICO}:{servidor.server_address[1]} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Serviço encerrado.")
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
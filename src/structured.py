@@ -0,0 +1,358 @@
+import csv
+import io
+import json
+import os
+import re
+from fnmatch import fnmatchcase
+
+from src.core import analisar_campo_compacto
+from src.detectors import (
+    PADROES_DLP,
+    _PRIORIDADE_MASCARA,
+    Achado,
+    pode_conter_achado,
+    sanitizar_log_str,
+    varrer_texto,
+)
+
+# 🧾 Logs estruturados (JSON lines, syslog RFC 5424, CSV): cada registro é
+# separado em campos uma vez só e cada detector roda só nos campos que o perfil
+# do formato manda. Data/hora, host, ids de rastreio... nunca passam pelos
+# caçadores (fim dos IPs/hashes falsos) e cada achado sai com o caminho do campo.
+
+FORMATOS_ESTRUTURADOS = ("jsonl", "syslog", "csv")
+
+# CSV só é reconhecido pela extensão (pelo conteúdo, qualquer log com vírgulas pareceria um)
+EXTENSOES_ESTRUTURADAS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+# Detectores de um perfil: os caçadores DLP (CPF, CARTAO, AWS, SENHA, IPV4, HASH),
+# "GLOSSARIO" (glossário + gatilhos) e "VALOR_SENHA" (o valor inteiro do campo é o segredo)
+DLP = frozenset(tipo for tipo, _ in PADROES_DLP)
+TODOS = DLP | {"GLOSSARIO"}
+NENHUM = frozenset()
+
+# Campos comparados pelo nome (minúsculo, sem o índice de lista): a 1ª regra que bate vale,
+# campo sem regra passa por TODOS os detectores (na dúvida, o DLP olha)
+_CAMPOS_TECNICOS = (
+    "time", "timestamp", "@timestamp", "ts", "date", "datetime", "*_at", "*_time",
+    "level", "severity", "loglevel", "logger", "thread", "pid", "tid",
+    "host", "hostname", "service", "env", "environment", "version", "@version",
+    "duration*", "latency*", "elapsed*", "status", "status_code", "method",
+    "trace_id", "span_id", "request_id", "correlation_id", "traceid", "spanid", "requestid",
+)
+_CAMPOS_IP = (
+    "ip", "*_ip", "ip_*", "*ip_address", "*_addr", "src", "dst", "x_forwarded_for", "x-forwarded-for",
+)
+_CAMPOS_HASH = ("md5", "sha1", "sha256", "*hash", "checksum", "digest")
+# Nomes com as mesmas chaves do pré-filtro de senha: o nome do campo na linha já a torna candidata
+_CAMPOS_SENHA = ("*password*", "*senha*", "*pwd*", "*secret*")
+
+_REGRAS_POR_NOME = (
+    (_CAMPOS_TECNICOS, NENHUM),
+    (_CAMPOS_IP, frozenset({"IPV4"})),
+    (_CAMPOS_HASH, frozenset({"HASH"})),
+    (_CAMPOS_SENHA, frozenset({"VALOR_SENHA"})),
+)
+
+PERFIS = {
+    "jsonl": _REGRAS_POR_NOME,
+    "csv": _REGRAS_POR_NOME,
+    # Cabeçalho do syslog (fora a mensagem) é só metadado; parâmetros do SD seguem o nome
+    "syslog": ((("timestamp", "hostname", "app_name", "procid", "msgid"), NENHUM),) + _REGRAS_POR_NOME,
+}
+
+_RE_INDICE = re.compile(r"\[\d+\]")
+
+
+class Perfil:
+    """
+    Detectores de cada campo, pelas regras (padrões de nome, detectores) do
+    formato. O resultado fica guardado por nome: os campos se repetem a cada registro.
+    """
+
+    def __init__(self, regras, padrao=TODOS):
+        self.regras = regras
+        self.padrao = padrao
+        self._por_nome = {}
+
+    def detectores(self, caminho):
+        nome = caminho.rsplit(".", 1)[-1]
+        detectores = self._por_nome.get(nome)
+        if detectores is None:
+            normalizado = _RE_INDICE.sub("", nome).lower()
+            detectores = next(
+                (
+                    detectores
+                    for padroes, detectores in self.regras
+                    if any(fnmatchcase(normalizado, padrao) for padrao in padroes)
+                ),
+                self.padrao,
+            )
+            self._por_nome[nome] = detectores
+        return detectores
+
+
+def _folhas(no, caminho, campos):
+    # Valores escalares do JSON como (caminho, recipiente, chave): "a.b", "itens[0].cpf"
+    itens = no.items() if isinstance(no, dict) else enumerate(no)
+    for chave, valor in itens:
+        if isinstance(no, dict):
+            sub = f"{caminho}.{chave}" if caminho else chave
+        else:
+            sub = f"{caminho}[{chave}]"
+        if isinstance(valor, (dict, list)):
+            _folhas(valor, sub, campos)
+        elif valor is not None and not isinstance(valor, bool):
+            campos.append((sub, no, chave))
+
+
+class LeitorJSONL:
+    """Uma linha = um objeto JSON; campos = folhas do objeto (caminho com pontos)."""
+
+    linha_cabecalho = 0
+    pre_filtro_seguro = True
+
+    def ler(self, linha):
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            return None
+        if not isinstance(registro, dict):
+            return None
+        campos = []
+        _folhas(registro, "", campos)
+        return registro, campos
+
+    def remontar(self, registro):
+        return json.dumps(registro, ensure_ascii=False)
+
+
+# RFC 5424: <PRI>VERSÃO TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+_RE_SYSLOG = re.compile(r"(<\d{1,3}>\d{1,2}) (\S+) (\S+) (\S+) (\S+) (\S+) ")
+_RE_SD_ID = re.compile(r'\[([^\s=\]"]+)')
+_RE_SD_PARAMETRO = re.compile(r' ([^\s=\]"]+)="((?:[^"\\]|\\.)*)"')
+_RE_ESCAPE_SD = re.compile(r'\\(["\\\]])')
+_CABECALHO_SYSLOG = ("timestamp", "hostname", "app_name", "procid", "msgid")
+
+
+def _escapar_sd(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("]", "\\]")
+
+
+class LeitorSyslog:
+    """
+    Syslog RFC 5424: campos do cabeçalho pelo nome, parâmetros do
+    STRUCTURED-DATA como "sd.<id>.<parâmetro>" e o texto livre em "msg".
+    """
+
+    linha_cabecalho = 0
+    pre_filtro_seguro = True
+
+    def ler(self, linha):
+        m = _RE_SYSLOG.match(linha)
+        if not m:
+            return None
+        cabecalho = list(m.groups())
+        posicao = m.end()
+
+        elementos = []
+        if linha.startswith("-", posicao):
+            posicao += 1
+        else:
+            while True:
+                sd_id = _RE_SD_ID.match(linha, posicao)
+                if not sd_id:
+                    break
+                posicao = sd_id.end()
+                parametros = []
+                while True:
+                    parametro = _RE_SD_PARAMETRO.match(linha, posicao)
+                    if not parametro:
+                        break
+                    parametros.append([parametro.group(1), _RE_ESCAPE_SD.sub(r"\1", parametro.group(2))])
+                    posicao = parametro.end()
+                if not linha.startswith("]", posicao):
+                    return None
+                posicao += 1
+                elementos.append((sd_id.group(1), parametros))
+            if not elementos:
+                return None
+
+        if posicao < len(linha) and linha[posicao] != " ":
+            return None
+        registro = {"cabecalho": cabecalho, "sd": elementos, "msg": linha[posicao + 1 :] or None}
+
+        campos = [
+            (nome, cabecalho, indice)
+            for indice, nome in enumerate(_CABECALHO_SYSLOG, 1)
+            if cabecalho[indice] != "-"
+        ]
+        for sd_id, parametros in elementos:
+            campos.extend((f"sd.{sd_id}.{parametro[0]}", parametro, 1) for parametro in parametros)
+        if registro["msg"] is not None:
+            campos.append(("msg", registro, "msg"))
+        return registro, campos
+
+    def remontar(self, registro):
+        estruturado = "".join(
+            f"[{sd_id}" + "".join(f' {nome}="{_escapar_sd(valor)}"' for nome, valor in parametros) + "]"
+            for sd_id, parametros in registro["sd"]
+        )
+        partes = registro["cabecalho"] + [estruturado or "-"]
+        if registro["msg"] is not None:
+            partes.append(registro["msg"])
+        return " ".join(partes)
+
+
+class LeitorCSV:
+    """
+    CSV com cabeçalho na 1ª linha não vazia (o separador é detectado nela):
+    campos = nomes das colunas. Um registro por linha física (sem quebras
+    dentro de aspas).
+    """
+
+    def __init__(self):
+        self.colunas = None
+        self.dialeto = csv.excel
+        self.linha_cabecalho = 0
+        # Coluna de senha: o nome dela não aparece nas linhas, o pré-filtro não pode pular nada
+        self.pre_filtro_seguro = True
+
+    def ler_cabecalho(self, numero_linha, linha, perfil):
+        try:
+            self.dialeto = csv.Sniffer().sniff(linha, delimiters=",;\t|")
+        except csv.Error:
+            self.dialeto = csv.excel
+        colunas = next(csv.reader([linha], self.dialeto), [])
+        self.colunas = [coluna.strip() or f"coluna_{i}" for i, coluna in enumerate(colunas, 1)]
+        self.linha_cabecalho = numero_linha
+        self.pre_filtro_seguro = not any(
+            "VALOR_SENHA" in perfil.detectores(coluna) for coluna in self.colunas
+        )
+
+    def ler(self, linha):
+        try:
+            valores = next(csv.reader([linha], self.dialeto), [])
+        except csv.Error:
+            return None
+        colunas = self.colunas or []
+        campos = [
+            (colunas[i] if i < len(colunas) else f"coluna_{i + 1}", valores, i)
+            for i, valor in enumerate(valores)
+            if valor
+        ]
+        return valores, campos
+
+    def remontar(self, registro):
+        saida = io.StringIO()
+        csv.writer(saida, self.dialeto, lineterminator="").writerow(registro)
+        return saida.getvalue()
+
+
+_LEITORES = {"jsonl": LeitorJSONL, "syslog": LeitorSyslog, "csv": LeitorCSV}
+
+
+class AnalisadorEstruturado:
+    """
+    Analisa um registro de um formato estruturado: lê os campos, roda em cada
+    um só os detectores do perfil e mascara o que for sensível no próprio
+    campo (a linha exibida é remontada a partir dos campos já mascarados).
+    """
+
+    def __init__(self, formato, regras=None):
+        self.formato = formato
+        self.leitor = _LEITORES[formato]()
+        self.perfil = Perfil(PERFIS[formato] if regras is None else regras)
+
+    @property
+    def precisa_cabecalho(self):
+        return isinstance(self.leitor, LeitorCSV) and self.leitor.colunas is None
+
+    def ler_cabecalho(self, numero_linha, linha):
+        self.leitor.ler_cabecalho(numero_linha, linha, self.perfil)
+
+    def _achados(self, texto, detectores):
+        if "VALOR_SENHA" in detectores:
+            # Senha vazia (ou só espaços) não vaza nada
+            return [Achado("SENHA", texto, 0, len(texto))] if texto.strip() else []
+        tipos = detectores & DLP
+        if not tipos or not pode_conter_achado(texto):
+            return []
+        return varrer_texto(texto, tipos=None if tipos == DLP else tipos)
+
+    def analisar(self, linha):
+        """
+        (linha_segura, alertas) de uma linha do formato, com alertas
+        (id_alerta, valor, inicio, fim, campo) e posições dentro do campo.
+        None se a linha não é um registro do formato (fica para o texto livre).
+        """
+        lido = self.leitor.ler(linha)
+        if lido is None:
+            return None
+        registro, campos = lido
+
+        alertas = []
+        mascarado = False
+        for caminho, recipiente, chave in campos:
+            detectores = self.perfil.detectores(caminho)
+            if not detectores:
+                continue
+            valor = recipiente[chave]
+            texto = valor if isinstance(valor, str) else str(valor)
+            achados = self._achados(texto, detectores)
+            alertas.extend(
+                analisar_campo_compacto(caminho, texto, achados, "GLOSSARIO" in detectores)
+            )
+            if any(achado.tipo in _PRIORIDADE_MASCARA for achado in achados):
+                recipiente[chave] = sanitizar_log_str(texto, achados)
+                mascarado = True
+
+        return (self.leitor.remontar(registro) if mascarado else linha), alertas
+
+
+def primeira_linha(origem, limite=64 * 1024):
+    """
+    (numero_linha, texto) da 1ª linha não vazia de um caminho ou stream binário
+    posicionável (que volta para onde estava), ou None.
+    """
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, "rb") as f:
+            return primeira_linha(f, limite)
+    if isinstance(origem, io.TextIOBase) or not origem.seekable():
+        return None
+
+    posicao = origem.tell()
+    try:
+        for numero_linha in range(1, 1001):
+            bruta = origem.readline(limite)
+            if not bruta:
+                return None
+            texto = bruta.decode("utf-8", errors="ignore").strip()
+            if texto:
+                return numero_linha, texto
+        return None
+    finally:
+        origem.seek(posicao)
+
+
+def detectar_estruturado(origem, nome=None):
+    """
+    Formato estruturado de um log: "csv"/"jsonl" pela extensão do nome (ou do
+    caminho), "jsonl"/"syslog" pela 1ª linha não vazia. None = texto livre.
+    """
+    if nome is None and isinstance(origem, (str, os.PathLike)):
+        nome = os.fspath(origem)
+    if nome:
+        formato = EXTENSOES_ESTRUTURADAS.get(os.path.splitext(nome)[1].lower())
+        if formato:
+            return formato
+
+    primeira = primeira_linha(origem)
+    if primeira is None:
+        return None
+    texto = primeira[1]
+    if texto.startswith("{") and LeitorJSONL().ler(texto) is not None:
+        return "jsonl"
+    if LeitorSyslog().ler(texto) is not None:
+        return "syslog"
+    return None
@@ -1,6 +1,10 @@
+import io
 import os
 import re
 
+# Pré-compilada: normalizar_texto roda em toda linha (análise e pré-filtro)
+_RE_PONTUACAO = re.compile(r"[^\w\s]")
+
 
 def normalizar_texto(texto):
     """
@@ -13,7 +17,7 @@ def normalizar_texto(texto):
     texto = texto.lower()
 
     # Mantém apenas letras, números e espaços
-    texto = re.sub(r"[^\w\s]", "", texto)
+    texto = _RE_PONTUACAO.sub("", texto)
     return texto
 
 
@@ -29,6 +33,110 @@ def tratar_quebras_de_linha(texto_bruto):
 
     return texto_tratado
 
+
+_RE_PALAVRA = re.compile(r"\w+")
+
+
+def ler_blocos_de_texto(origem, tamanho_bloco):
+    """
+    Lê um caminho ou stream (binário ou texto) em blocos de texto.
+    Mesma decodificação do upload (UTF-8 ignorando erros, quebras universais).
+    """
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, "r", encoding="utf-8", errors="ignore") as f:
+            yield from ler_blocos_de_texto(f, tamanho_bloco)
+        return
+
+    if isinstance(origem, io.TextIOBase):
+        fluxo = origem
+    else:
+        fluxo = io.TextIOWrapper(origem, encoding="utf-8", errors="ignore")
+
+    try:
+        while True:
+            bloco = fluxo.read(tamanho_bloco)
+            if not bloco:
+                break
+            yield bloco
+    finally:
+        # Solta o stream binário sem fechá-lo (ele pertence a quem chamou)
+        if fluxo is not origem:
+            fluxo.detach()
+
+
+def _dividir_linhas_fisicas(blocos_rotulados):
+    # Cada linha física herda o rótulo (ex: nº da página) do bloco onde começou
+    pendente = []
+    rotulo_pendente = None
+    for rotulo, bloco in blocos_rotulados:
+        partes = bloco.split("\n")
+        if not any(pendente):
+            rotulo_pendente = rotulo
+        if len(partes) == 1:
+            pendente.append(bloco)
+            continue
+        pendente.append(partes[0])
+        yield "".join(pendente), rotulo_pendente
+        for parte in partes[1:-1]:
+            yield parte, rotulo
+        pendente = [partes[-1]]
+        rotulo_pendente = rotulo
+    yield "".join(pendente), rotulo_pendente
+
+
+def iterar_linhas_rotuladas(blocos_rotulados):
+    """
+    🌊 Versão em fluxo de tratar_quebras_de_linha(texto).split("\\n").
+    Recebe o texto em blocos (rotulo, texto) de qualquer tamanho e devolve
+    (numero_linha, linha, rotulo) com a mesma numeração e as mesmas junções de
+    hifenização do texto inteiro, mesmo quando a palavra quebrada cai na
+    fronteira entre dois blocos. A linha fica com o rótulo de onde começou.
+    """
+    numero_linha = 0
+    atual = None
+    # Até onde a última junção "consumiu" a linha atual (a regex não reaproveita)
+    consumido = 0
+    # Linhas em branco depois de um hífen: somem se a junção acontecer
+    brancos = []
+
+    for fisica, rotulo in _dividir_linhas_fisicas(blocos_rotulados):
+        if atual is None:
+            atual, rotulo_atual, consumido = fisica, rotulo, 0
+            continue
+
+        # A linha atual termina em "palavra-"? Então pode colar na próxima
+        fim = len(atual) - 2
+        if fim >= consumido and atual.endswith("-") and _RE_PALAVRA.match(atual, fim):
+            sem_espaco = fisica.lstrip()
+            if not sem_espaco:
+                brancos.append((fisica, rotulo))
+                continue
+            palavra = _RE_PALAVRA.match(sem_espaco)
+            if palavra:
+                consumido = len(atual) - 1 + palavra.end()
+                atual = atual[:-1] + sem_espaco
+                brancos = []
+                continue
+
+        for linha, rotulo_linha in [(atual, rotulo_atual)] + brancos:
+            numero_linha += 1
+            yield numero_linha, linha, rotulo_linha
+        atual, rotulo_atual, consumido, brancos = fisica, rotulo, 0, []
+
+    for linha, rotulo_linha in [(atual, rotulo_atual)] + brancos:
+        numero_linha += 1
+        yield numero_linha, linha, rotulo_linha
+
+
+def iterar_linhas_fisicas(blocos):
+    """
+    (numero_linha, linha) das linhas físicas do texto em blocos, sem a junção
+    de hifenização (logs estruturados: cada linha é um registro inteiro).
+    """
+    blocos_rotulados = ((None, bloco) for bloco in blocos)
+    for numero_linha, (linha, _) in enumerate(_dividir_linhas_fisicas(blocos_rotulados), 1):
+        yield numero_linha, linha, None
+
     # --- NOVO BLOCO DE SEGURANÇA (APPSEC) ---
 
 
@@ -37,11 +145,12 @@ def validar_caminho_seguro(nome_arquivo, diretorio_base):
     🛡️ PREVENÇÃO DE PATH TRAVERSAL (CWE-22)
     """
     # 1. Transforma a pasta base em caminho absoluto (Ex: /home/user/projeto/inputs)
-    base_abs = os.path.abspath(diretorio_base)
+    # realpath resolve links simbólicos: um link dentro da pasta não pode apontar para fora
+    base_abs = os.path.realpath(diretorio_base)
 
     # 2. Junta a pasta com o nome do arquivo (AQUI ESTÁ A MÁGICA)
     # Ex: /home/user/projeto/inputs + CF_ATUALIZADA.pdf
-    caminho_final = os.path.abspath(os.path.join(base_abs, nome_arquivo))
+    caminho_final = os.path.realpath(os.path.join(base_abs, nome_arquivo))
 
     # 3. VERIFICAÇÃO DE SEGURANÇA (O Guardião)
     # Verifica se o caminho final começa exatamente com a pasta base